@@ -0,0 +1,420 @@
+import math
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict
+
+import faiss
+import numpy as np
+
+# Selection target: "recall" favours exactness, "latency" favours query speed
+INDEX_TARGET = os.environ.get("RAG_INDEX_TARGET", "balanced")
+INDEX_NPROBE = os.environ.get("RAG_INDEX_NPROBE")
+INDEX_EF_SEARCH = os.environ.get("RAG_INDEX_EF_SEARCH")
+# Vector storage: "float32" (exact), "fp16" (half the memory) or "sq8" (a quarter)
+INDEX_STORAGE = os.environ.get("RAG_INDEX_STORAGE", "float32")
+# Candidates re-scored with exact float32 vectors after a compressed search; 0 disables
+INDEX_RERANK = int(os.environ.get("RAG_INDEX_RERANK", "0"))
+# Minimum candidates re-scored for IVF-PQ, whose distances are too coarse to return as they are
+PQ_RERANK = int(os.environ.get("RAG_PQ_RERANK", "32"))
+
+# Upper corpus sizes for flat and HNSW indexes, per target; larger corpora use IVF
+SIZE_THRESHOLDS = {
+    "recall": (50_000, 2_000_000),
+    "balanced": (10_000, 500_000),
+    "latency": (2_000, 100_000),
+}
+
+# Training samples per IVF list recommended by FAISS, and a cap on the buffered sample
+TRAIN_POINTS_PER_LIST = 39
+MAX_TRAIN_SAMPLE = 65_536
+# Sample used to fit per-dimension ranges of 8-bit scalar quantizers
+SQ_TRAIN_SAMPLE = 16_384
+
+SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+STORAGE_TYPES = ("float32",) + tuple(SCALAR_QUANTIZERS)
+
+class IndexFactoryError(Exception):
+    """Raised when an index specification is invalid or cannot be built."""
+    pass
+
+@dataclass
+class IndexSpec:
+    """Index type and build/search parameters chosen for a corpus."""
+    kind: str
+    params: Dict[str, int] = field(default_factory=dict)
+    # Vector storage for flat, HNSW and IVF indexes; IVF-PQ always stores PQ codes
+    # but keeps the setting for its flat fallback
+    storage: str = "float32"
+
+    @property
+    def needs_training(self):
+        return self.kind in ("ivf", "ivfpq") or (self.storage == "sq8" and self.kind != "ivfpq")
+
+    @property
+    def exact(self):
+        return self.kind == "flat" and self.storage == "float32"
+
+def default_nlist(n_vectors):
+    """Number of IVF lists for a corpus size (about 4 * sqrt(n))."""
+    return int(min(65_536, max(16, 4 * math.sqrt(n_vectors))))
+
+def pq_subquantizers(dimension, bytes_per_vector):
+    """Largest divisor of the dimension not above the requested code size."""
+    for m in range(min(bytes_per_vector, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+def choose_index_spec(n_vectors, dimension, target=None, storage=None):
+    """
+    Choose an index type for a corpus size and latency/recall target.
+
+    Small corpora get an exact flat index, mid-size corpora HNSW, and very large
+    ones IVF (exact vectors when recall matters, PQ-compressed otherwise).
+    IndexBuilder always re-ranks IVF-PQ results against exact vectors.
+
+    Args:
+        n_vectors: Expected number of vectors (None means unknown, treated as small)
+        dimension: Embedding dimension
+        target: "recall", "balanced" or "latency" (defaults to RAG_INDEX_TARGET)
+        storage: "float32", "fp16" or "sq8" (defaults to RAG_INDEX_STORAGE)
+
+    Returns:
+        IndexSpec: The chosen index type and parameters
+
+    Raises:
+        IndexFactoryError: If the target or storage type is unknown
+    """
+    target = target or INDEX_TARGET
+    if target not in SIZE_THRESHOLDS:
+        raise IndexFactoryError(f"Unknown index target '{target}'. Use one of: {', '.join(SIZE_THRESHOLDS)}")
+    storage = storage or INDEX_STORAGE
+    if storage not in STORAGE_TYPES:
+        raise IndexFactoryError(f"Unknown index storage '{storage}'. Use one of: {', '.join(STORAGE_TYPES)}")
+
+    flat_max, hnsw_max = SIZE_THRESHOLDS[target]
+    n_vectors = n_vectors or 0
+
+    if n_vectors <= flat_max:
+        return IndexSpec("flat", storage=storage)
+
+    if n_vectors <= hnsw_max:
+        m, ef_search = {"recall": (48, 128), "balanced": (32, 64), "latency": (16, 32)}[target]
+        return IndexSpec("hnsw", {"m": m, "ef_construction": 2 * ef_search, "ef_search": ef_search}, storage)
+
+    nlist = default_nlist(n_vectors)
+    if target == "recall":
+        return IndexSpec("ivf", {"nlist": nlist, "nprobe": max(16, nlist // 32)}, storage)
+
+    # 384-d MiniLM vectors: 96 bytes keeps 4 dims per sub-quantizer, 48 bytes 8 dims
+    code_bytes = 96 if target == "balanced" else 48
+    return IndexSpec("ivfpq", {
+        "nlist": nlist,
+        "nprobe": max(8, nlist // 64),
+        "m": pq_subquantizers(dimension, code_bytes),
+        "nbits": 8
+    }, storage)
+
+def create_index(spec, dimension):
+    """
+    Instantiate an empty (possibly untrained) index for a spec.
+
+    Args:
+        spec: IndexSpec from choose_index_spec
+        dimension: Embedding dimension
+
+    Returns:
+        faiss.Index: The new index, using L2 distance like IndexFlatL2; fp16/sq8
+            storage uses scalar-quantized codes instead of float32 vectors
+
+    Raises:
+        IndexFactoryError: If the spec kind is unknown
+    """
+    quantizer_type = SCALAR_QUANTIZERS.get(spec.storage)
+
+    if spec.kind == "flat":
+        if quantizer_type is not None:
+            return faiss.IndexScalarQuantizer(dimension, quantizer_type, faiss.METRIC_L2)
+        return faiss.IndexFlatL2(dimension)
+
+    if spec.kind == "hnsw":
+        if quantizer_type is not None:
+            index = faiss.IndexHNSWSQ(dimension, quantizer_type, spec.params["m"])
+        else:
+            index = faiss.IndexHNSWFlat(dimension, spec.params["m"])
+        index.hnsw.efConstruction = spec.params["ef_construction"]
+        index.hnsw.efSearch = spec.params["ef_search"]
+        return index
+
+    if spec.kind in ("ivf", "ivfpq"):
+        quantizer = faiss.IndexFlatL2(dimension)
+        if spec.kind == "ivf" and quantizer_type is not None:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, spec.params["nlist"], quantizer_type, faiss.METRIC_L2)
+        elif spec.kind == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dimension, spec.params["nlist"])
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, spec.params["nlist"], spec.params["m"], spec.params["nbits"])
+        # The index must own its quantizer, or it dies with this Python reference
+        index.own_fields = True
+        quantizer.this.disown()
+        index.nprobe = spec.params["nprobe"]
+        return index
+
+    raise IndexFactoryError(f"Unknown index kind '{spec.kind}'")
+
+class RerankIndex:
+    """
+    A compressed or approximate index whose top candidates are re-scored exactly.
+
+    search() asks the wrapped index for ``candidates`` neighbours and re-ranks
+    them by exact squared L2 distance to float32 vectors, usually a memory map
+    on disk, so distances match an IndexFlatL2 over the same vectors. Vector
+    ids are positions in ``vectors``.
+    """
+
+    def __init__(self, index, vectors, candidates):
+        """
+        Args:
+            index: The FAISS index to search first
+            vectors: float32 array (or memmap) of shape (ntotal, d), row i for id i
+            candidates: Number of candidates fetched per query before re-ranking
+        """
+        self.index = index
+        self.vectors = vectors
+        self.candidates = candidates
+
+    @property
+    def ntotal(self):
+        return self.index.ntotal
+
+    @property
+    def d(self):
+        return self.index.d
+
+    def search(self, queries, k):
+        """
+        Search like faiss.Index.search.
+
+        Args:
+            queries: float32 array of shape (n, d)
+            k: Number of neighbours per query
+
+        Returns:
+            tuple: (distances, ids) arrays of shape (n, k); missing results are
+                padded with id -1 and the largest float32 distance, like FAISS
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        _, candidates = self.index.search(queries, max(k, self.candidates))
+
+        distances = np.full((len(queries), k), np.finfo(np.float32).max, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = found[found >= 0]
+            exact = ((np.asarray(self.vectors[found], dtype=np.float32) - query) ** 2).sum(axis=1)
+            best = np.argsort(exact, kind="stable")[:k]
+            distances[row, :len(best)] = exact[best]
+            ids[row, :len(best)] = found[best]
+        return distances, ids
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """
+    Tune query-time accuracy/speed on an index, ignoring parameters it does not have.
+
+    Args:
+        index: A FAISS index
+        nprobe: Number of IVF lists visited per query
+        ef_search: HNSW candidate list size per query
+    """
+    if isinstance(index, RerankIndex):
+        index = index.index
+    ivf = faiss.try_extract_index_ivf(index)
+    if nprobe is not None and ivf is not None:
+        ivf.nprobe = int(nprobe)
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(ef_search)
+
+def index_nbytes(index):
+    """
+    Estimate the memory held by an index's vectors and graph links, in bytes.
+
+    Args:
+        index: A FAISS index
+
+    Returns:
+        int: Approximate size; coarse quantizers and small tables are ignored, as
+            are the memory-mapped float32 vectors of a RerankIndex
+    """
+    if isinstance(index, RerankIndex):
+        index = index.index
+    if isinstance(index, faiss.IndexIDMap2):
+        # Vectors plus the id array and its reverse lookup table
+        return index_nbytes(faiss.downcast_index(index.index)) + index.ntotal * 8 * 3
+    if hasattr(index, "hnsw"):
+        storage = faiss.downcast_index(index.storage)
+        # Stored vectors plus one int32 per graph link
+        return storage.sa_code_size() * index.ntotal + index.hnsw.neighbors.size() * 4
+    try:
+        return index.sa_code_size() * index.ntotal
+    except RuntimeError:
+        return index.d * 4 * index.ntotal
+
+def min_training_vectors(spec):
+    """Minimum number of vectors needed to train an index of this spec."""
+    if not spec.needs_training:
+        return 0
+    if spec.kind not in ("ivf", "ivfpq"):
+        # Only the scalar quantizer's value ranges are fitted
+        return 1
+    minimum = spec.params["nlist"]
+    if spec.kind == "ivfpq":
+        minimum = max(minimum, 2 ** spec.params["nbits"])
+    return minimum
+
+class ReservoirSample:
+    """
+    A fixed-size uniform sample of a stream of vector batches.
+
+    Vector i of the stream replaces a random slot with probability
+    size / (i + 1) (Algorithm R), so the sample does not depend on the order
+    batches arrive in; crawl order groups pages by site section.
+    """
+
+    def __init__(self, size, dimension, seed=0):
+        """
+        Args:
+            size: Number of vectors kept
+            dimension: Vector dimension
+            seed: Random seed, so samples are reproducible
+        """
+        self.size = size
+        self.count = 0
+        self._vectors = np.empty((size, dimension), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def vectors(self):
+        """The sampled vectors; all of them while fewer than ``size`` were added."""
+        return self._vectors[:min(self.count, self.size)]
+
+    def add(self, vectors):
+        """
+        Offer a batch of vectors to the sample.
+
+        Args:
+            vectors: Array of shape (n, dimension)
+        """
+        first = self.count
+        self.count += len(vectors)
+        filled = max(0, min(len(vectors), self.size - first))
+        self._vectors[first:first + filled] = vectors[:filled]
+        if filled == len(vectors):
+            return
+        positions = np.arange(first + filled, self.count)
+        slots = self._rng.integers(0, positions + 1)
+        chosen = np.flatnonzero(slots < self.size)
+        # A later vector drawn into the same slot wins, as in the sequential algorithm
+        _, last = np.unique(slots[chosen][::-1], return_index=True)
+        chosen = chosen[::-1][last]
+        self._vectors[slots[chosen]] = vectors[filled + chosen]
+
+class IndexBuilder:
+    """
+    Build an index from vector batches, training it on a sample when required.
+
+    Indexes that need training keep a uniform reservoir sample of every vector
+    added, since crawl order clusters pages by site section and the first
+    batches alone would skew the centroids and value ranges. Until finish()
+    trains on the sample, the float32 vectors are streamed to an anonymous
+    temporary file; they are then added in batches from a memory map of it.
+    If the corpus turns out too small to train, the builder falls back to a
+    flat index. With ``rerank`` set and an inexact index, the same file backs
+    the resulting RerankIndex. IVF-PQ indexes re-rank at least PQ_RERANK
+    candidates whatever ``rerank`` says, so their hits and distances are exact
+    like those of the other index kinds.
+    """
+
+    def __init__(self, dimension, expected_vectors=None, target=None, storage=None, rerank=None, seed=0):
+        """
+        Args:
+            dimension: Embedding dimension
+            expected_vectors: Estimated corpus size used to choose the index type
+            target: "recall", "balanced" or "latency" (defaults to RAG_INDEX_TARGET)
+            storage: "float32", "fp16" or "sq8" (defaults to RAG_INDEX_STORAGE)
+            rerank: Candidates to re-rank exactly, 0 to disable (defaults to RAG_INDEX_RERANK)
+            seed: Seed of the training sample, so builds are reproducible
+        """
+        self.dimension = dimension
+        self.spec = choose_index_spec(expected_vectors, dimension, target, storage)
+        self.index = create_index(self.spec, dimension)
+        self.rerank = INDEX_RERANK if rerank is None else rerank
+        if self.spec.kind == "ivfpq":
+            self.rerank = max(self.rerank, PQ_RERANK)
+        self.count = 0
+        self._sample = None
+        self._train_size = 0
+        if self.spec.kind in ("ivf", "ivfpq"):
+            self._train_size = min(MAX_TRAIN_SAMPLE, TRAIN_POINTS_PER_LIST * self.spec.params["nlist"])
+        elif self.spec.needs_training:
+            self._train_size = SQ_TRAIN_SAMPLE
+        if self._train_size:
+            self._sample = ReservoirSample(self._train_size, dimension, seed)
+        self._vectors_file = None
+        if self.spec.needs_training or (self.rerank > 0 and not self.spec.exact):
+            self._vectors_file = tempfile.TemporaryFile(prefix="rag-vectors-")
+
+    def add(self, vectors):
+        """
+        Add a batch of float32 vectors.
+
+        Args:
+            vectors: Array of shape (n, dimension)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.count += len(vectors)
+        if self._vectors_file is not None:
+            vectors.tofile(self._vectors_file)
+
+        if self.spec.needs_training:
+            self._sample.add(vectors)
+        else:
+            self.index.add(vectors)
+
+    def finish(self):
+        """
+        Return the built index, training it on the sample or downgrading it first.
+
+        Returns:
+            faiss.Index or RerankIndex: The populated index
+        """
+        vectors = None
+        if self._vectors_file is not None:
+            self._vectors_file.flush()
+            if self.count:
+                vectors = np.memmap(self._vectors_file, dtype=np.float32, mode="r", shape=(self.count, self.dimension))
+
+        if self.spec.needs_training:
+            if self.count < min_training_vectors(self.spec):
+                # Too few vectors to train; an exact-search index is fast at this size anyway
+                self.spec = IndexSpec("flat", storage=self.spec.storage)
+                self.index = create_index(self.spec, self.dimension)
+            if self.count:
+                if self.spec.needs_training:
+                    self.index.train(self._sample.vectors)
+                for start in range(0, self.count, self._train_size):
+                    self.index.add(np.ascontiguousarray(vectors[start:start + self._train_size]))
+            self._sample = None
+
+        set_search_params(self.index, INDEX_NPROBE, INDEX_EF_SEARCH)
+
+        if self._vectors_file is None:
+            return self.index
+        if vectors is None or self.rerank <= 0 or self.spec.exact:
+            # Not re-ranking, or the flat fallback is exact already
+            self._vectors_file.close()
+            self._vectors_file = None
+            return self.index
+        return RerankIndex(self.index, vectors, self.rerank)
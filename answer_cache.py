@@ -0,0 +1,213 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, List
+
+import faiss
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RAG_ANSWER_CACHE_SIZE", "1000"))
+# Seconds a cached answer is served; 0 disables expiry
+DEFAULT_TTL = float(os.environ.get("RAG_ANSWER_CACHE_TTL", "3600"))
+# Cosine similarity above which a past question counts as the same question
+DEFAULT_SIMILARITY = float(os.environ.get("RAG_ANSWER_CACHE_SIMILARITY", "0.95"))
+# Nearest past questions checked per get_similar search, so expired ones do not hide valid ones
+SIMILAR_CANDIDATES = 8
+
+@dataclass
+class CachedAnswer:
+    """A generated answer and the chunks it was generated from."""
+    question: str
+    answer: str
+    source_ids: List[Hashable] = field(default_factory=list)
+    stored_at: float = 0.0
+
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
+def _unit_vector(embedding):
+    vector = np.array(embedding, dtype=np.float32).reshape(1, -1)
+    faiss.normalize_L2(vector)
+    return vector
+
+class _Site:
+    def __init__(self, dimension, store_keys):
+        # Inner product over unit vectors is cosine similarity
+        self.index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+        self.keys = {}
+        # Vector stores the answers were generated from, for invalidate()
+        self.store_keys = set(store_keys)
+
+class AnswerCache:
+    """
+    In-memory cache of generated answers, shared by all sessions.
+
+    Answers are keyed by site (the vector store key, so a changed site never
+    serves stale answers) and question. A "site" can also be a combined key for
+    several stores searched together (corpus.ShardedCorpus.key); invalidating
+    one store drops the answers of every combined key that includes it. get()
+    matches the normalized question text exactly; get_similar() finds
+    paraphrases through a small per-site FAISS index over the embeddings of
+    past questions. ``hits`` counts both kinds of hit; ``misses`` counts
+    get_similar calls that found nothing.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, similarity_threshold=DEFAULT_SIMILARITY):
+        """
+        Args:
+            max_entries: Answers kept before least recently used ones are evicted
+            ttl: Seconds an answer is served; 0 or None never expires
+            similarity_threshold: Minimum cosine similarity for get_similar hits
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._ids = {}
+        self._sites = {}
+        # Store key -> site keys whose answers were generated from that store
+        self._dependents = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, site_key, question):
+        """
+        Return the cached answer for the same question, ignoring case and punctuation.
+
+        Args:
+            site_key: Key of the site's vector store
+            question: The user's question
+
+        Returns:
+            CachedAnswer or None
+        """
+        with self._lock:
+            return self._hit((site_key, normalize_question(question)))
+
+    def get_similar(self, site_key, embedding):
+        """
+        Return the cached answer for the most similar past question on this site.
+
+        Args:
+            site_key: Key of the site's vector store
+            embedding: Embedding of the new question
+
+        Returns:
+            CachedAnswer or None: None if no past question reaches the threshold
+        """
+        query = _unit_vector(embedding)
+        with self._lock:
+            site = self._sites.get(site_key)
+            while site is not None and site.index.ntotal:
+                similarities, ids = site.index.search(query, min(SIMILAR_CANDIDATES, site.index.ntotal))
+                for similarity, entry_id in zip(similarities[0], ids[0]):
+                    if entry_id < 0 or similarity < self.similarity_threshold:
+                        site = None
+                        break
+                    # An expired answer is removed from the index and the next candidate tried
+                    entry = self._hit(site.keys[int(entry_id)])
+                    if entry is not None:
+                        return entry
+            self.misses += 1
+            return None
+
+    def put(self, site_key, question, embedding, answer, source_ids, store_keys=None):
+        """
+        Cache an answer.
+
+        Args:
+            site_key: Key of the site's vector store, or a combined key for several stores
+            question: The user's question
+            embedding: Embedding of the question
+            answer: The generated answer
+            source_ids: Chunk ids (or other chunk references) the answer was generated from
+            store_keys: Keys of the stores searched for the answer, if ``site_key``
+                combines several; invalidating any of them drops the answer
+        """
+        key = (site_key, normalize_question(question))
+        vector = _unit_vector(embedding)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            site = self._sites.get(site_key)
+            if site is None:
+                site = self._sites[site_key] = _Site(vector.shape[1], store_keys or (site_key,))
+                for store_key in site.store_keys:
+                    self._dependents.setdefault(store_key, set()).add(site_key)
+            entry_id = self._next_id
+            self._next_id += 1
+            site.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            site.keys[entry_id] = key
+
+            self._entries[key] = CachedAnswer(question, answer, list(source_ids), time.time())
+            self._ids[key] = entry_id
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, site_key):
+        """
+        Drop every answer cached for a store, e.g. when it is rebuilt.
+
+        Answers cached under combined keys that include the store are dropped too.
+
+        Args:
+            site_key: Key of the site's vector store
+        """
+        with self._lock:
+            for key in {site_key} | self._dependents.get(site_key, set()):
+                site = self._sites.get(key)
+                if site is None:
+                    continue
+                for entry_key in site.keys.values():
+                    self._entries.pop(entry_key, None)
+                    self._ids.pop(entry_key, None)
+                self._drop_site(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+            self._sites.clear()
+            self._dependents.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _hit(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl and time.time() - entry.stored_at > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def _remove(self, key):
+        del self._entries[key]
+        entry_id = self._ids.pop(key)
+        site = self._sites[key[0]]
+        site.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        del site.keys[entry_id]
+        if not site.keys:
+            self._drop_site(key[0])
+
+    def _drop_site(self, site_key):
+        site = self._sites.pop(site_key)
+        for store_key in site.store_keys:
+            dependents = self._dependents.get(store_key)
+            if dependents is not None:
+                dependents.discard(site_key)
+                if not dependents:
+                    del self._dependents[store_key]
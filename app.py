@@ -1,8 +1,17 @@
-from scraper import get_website_text, NetworkError, ContentExtractionError
-from embeddings import create_vector_store, ChunkingError, VectorStoreError, EmbeddingError
+from scraper import get_website_text, crawl_website, NetworkError, ContentExtractionError
+from http_cache import ResponseCache
+from embedding_cache import EmbeddingCache
+from embedding_engine import EmbeddingEngine, EMBED_WORKERS
+from embeddings import load_or_create_vector_store, load_or_refresh_site_store, vector_store_key, MODEL_NAME, ChunkingError, VectorStoreError, EmbeddingError
+from store_registry import VectorStoreRegistry
+from answer_cache import AnswerCache
+from corpus import ShardedCorpus
+from ingestion_jobs import JobManager, CANCELLED, CRAWLING, DONE, EMBEDDING, QUEUED
+from context_packing import pack_context
+from llm import generate_answer, generate_answer_stream, warm_up, STREAM_ANSWERS
+import metrics
+from contextlib import nullcontext
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
 import streamlit as st
 
 # Page configuration
@@ -12,64 +21,225 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load LLM model
+# Load both models in the background so the page renders immediately
+warm_up()
+
+# Shared on-disk cache of fetched pages, revalidated with ETag/Last-Modified
+@st.cache_resource
+def load_http_cache():
+    return ResponseCache()
+
+# Shared on-disk cache of chunk embeddings, so edited sites only encode new chunks
+@st.cache_resource
+def load_embedding_cache():
+    return EmbeddingCache(MODEL_NAME)
+
+# Worker processes for encoding large crawls (RAG_EMBED_WORKERS > 1), else encode in-process
+@st.cache_resource
+def load_embedding_engine():
+    if EMBED_WORKERS <= 1:
+        return None
+    return EmbeddingEngine(MODEL_NAME, workers=EMBED_WORKERS)
+
+# Built vector stores shared by all sessions, so memory grows with sites rather than users
+@st.cache_resource
+def load_store_registry():
+    return VectorStoreRegistry()
+
+# Answers to repeated and paraphrased questions, shared by all sessions
 @st.cache_resource
-def load_llm():
-    model_name = "google/flan-t5-base"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-    return tokenizer, model
+def load_answer_cache():
+    return AnswerCache()
 
-tokenizer, model = load_llm()
+# Prometheus endpoint at :RAG_METRICS_PORT/metrics, started once per process
+@st.cache_resource
+def start_metrics_server():
+    if not metrics.is_enabled() or not metrics.METRICS_PORT:
+        return None
+    return metrics.start_http_server()
+
+start_metrics_server()
 
-def generate_answer(prompt):
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True)
-    with torch.no_grad():
-        outputs = model.generate(**inputs, max_new_tokens=200, temperature=0.3)
-    answer = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return answer.strip()
+# Background ingestion shared by all sessions, so the same website is only processed once at a time
+@st.cache_resource
+def load_job_manager():
+    return JobManager()
+
+# Seconds between sidebar refreshes while a website is being processed
+JOB_POLL_SECONDS = 1.0
 
 # Initialize session state
-if "index" not in st.session_state:
-    st.session_state.index = None
-    st.session_state.chunks = None
-    st.session_state.model = None
+# The session's sites, each a shared store from the registry, searched together
+if "corpus" not in st.session_state:
+    st.session_state.corpus = ShardedCorpus()
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+if "job" not in st.session_state:
+    st.session_state.job = None
+
+if "job_notices" not in st.session_state:
+    st.session_state.job_notices = []
+
+def make_ingest(url, crawl, max_depth, max_pages):
+    """Build the background work for processing a website; it must not call Streamlit."""
+    # Resolved here, on the script thread, where Streamlit's resource caches are available
+    http_cache = load_http_cache()
+    embedding_cache = load_embedding_cache()
+    engine = load_embedding_engine()
+    registry = load_store_registry()
+    answer_cache = load_answer_cache()
+    
+    def ingest(job):
+        job.stage = CRAWLING
+        if crawl:
+            crawl_result = crawl_website(url, max_depth=max_depth, max_pages=max_pages, cache=http_cache, progress_callback=job.report_pages)
+            pages = crawl_result.pages
+            content = [page.text for page in pages]
+            if crawl_result.errors:
+                job.warnings.append(f" {len(crawl_result.errors)} page(s) could not be read and were skipped.")
+        else:
+            content = get_website_text(url, cache=http_cache)
+            job.report_pages(1, 1)
+        
+        job.stage = EMBEDDING
+        store_key = vector_store_key(content)
+        
+        def build_store():
+            # Answers cached against a previous build of this store are dropped
+            answer_cache.invalidate(store_key)
+            if crawl:
+                # Re-crawls update the site's store, encoding only new and changed pages
+                # Pages this crawl failed to read or did not reach keep their stored copy;
+                # deleted, thin and non-HTML pages are dropped
+                return load_or_refresh_site_store(
+                    url,
+                    pages,
+                    embedding_cache=embedding_cache,
+                    progress_callback=job.report_chunks,
+                    engine=engine,
+                    keep=crawl_result.skipped_urls,
+                    gone=crawl_result.gone_urls,
+                    complete=crawl_result.complete
+                )
+            return load_or_create_vector_store(
+                content,
+                embedding_cache=embedding_cache,
+                progress_callback=job.report_chunks,
+                engine=engine
+            )
+        
+        # Another session processing the same content shares its store (or its build);
+        # if this job is cancelled mid-build, the sessions waiting on it build it themselves
+        return registry.acquire(store_key, build_store, is_cancelled=lambda: job.cancelled)
+    
+    return ingest
+
+def answer_trace():
+    """Record the answer's stage timings when the breakdown is shown, else do nothing."""
+    if st.session_state.get("show_timings"):
+        return metrics.Trace()
+    return nullcontext()
+
+def finish_job(job):
+    """Swap a finished job's store into this session, or record why it failed."""
+    notices = st.session_state.job_notices
+    notices.extend(("warning", warning) for warning in job.warnings)
+    if job.stage == DONE:
+        shared = job.result
+        # Take this session's own reference; the store is re-registered if it was evicted meanwhile
+        store = load_store_registry().acquire(shared.key, lambda: (shared.index, shared.chunks, shared.model))
+        # Processing a site again replaces only that site; the others are untouched
+        previous = st.session_state.corpus.add(job.description, store)
+        if previous is not None:
+            previous.release()
+        notices.append(("success", f"Processed! {len(store.chunks)} chunks created."))
+    elif job.stage == CANCELLED:
+        notices.append(("info", "Processing was cancelled."))
+    elif isinstance(job.error, (NetworkError, ContentExtractionError, ChunkingError, VectorStoreError, EmbeddingError)):
+        notices.append(("error", f"Error: {str(job.error)}"))
+    else:
+        notices.append(("error", f"Unexpected error: {str(job.error)}"))
+    load_job_manager().release(job)
+    st.session_state.job = None
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress():
+    """Poll the session's ingestion job; chat keeps using the previous store meanwhile."""
+    job = st.session_state.job
+    if job is None:
+        return
+    if job.finished:
+        finish_job(job)
+        st.rerun()
+    
+    if job.stage == QUEUED:
+        st.progress(0.0, text="Waiting for another website to finish...")
+    elif job.stage == CRAWLING:
+        fraction = job.pages_done / job.pages_found if job.pages_found else 0.0
+        st.progress(fraction, text=f"Reading website... {job.pages_done}/{job.pages_found} pages")
+    else:
+        st.progress(job.fraction, text=f"Creating embeddings... {job.chunks} chunks")
+    if st.button("Cancel"):
+        # Other sessions waiting for the same website keep their job running
+        load_job_manager().release(job)
+        st.session_state.job = None
+        st.rerun()
+
 # Sidebar
 with st.sidebar:
     st.header("Website Processing")
     
     url = st.text_input("Enter website URL", placeholder="https://example.com")
     
+    crawl = st.checkbox("Crawl linked pages", help="Follow same-site links and sitemap.xml from this URL")
+    if crawl:
+        max_pages = st.number_input("Maximum pages", min_value=1, max_value=1000, value=50)
+        max_depth = st.number_input("Maximum link depth", min_value=0, max_value=10, value=2)
+    
     if st.button("Process Website"):
         if url:
-            try:
-                with st.spinner("Reading website..."):
-                    content = get_website_text(url)
-                
-                with st.spinner("Creating embeddings..."):
-                    index, chunks, embedding_model = create_vector_store(content)
-                
-                st.session_state.index = index
-                st.session_state.chunks = chunks
-                st.session_state.model = embedding_model
-                
-                st.success(f"Processed! {len(chunks)} chunks created.")
-                
-            except (NetworkError, ContentExtractionError, ChunkingError, VectorStoreError, EmbeddingError) as e:
-                st.error(f"Error: {str(e)}")
-            except Exception as e:
-                st.error(f"Unexpected error: {str(e)}")
+            if crawl:
+                job_key = f"{url}|crawl|{int(max_depth)}|{int(max_pages)}"
+                ingest = make_ingest(url, True, int(max_depth), int(max_pages))
+            else:
+                job_key = f"{url}|page"
+                ingest = make_ingest(url, False, 0, 1)
+            manager = load_job_manager()
+            previous = st.session_state.job
+            # Runs in the background; a repeated click joins the job already running
+            st.session_state.job = manager.submit(job_key, ingest, url)
+            if previous is not None:
+                manager.release(previous)
         else:
             st.warning(" Please enter a URL.")
     
+    for kind, notice in st.session_state.job_notices:
+        getattr(st, kind)(notice)
+    st.session_state.job_notices = []
+    
+    if st.session_state.job is not None:
+        show_job_progress()
+    
     # Show info if processed
-    if st.session_state.chunks is not None:
+    corpus = st.session_state.corpus
+    if len(corpus) > 0:
         st.divider()
-        st.info(f" Chunks: {len(st.session_state.chunks)}")
+        st.subheader("Sites")
+        for site in corpus.sites:
+            site_column, remove_column = st.columns([4, 1])
+            site_column.caption(f"{site} ({len(corpus.store(site).chunks)} chunks)")
+            if remove_column.button("✕", key=f"remove:{site}", help="Remove this site"):
+                corpus.remove(site).release()
+                st.rerun()
+        st.multiselect("Search in", corpus.sites, default=corpus.sites, key="search_sites", help="Limit answers to some of the sites")
+        st.info(f" Chunks: {corpus.chunk_count()}")
+        st.checkbox("Show timing breakdown", key="show_timings", help="Time each stage of every answer")
+        embedding_cache = load_embedding_cache()
+        st.caption(f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
+        answer_cache = load_answer_cache()
+        st.caption(f"Answer cache: {answer_cache.hits} hits, {answer_cache.misses} misses")
     
     # Clear chat button
     if len(st.session_state.messages) > 0:
@@ -87,7 +257,8 @@ for msg in st.session_state.messages:
         st.write(msg["content"])
 
 # Chat input
-if st.session_state.index is not None:
+corpus = st.session_state.corpus
+if len(corpus) > 0:
     if question := st.chat_input("Ask a question about the website"):
         # Add user message
         st.session_state.messages.append({"role": "user", "content": question})
@@ -98,44 +269,77 @@ if st.session_state.index is not None:
         
         # Generate response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
+            with st.spinner("Thinking..."), answer_trace() as trace:
                 try:
-                    # Search for relevant chunks
-                    question_embedding = st.session_state.model.encode([question])
-                    question_embedding = np.array(question_embedding)
-                    D, I = st.session_state.index.search(question_embedding, k=3)
+                    metrics.inc("rag_questions_total")
+                    # No selection searches every site
+                    sites = [site for site in st.session_state.get("search_sites", []) if site in corpus] or None
+                    corpus_key = corpus.key(sites)
+                    # Rebuilding any of these stores invalidates answers cached under corpus_key
+                    store_keys = corpus.store_keys(sites)
+                    answer_cache = load_answer_cache()
+                    
+                    # Repeated questions skip embedding; paraphrases skip retrieval and generation
+                    with metrics.span("answer.cache_lookup"):
+                        cached = answer_cache.get(corpus_key, question)
+                    if cached is None:
+                        with metrics.span("answer.encode"):
+                            question_embedding = corpus.model.encode([question])
+                        question_embedding = np.array(question_embedding)
+                        with metrics.span("answer.cache_similar"):
+                            cached = answer_cache.get_similar(corpus_key, question_embedding[0])
                     
-                    # Check relevance - if distance is too high, the question is likely off-topic
-                    # Lower distance = more relevant. Typical good matches are < 1.0
-                    min_distance = D[0][0]
+                    if cached is not None:
+                        metrics.inc("rag_answer_cache_hits_total")
+                        answer = cached.answer
+                        source_ids = cached.source_ids
+                        st.write(answer)
+                        st.caption("Answered from cache")
+                    else:
+                        # Search every selected site in parallel for relevant chunks
+                        with metrics.span("answer.search", shards=len(sites or corpus.sites)):
+                            hits = corpus.search(question_embedding[0], k=3, sites=sites)
+                        source_ids = [hit.source for hit in hits]
+                        
+                        # Check relevance - if distance is too high, the question is likely off-topic
+                        # Lower distance = more relevant. Typical good matches are < 1.0
+                        min_distance = hits[0].distance if hits else float("inf")
+                        
+                        if min_distance > 1.5:
+                            # Question is likely not related to the website content
+                            answer = None
+                        else:
+                            # Pack deduplicated context into flan-t5's input budget, keeping the question
+                            with metrics.span("answer.pack") as pack_span:
+                                packed = pack_context([corpus.chunk(source) for source in source_ids], question, source_ids)
+                                pack_span.set(tokens=packed.tokens, chunks=len(packed.source_ids))
+                            prompt = packed.prompt
+                            source_ids = packed.source_ids
+                            metrics.inc("rag_prompt_tokens_total", packed.tokens)
+                            
+                            with metrics.span("answer.generate", streamed=STREAM_ANSWERS):
+                                if STREAM_ANSWERS:
+                                    # Render tokens as they are decoded; write_stream returns the full text
+                                    answer = st.write_stream(generate_answer_stream(prompt)).strip()
+                                else:
+                                    answer = generate_answer(prompt)
+                                    st.write(answer)
+                            
+                            st.caption(f"Prompt: {packed.tokens} tokens from {len(source_ids)} chunk(s)")
+                            
+                            answer_cache.put(corpus_key, question, question_embedding[0], answer, source_ids, store_keys)
                     
-                    if min_distance > 1.5:
-                        # Question is likely not related to the website content
+                    if answer is None:
                         answer = "I couldn't find relevant information in the website to answer your question. This question might be outside the scope of the processed website content. Please ask questions related to the website's content."
                         st.warning(answer)
                         st.session_state.messages.append({"role": "assistant", "content": answer})
                     else:
-                        # Generate answer from relevant content
-                        retrieved_text = " ".join([st.session_state.chunks[i] for i in I[0]])
-                        prompt = f"""Answer the question using only the information in the context. If the context doesn't contain enough information to answer the question, say "I don't have enough information to answer this question based on the website content."
-
-Context:
-{retrieved_text}
-
-Question:
-{question}
-
-Answer:"""
-                        
-                        answer = generate_answer(prompt)
-                        st.write(answer)
-                        
                         # Show sources
                         with st.expander(" View Sources"):
-                            for idx, source_idx in enumerate(I[0]):
+                            for idx, source in enumerate(source_ids):
                                 st.text_area(
-                                    f"Source {idx + 1}",
-                                    st.session_state.chunks[source_idx],
+                                    f"Source {idx + 1} ({corpus.source_site(source)})",
+                                    corpus.chunk(source),
                                     height=100,
                                     disabled=True
                                 )
@@ -147,5 +351,10 @@ Answer:"""
                     error_msg = f"Error generating answer: {str(e)}"
                     st.error(error_msg)
                     st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                
+                if trace is not None and trace.spans:
+                    st.caption(f"Timings: {metrics.format_breakdown(trace)}")
+                # Refresh the Prometheus snapshot file, if RAG_METRICS_FILE is set
+                metrics.write_snapshot()
 else:
     st.info(" Please process a website first using the sidebar.")
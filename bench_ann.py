@@ -0,0 +1,105 @@
+"""
+Benchmark: recall@k and QPS of approximate indexes against the exact flat index.
+
+Synthetic, clustered, unit-normalized embeddings stand in for MiniLM vectors
+(384 dimensions by default). For every index kind the factory can build, the
+script reports build time, recall@k against IndexFlatL2 and single-query
+throughput (the way app.py searches) across a sweep of nprobe / efSearch
+values, plus the spec choose_index_spec would pick for each target.
+
+Usage:
+    python bench_ann.py                       # 100k vectors
+    python bench_ann.py --vectors 20000 200000 --k 3
+"""
+
+import argparse
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from ann_index import IndexSpec, SIZE_THRESHOLDS, choose_index_spec, create_index, set_search_params, default_nlist, pq_subquantizers
+
+def make_embeddings(n, dimension, clusters=200, seed=0):
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def measure(index, queries, truth, k):
+    """Return (recall@k, queries per second) using one query per search call."""
+    results = np.empty((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, ids = index.search(queries[i:i + 1], k)
+        results[i] = ids[0]
+    seconds = time.perf_counter() - start
+    return recall_at_k(results, truth), len(queries) / seconds
+
+def build(spec, vectors):
+    start = time.perf_counter()
+    index = create_index(spec, vectors.shape[1])
+    if spec.needs_training:
+        index.train(vectors[:65_536])
+    index.add(vectors)
+    return index, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, nargs="+", default=[100_000], help="Corpus sizes")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.vectors:
+        vectors = make_embeddings(n + args.queries, args.dimension)
+        corpus, queries = vectors[:n], vectors[n:]
+
+        print("=" * 78)
+        print(f"{n} vectors x {args.dimension} dims, {args.queries} queries, k={args.k}")
+        for target in SIZE_THRESHOLDS:
+            print(f"  choose_index_spec(target={target!r}) -> {choose_index_spec(n, args.dimension, target)}")
+        print("=" * 78)
+        print(f"{'index':<24} {'param':>14} {'build s':>9} {'recall@k':>9} {'QPS':>10}")
+
+        flat, build_seconds = build(IndexSpec("flat"), corpus)
+        _, truth = flat.search(queries, args.k)
+        recall, qps = measure(flat, queries, truth, args.k)
+        print(f"{'flat':<24} {'-':>14} {build_seconds:>9.2f} {recall:>9.3f} {qps:>10.0f}")
+
+        for m in (16, 32):
+            spec = IndexSpec("hnsw", {"m": m, "ef_construction": 128, "ef_search": 16})
+            index, build_seconds = build(spec, corpus)
+            for ef_search in (16, 32, 64, 128):
+                set_search_params(index, ef_search=ef_search)
+                recall, qps = measure(index, queries, truth, args.k)
+                print(f"{'hnsw m=' + str(m):<24} {'efSearch=' + str(ef_search):>14} {build_seconds:>9.2f} {recall:>9.3f} {qps:>10.0f}")
+
+        nlist = default_nlist(n)
+        specs = [
+            IndexSpec("ivf", {"nlist": nlist, "nprobe": 1}),
+            IndexSpec("ivfpq", {"nlist": nlist, "nprobe": 1, "m": pq_subquantizers(args.dimension, 96), "nbits": 8}),
+            IndexSpec("ivfpq", {"nlist": nlist, "nprobe": 1, "m": pq_subquantizers(args.dimension, 48), "nbits": 8}),
+        ]
+        for spec in specs:
+            index, build_seconds = build(spec, corpus)
+            label = f"{spec.kind} nlist={nlist}" + (f" m={spec.params['m']}" if "m" in spec.params else "")
+            for nprobe in sorted({1, 4, 16, max(8, nlist // 64), max(16, nlist // 32)}):
+                set_search_params(index, nprobe=nprobe)
+                recall, qps = measure(index, queries, truth, args.k)
+                print(f"{label:<24} {'nprobe=' + str(nprobe):>14} {build_seconds:>9.2f} {recall:>9.3f} {qps:>10.0f}")
+
+    return 0
+
+if __name__ == "__main__":
+    faiss.omp_set_num_threads(1)
+    sys.exit(main())
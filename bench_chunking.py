@@ -0,0 +1,75 @@
+"""
+Micro-benchmark: chunking.iter_chunks versus the previous textwrap.wrap(text, 500) path.
+
+Generates deterministic scraped-style text (single-spaced sentences) of each
+requested size and reports wall time, throughput and chunk counts for both
+chunkers. The token-aware chunker uses the all-MiniLM-L6-v2 tokenizer when
+transformers is installed, and a word-count estimate otherwise.
+
+Usage:
+    python bench_chunking.py                 # 1, 10 and 50 MB
+    python bench_chunking.py --sizes 1 5     # custom sizes in MB
+    python bench_chunking.py --max-wrap-mb 10
+"""
+
+import argparse
+import random
+import sys
+import time
+from textwrap import wrap
+
+from chunking import default_token_counter, estimate_token_counter, iter_chunks
+
+WORDS = (
+    "the website content retrieval model index search vector chunk answer question "
+    "documentation page section example install configure server client request "
+    "response error cache token embedding sentence paragraph data user service"
+).split()
+
+def make_text(size_bytes, seed=0):
+    """Generate roughly ``size_bytes`` of single-spaced prose."""
+    rng = random.Random(seed)
+    sentences = []
+    total = 0
+    while total < size_bytes:
+        words = rng.choices(WORDS, k=rng.randint(6, 28))
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+        sentences.append(sentence)
+        total += len(sentence) + 1
+    return " ".join(sentences)
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="Input sizes in MB")
+    parser.add_argument("--max-wrap-mb", type=float, default=None, help="Skip textwrap.wrap above this size")
+    args = parser.parse_args()
+
+    counter = default_token_counter()
+    counter_name = "word-count estimate" if counter is estimate_token_counter else "all-MiniLM-L6-v2 tokenizer"
+
+    print("=" * 72)
+    print(f"Chunking benchmark (token counter: {counter_name})")
+    print("=" * 72)
+    print(f"{'size':>8} {'chunker':>12} {'seconds':>10} {'MB/s':>10} {'chunks':>10}")
+
+    for size_mb in args.sizes:
+        text = make_text(int(size_mb * 1024 * 1024))
+
+        if args.max_wrap_mb is None or size_mb <= args.max_wrap_mb:
+            seconds, chunks = time_call(lambda: wrap(text, 500))
+            print(f"{size_mb:>6.0f}MB {'wrap':>12} {seconds:>10.2f} {size_mb / seconds:>10.2f} {len(chunks):>10}")
+        else:
+            print(f"{size_mb:>6.0f}MB {'wrap':>12} {'skipped':>10}")
+
+        seconds, count = time_call(lambda: sum(1 for _ in iter_chunks(text, token_counter=counter)))
+        print(f"{size_mb:>6.0f}MB {'iter_chunks':>12} {seconds:>10.2f} {size_mb / seconds:>10.2f} {count:>10}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark: memory and accuracy of compact index storage, with and without re-rank.
+
+Clustered unit vectors (or real embeddings saved with np.save) are indexed with
+float32, fp16 and sq8 storage, each with and without exact float32 re-ranking
+of the top candidates. For every configuration the script reports index memory,
+recall@k against an exact IndexFlatL2, the largest top-1 distance error, and
+how often the app's off-topic decision (top-1 distance above 1.5) agrees with
+the exact index, for queries both near and far from the corpus.
+
+Usage:
+    python bench_compact_index.py
+    python bench_compact_index.py --vectors 200000 --rerank 0 16 64 --target latency
+    python bench_compact_index.py --embeddings chunks.npy
+"""
+
+import argparse
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from ann_index import IndexBuilder, STORAGE_TYPES, index_nbytes
+from bench_ann import make_embeddings, recall_at_k
+
+# Distance above which app.py treats a question as off-topic
+OFF_TOPIC_DISTANCE = 1.5
+
+def make_queries(vectors, n_queries, seed=1):
+    """Half perturbed corpus vectors, half far from the corpus (negated, perturbed corpus vectors)."""
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.integers(0, len(vectors), n_queries)]
+    picked = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    near = picked[:n_queries // 2]
+    far = -picked[n_queries // 2:]
+    queries = np.vstack([near, far])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+def build(vectors, target, storage, rerank, batch_size=4096):
+    """Stream vectors through IndexBuilder the way create_vector_store does."""
+    start = time.perf_counter()
+    builder = IndexBuilder(vectors.shape[1], len(vectors), target, storage, rerank)
+    for i in range(0, len(vectors), batch_size):
+        builder.add(vectors[i:i + batch_size])
+    index = builder.finish()
+    return index, builder.spec, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--embeddings", help="Saved float32 embeddings (.npy) to use instead of synthetic ones")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--target", default="recall", help="Index target passed to choose_index_spec")
+    parser.add_argument("--storage", nargs="+", default=list(STORAGE_TYPES))
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 16], help="Re-rank candidate counts (0 = off)")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.ascontiguousarray(np.load(args.embeddings), dtype=np.float32)
+    else:
+        vectors = make_embeddings(args.vectors, args.dimension)
+    queries = make_queries(vectors, args.queries)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    truth_distances, truth = exact.search(queries, args.k)
+    truth_off_topic = truth_distances[:, 0] > OFF_TOPIC_DISTANCE
+    float32_bytes = vectors.nbytes
+
+    print("=" * 92)
+    print(f"Compact index benchmark ({len(vectors)} x {vectors.shape[1]} vectors, {len(queries)} queries, "
+          f"k={args.k}, target {args.target})")
+    print(f"Exact index: {float32_bytes / 2 ** 20:.1f} MB, {truth_off_topic.sum()} off-topic queries")
+    print("=" * 92)
+    print(f"{'storage':<8} {'rerank':>6} {'index':<6} {'build s':>8} {'MB':>8} {'ratio':>6} "
+          f"{f'recall@{args.k}':>9} {'max top-1 err':>14} {'off-topic agree':>16}")
+    for storage in args.storage:
+        for rerank in args.rerank:
+            index, spec, seconds = build(vectors, args.target, storage, rerank)
+            distances, ids = index.search(queries, args.k)
+            nbytes = index_nbytes(index)
+            error = float(np.abs(distances[:, 0] - truth_distances[:, 0]).max())
+            agree = ((distances[:, 0] > OFF_TOPIC_DISTANCE) == truth_off_topic).mean()
+            print(f"{storage:<8} {rerank:>6} {spec.kind:<6} {seconds:>8.2f} {nbytes / 2 ** 20:>8.1f} "
+                  f"{nbytes / float32_bytes:>6.2f} {recall_at_k(ids, truth):>9.3f} {error:>14.2e} {agree:>16.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
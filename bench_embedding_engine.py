@@ -0,0 +1,72 @@
+"""
+Benchmark: chunk embedding throughput in-process versus the multi-process engine.
+
+A synthetic corpus of chunks with varied lengths is encoded once in-process
+(SentenceTransformer.encode) and then by EmbeddingEngine with 1, 2, 4 and N
+workers (N = CPU count). For each configuration the script reports worker
+start-up time, chunks/sec, speedup over in-process encoding and the largest
+difference from the in-process embeddings.
+
+Usage:
+    python bench_embedding_engine.py
+    python bench_embedding_engine.py --chunks 20000 --workers 1 2 4 8 --batch-size 128
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from embedding_engine import EmbeddingEngine
+from embeddings import MODEL_NAME, get_embedding_model
+
+WORDS = (
+    "website chatbot answers questions about pages using retrieved chunks embeddings index "
+    "vectors search model context prompt crawler sitemap links cache latency memory workers"
+).split()
+
+def make_chunks(n_chunks, seed=0):
+    """Chunks of 5 to 120 words, roughly the spread the chunker produces."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(5, 120, size=n_chunks)
+    return [" ".join(rng.choice(WORDS, size=length)) + "." for length in lengths]
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}))
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per worker batch")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+
+    model = get_embedding_model()
+    model.encode(chunks[:args.batch_size])
+    start = time.perf_counter()
+    reference = np.asarray(model.encode(chunks, batch_size=args.batch_size), dtype=np.float32)
+    baseline = time.perf_counter() - start
+
+    print("=" * 76)
+    print(f"Embedding engine benchmark ({len(chunks)} chunks, batch {args.batch_size}, {cpus} CPUs)")
+    print("=" * 76)
+    print(f"{'configuration':<16} {'start s':>8} {'chunks/s':>10} {'speedup':>8} {'max diff':>10}")
+    print(f"{'in-process':<16} {'-':>8} {len(chunks) / baseline:>10.1f} {'1.00x':>8} {'-':>10}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        with EmbeddingEngine(MODEL_NAME, workers=workers, batch_size=args.batch_size) as engine:
+            startup = time.perf_counter() - start
+            engine.encode(chunks[:args.batch_size * workers])
+            start = time.perf_counter()
+            embeddings = engine.encode(chunks)
+            elapsed = time.perf_counter() - start
+        difference = float(np.abs(embeddings - reference).max())
+        print(f"{f'{workers} worker(s)':<16} {startup:>8.1f} {len(chunks) / elapsed:>10.1f} "
+              f"{baseline / elapsed:>7.2f}x {difference:>10.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
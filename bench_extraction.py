@@ -0,0 +1,96 @@
+"""
+Benchmark: HTML extraction backends over the saved pages in fixtures/html.
+
+Each backend (bs4, lxml, selectolax), with and without main-content mode,
+extracts every fixture page repeatedly. The script reports pages/sec, the
+speedup over the current extractor (bs4 without main-content mode), and how
+its output compares to bs4 in the same mode: pages with identical text, mean
+text similarity and pages with identical links. Backends whose parser is not
+installed are reported as unavailable.
+
+Usage:
+    python bench_extraction.py
+    python bench_extraction.py --repeats 50 --backends bs4 lxml
+    python bench_extraction.py --fixtures path/to/saved/pages --scale 20
+"""
+
+import argparse
+import difflib
+import glob
+import os
+import sys
+import time
+
+from html_extraction import BACKENDS, HTMLExtractionError, extract
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+BASE_URL = "https://example.com/page"
+
+def load_pages(directory, scale):
+    """Read the fixture pages, optionally repeating each page's body to make larger documents."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        if scale > 1 and "</body>" in html:
+            head, _, tail = html.rpartition("</body>")
+            body = head[head.find("<body"):]
+            html = head + body * (scale - 1) + "</body>" + tail
+        pages.append(html)
+    return pages
+
+def run(pages, backend, main_content, repeats):
+    """Return (pages/sec, outputs of the first pass) for one configuration."""
+    outputs = [extract(html, BASE_URL, backend=backend, main_content=main_content) for html in pages]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for html in pages:
+            extract(html, BASE_URL, backend=backend, main_content=main_content)
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeats / elapsed, outputs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=20, help="Passes over the fixture pages")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat each page body this many times")
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures, args.scale)
+    if not pages:
+        print(f"No .html files in {args.fixtures}")
+        return 1
+
+    baseline_rate, _ = run(pages, "bs4", False, args.repeats)
+    references = {
+        main_content: [extract(html, BASE_URL, backend="bs4", main_content=main_content) for html in pages]
+        for main_content in (False, True)
+    }
+
+    size = sum(len(html) for html in pages) / len(pages) / 1024
+    print("=" * 92)
+    print(f"HTML extraction benchmark ({len(pages)} pages, {size:.1f} KB average, {args.repeats} passes)")
+    print("=" * 92)
+    print(f"{'backend':<12} {'main':<6} {'pages/s':>9} {'speedup':>8} {'same text':>10} {'similarity':>11} {'same links':>11}")
+    for backend in args.backends:
+        for main_content in (False, True):
+            label = f"{backend:<12} {'yes' if main_content else 'no':<6}"
+            try:
+                rate, outputs = run(pages, backend, main_content, args.repeats)
+            except HTMLExtractionError as e:
+                print(f"{label} unavailable ({e})")
+                break
+            reference = references[main_content]
+            same_text = sum(text == ref_text for (text, _), (ref_text, _) in zip(outputs, reference))
+            same_links = sum(links == ref_links for (_, links), (_, ref_links) in zip(outputs, reference))
+            similarity = sum(
+                difflib.SequenceMatcher(None, text, ref_text, autojunk=False).ratio()
+                for (text, _), (ref_text, _) in zip(outputs, reference)
+            ) / len(pages)
+            print(f"{label} {rate:>9.1f} {rate / baseline_rate:>7.2f}x {same_text:>5}/{len(pages):<4} "
+                  f"{similarity:>11.3f} {same_links:>6}/{len(pages):<4}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark: flan-t5 inference backends on CPU.
+
+Each backend (torch fp32, torch dynamic int8, ONNX Runtime) runs in its own
+subprocess so resident memory is measured in isolation. For the fixed prompt
+set in bench_utils the script reports load time, generated tokens/sec,
+p50/p95 latency, RSS after loading and after generation, and how often each
+backend's answer agrees with fp32 (exact match and mean similarity).
+
+Usage:
+    python bench_llm_backends.py
+    python bench_llm_backends.py --backends torch int8 --repeats 3
+"""
+
+import argparse
+import difflib
+import json
+import subprocess
+import sys
+import time
+
+from bench_utils import SAMPLE_PROMPTS, format_mb, rss_bytes, summarize
+
+def run_worker(backend, repeats):
+    """Benchmark one backend in this process and print a JSON result line."""
+    from llm import generate_answer, get_llm
+
+    start = time.perf_counter()
+    tokenizer, _ = get_llm(backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_bytes()
+
+    # One untimed generation so lazy initialization is not measured
+    generate_answer(SAMPLE_PROMPTS[0], backend)
+
+    latencies, tokens, answers = [], 0, []
+    for repeat in range(repeats):
+        for prompt in SAMPLE_PROMPTS:
+            start = time.perf_counter()
+            answer = generate_answer(prompt, backend)
+            latencies.append(time.perf_counter() - start)
+            tokens += len(tokenizer(answer)["input_ids"])
+            if repeat == 0:
+                answers.append(answer)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "tokens_per_second": tokens / sum(latencies),
+        "latency": summarize(latencies),
+        "rss_loaded": rss_loaded,
+        "rss_after": rss_bytes(),
+        "answers": answers,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--repeats", type=int, default=2, help="Passes over the prompt set")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.repeats)
+        return 0
+
+    backends = list(args.backends)
+    # fp32 answers are the reference for the agreement check
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    results = {}
+    for backend in backends:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--repeats", str(args.repeats)],
+            capture_output=True,
+            text=True
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+        if completed.returncode != 0 or not lines:
+            error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+            print(f"{backend}: failed ({error})")
+            continue
+        results[backend] = json.loads(lines[-1])
+
+    reference = results.get("torch", {}).get("answers")
+
+    print("=" * 100)
+    print(f"LLM backend benchmark ({len(SAMPLE_PROMPTS)} prompts x {args.repeats})")
+    print("=" * 100)
+    print(f"{'backend':<8} {'load s':>7} {'tok/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'RSS loaded':>11} {'RSS after':>11} {'exact':>6} {'similar':>8}")
+    for backend, result in results.items():
+        exact, similar = "-", "-"
+        if reference:
+            pairs = list(zip(reference, result["answers"]))
+            exact = f"{sum(a == b for a, b in pairs) / len(pairs):.0%}"
+            ratios = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in pairs]
+            similar = f"{sum(ratios) / len(ratios):.2f}"
+        print(f"{backend:<8} {result['load_seconds']:>7.1f} {result['tokens_per_second']:>7.1f} "
+              f"{result['latency']['p50_ms']:>8.0f} {result['latency']['p95_ms']:>8.0f} "
+              f"{format_mb(result['rss_loaded']):>11} {format_mb(result['rss_after']):>11} {exact:>6} {similar:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Benchmark: end-to-end RAG pipeline stages over offline fixture pages.
+
+The saved pages in fixtures/html are served from a local HTTP server, each
+copied many times with a page number so every copy has distinct text. For
+small, medium and large corpora the script times every stage separately:
+
+    fetch          HTTP GET of one page (scraper session)
+    parse          html_extraction.extract on one page
+    page           get_website_text on one page (fetch + parse + checks)
+    chunk          chunking one page's text
+    embed          encoding one batch of chunks
+    build          create_vector_store over the whole corpus
+    query_encode   encoding one question
+    search         index.search for one question (k=3)
+    generate       generate_answer for one packed prompt
+
+and writes count/mean/p50/p95/max per stage to JSON. With --compare, each
+stage's p50 and p95 are checked against a baseline JSON written earlier and
+any stage slower than the threshold is flagged; the exit code is 1 if any
+regression is found, so the check can gate a change.
+
+Usage:
+    python bench_pipeline.py --output baseline.json
+    python bench_pipeline.py --output after.json --compare baseline.json
+    python bench_pipeline.py --sizes small --no-generate --repeats 1
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from bench_utils import QUESTIONS, summarize
+from chunking import iter_chunks
+from context_packing import pack_context
+from embeddings import (
+    CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, EMBED_BATCH_SIZE, count_tokens,
+    create_vector_store, get_embedding_model
+)
+from html_extraction import extract
+from scraper import _fetch, create_session, get_website_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+CORPUS_SIZES = {"small": 5, "medium": 50, "large": 250}
+STAGES = ("fetch", "parse", "page", "chunk", "embed", "build", "query_encode", "search", "generate")
+# Stages faster than this (ms) are too noisy to flag as regressions
+NOISE_FLOOR_MS = 0.5
+
+def load_fixture_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def make_site(fixtures, n_pages):
+    """Map /page/N.html to fixture copies that differ by a numbered paragraph."""
+    site = {}
+    for n in range(n_pages):
+        html = fixtures[n % len(fixtures)]
+        note = f"<p>Archive copy {n} of this page, kept for reference number {n * 7919}.</p>"
+        html = html.replace("<body>", "<body>" + note, 1) if "<body>" in html else note + html
+        site[f"/page/{n}.html"] = html.encode("utf-8")
+    return site
+
+class FixtureServer:
+    """Serve an in-memory site over HTTP on localhost from a background thread."""
+
+    def __init__(self):
+        self.pages = {}
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def timed(samples, stage, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    samples[stage].append(time.perf_counter() - start)
+    return result
+
+def run_corpus(server, fixtures, n_pages, repeats, generate):
+    """Time every stage for one corpus size; returns (samples per stage, chunk count)."""
+    server.pages.clear()
+    server.pages.update(make_site(fixtures, n_pages))
+    urls = [server.url(path) for path in server.pages]
+    session = create_session()
+    samples = {stage: [] for stage in STAGES}
+    model = get_embedding_model()
+
+    for _ in range(repeats):
+        texts = []
+        for url in urls:
+            html = timed(samples, "fetch", _fetch, url, session).text
+            timed(samples, "parse", extract, html, url)
+            texts.append(timed(samples, "page", get_website_text, url, session))
+
+        chunks = []
+        for text in texts:
+            start = time.perf_counter()
+            # The same short-chunk filter as create_vector_store
+            chunks.extend(
+                chunk.text for chunk in iter_chunks(text, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, count_tokens)
+                if len(chunk.text) > 100
+            )
+            samples["chunk"].append(time.perf_counter() - start)
+        for i in range(0, len(chunks), EMBED_BATCH_SIZE):
+            timed(samples, "embed", model.encode, chunks[i:i + EMBED_BATCH_SIZE])
+
+        index, store_chunks, _ = timed(samples, "build", create_vector_store, texts)
+
+        for question in QUESTIONS:
+            embedding = np.asarray(timed(samples, "query_encode", model.encode, [question]), dtype=np.float32)
+            _, ids = timed(samples, "search", index.search, embedding, 3)
+            if generate:
+                from llm import generate_answer
+                packed = pack_context([store_chunks[i] for i in ids[0] if i >= 0], question)
+                timed(samples, "generate", generate_answer, packed.prompt)
+
+    session.close()
+    return samples, len(store_chunks)
+
+def compare(results, baseline, threshold):
+    """Return (corpus, stage, metric, baseline ms, current ms) for every regression."""
+    regressions = []
+    for corpus, current in results["corpora"].items():
+        previous = baseline.get("corpora", {}).get(corpus)
+        if previous is None:
+            continue
+        for stage, summary in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if not before or not before["count"] or not summary["count"]:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if before[metric] < NOISE_FLOOR_MS and summary[metric] < NOISE_FLOOR_MS:
+                    continue
+                if summary[metric] > before[metric] * (1 + threshold):
+                    regressions.append((corpus, stage, metric, before[metric], summary[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=list(CORPUS_SIZES), choices=list(CORPUS_SIZES))
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over each corpus")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--no-generate", action="store_true", help="Skip the LLM stage")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before flagging (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    fixtures = load_fixture_pages(args.fixtures)
+    if not fixtures:
+        print(f"No .html files in {args.fixtures}")
+        return 1
+
+    # Load the models before timing anything
+    get_embedding_model()
+    if not args.no_generate:
+        from llm import generate_answer
+        generate_answer("Warm up.")
+
+    results = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeats": args.repeats,
+        "corpora": {},
+    }
+    server = FixtureServer()
+    try:
+        for size in args.sizes:
+            samples, n_chunks = run_corpus(server, fixtures, CORPUS_SIZES[size], args.repeats, not args.no_generate)
+            results["corpora"][size] = {
+                "pages": CORPUS_SIZES[size],
+                "chunks": n_chunks,
+                "stages": {stage: summarize(seconds) for stage, seconds in samples.items()},
+            }
+    finally:
+        server.close()
+
+    print("=" * 84)
+    print(f"RAG pipeline benchmark ({args.repeats} passes per corpus, {os.cpu_count()} CPUs)")
+    print("=" * 84)
+    print(f"{'corpus':<8} {'stage':<14} {'count':>7} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for size, corpus in results["corpora"].items():
+        label = f"{size} ({corpus['pages']} pages, {corpus['chunks']} chunks)"
+        print(label)
+        for stage, summary in corpus["stages"].items():
+            if summary["count"]:
+                print(f"{'':<8} {stage:<14} {summary['count']:>7} {summary['mean_ms']:>10.2f} "
+                      f"{summary['p50_ms']:>10.2f} {summary['p95_ms']:>10.2f} {summary['max_ms']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%}):")
+        for corpus, stage, metric, before, after in regressions:
+            print(f"  REGRESSION {corpus:<8} {stage:<14} {metric:<7} {before:>10.2f} -> {after:>10.2f} ms "
+                  f"({after / before - 1:+.0%})")
+        if regressions:
+            return 1
+        print("  No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
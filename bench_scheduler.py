@@ -0,0 +1,98 @@
+"""
+Benchmark: concurrent askers with and without the generation scheduler.
+
+N threads stand in for N Streamlit sessions, each asking the bench_utils
+prompts in turn. "direct" runs one generate call per question, all sessions
+contending for the model; "batched" routes every question through a
+GenerationScheduler. The script reports throughput, p50/p95 latency and the
+mean batch size. --simulate replaces flan-t5 with a sleep that costs a fixed
+amount per call plus a small amount per prompt, to exercise the scheduler
+without loading a model.
+
+Usage:
+    python bench_scheduler.py --askers 8
+    python bench_scheduler.py --askers 16 --max-wait-ms 10 --simulate
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from bench_utils import SAMPLE_PROMPTS, summarize
+from generation_scheduler import GenerationScheduler
+
+def simulated_generate(prompts, call_seconds=0.2, per_prompt_seconds=0.02):
+    time.sleep(call_seconds + per_prompt_seconds * len(prompts))
+    return [prompt[-20:] for prompt in prompts]
+
+def run_askers(ask, askers, questions_per_asker):
+    """Run askers on threads; return (wall seconds, per-question latencies)."""
+    latencies = []
+    latencies_lock = threading.Lock()
+    barrier = threading.Barrier(askers)
+
+    def session(offset):
+        barrier.wait()
+        for i in range(questions_per_asker):
+            prompt = SAMPLE_PROMPTS[(offset + i) % len(SAMPLE_PROMPTS)]
+            start = time.perf_counter()
+            ask(prompt)
+            with latencies_lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(offset,)) for offset in range(askers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--askers", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--questions", type=int, default=4, help="Questions per session")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--simulate", action="store_true", help="Use a simulated model instead of flan-t5")
+    args = parser.parse_args()
+
+    if args.simulate:
+        generate_batch = simulated_generate
+        model_lock = threading.Lock()
+
+        def ask_direct(prompt):
+            # A single simulated model runs one call at a time, like one CPU-bound model
+            with model_lock:
+                return generate_batch([prompt])[0]
+    else:
+        from llm import generate_answers, warm_up
+        warm_up(background=False)
+        generate_batch = generate_answers
+
+        def ask_direct(prompt):
+            return generate_answers([prompt])[0]
+
+    scheduler = GenerationScheduler(generate_batch, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    modes = [
+        ("direct", ask_direct),
+        ("batched", scheduler.generate),
+    ]
+
+    print("=" * 72)
+    print(f"Scheduler benchmark ({args.askers} askers x {args.questions} questions, "
+          f"batch <= {args.max_batch_size}, wait <= {args.max_wait_ms:g} ms)")
+    print("=" * 72)
+    print(f"{'mode':<8} {'q/s':>8} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} {'batch':>7}")
+    for name, ask in modes:
+        wall, latencies = run_askers(ask, args.askers, args.questions)
+        stats = summarize(latencies)
+        batch = f"{scheduler.mean_batch_size:.1f}" if name == "batched" else "1.0"
+        print(f"{name:<8} {len(latencies) / wall:>8.2f} {stats['p50_ms']:>10.0f} "
+              f"{stats['p95_ms']:>10.0f} {stats['max_ms']:>10.0f} {batch:>7}")
+    scheduler.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""
+Startup timing report: import vs. weight load vs. first inference.
+
+Run in a fresh interpreter to see what a new Streamlit worker pays before the
+first answer. Module imports are timed here; model phases are recorded by the
+lazy loaders in embeddings.py and llm.py during a foreground warm-up.
+
+Usage:
+    python bench_startup.py
+"""
+
+import sys
+import time
+
+def main():
+    start = time.perf_counter()
+    import embeddings  # noqa: F401
+    import llm
+    import startup_timing
+    import_seconds = time.perf_counter() - start
+
+    print("=" * 45)
+    print("Startup timing")
+    print("=" * 45)
+    print(f"{'app modules.import (no models)':<36} {import_seconds:>8.2f}")
+
+    llm.warm_up(background=False)
+    print(startup_timing.report())
+    print(f"{'total':<36} {time.perf_counter() - start:>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Benchmark: time-to-first-token of streamed answers versus total generation latency.
+
+For each prompt in bench_utils.SAMPLE_PROMPTS the script measures
+generate_answer_stream (time to the first non-empty piece and to the last one)
+and the blocking generate_answer, after a warm-up so model loading is excluded.
+
+Usage:
+    python bench_streaming.py
+    python bench_streaming.py --repeats 3
+"""
+
+import argparse
+import sys
+import time
+
+from bench_utils import SAMPLE_PROMPTS, summarize
+from llm import generate_answer, generate_answer_stream, warm_up
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=1, help="Passes over the prompt set")
+    args = parser.parse_args()
+
+    warm_up(background=False)
+
+    ttft, stream_total, blocking_total = [], [], []
+    for _ in range(args.repeats):
+        for prompt in SAMPLE_PROMPTS:
+            start = time.perf_counter()
+            first = None
+            for _piece in generate_answer_stream(prompt):
+                if first is None:
+                    first = time.perf_counter() - start
+            stream_total.append(time.perf_counter() - start)
+            ttft.append(first if first is not None else stream_total[-1])
+
+            start = time.perf_counter()
+            generate_answer(prompt)
+            blocking_total.append(time.perf_counter() - start)
+
+    print("=" * 64)
+    print(f"Streaming benchmark ({len(ttft)} generations)")
+    print("=" * 64)
+    print(f"{'measure':<28} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10}")
+    for name, samples in [
+        ("stream time-to-first-token", ttft),
+        ("stream total", stream_total),
+        ("blocking total", blocking_total),
+    ]:
+        stats = summarize(samples)
+        print(f"{name:<28} {stats['p50_ms']:>10.0f} {stats['p95_ms']:>10.0f} {stats['mean_ms']:>10.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Shared helpers for the bench_*.py scripts: latency summaries, memory readings
+and a fixed prompt set in the shape app.py sends to the LLM.
+"""
+
+import numpy as np
+
+from context_packing import PROMPT_TEMPLATE
+from metrics import rss_bytes
+
+CONTEXT = (
+    "The RAG Website Chatbot scrapes a website, splits the text into chunks and embeds them "
+    "with all-MiniLM-L6-v2. The embeddings are stored in a FAISS index. When a user asks a "
+    "question, the three most similar chunks are retrieved and passed to google/flan-t5-base, "
+    "which writes an answer grounded in that context. Answers include the retrieved sources. "
+    "The application is built with Streamlit and runs fully locally without external APIs."
+)
+
+QUESTIONS = [
+    "What does the chatbot do?",
+    "Which embedding model is used?",
+    "Where are the embeddings stored?",
+    "How many chunks are retrieved for each question?",
+    "Which language model writes the answers?",
+    "Does the application need an external API?",
+    "What framework is the user interface built with?",
+    "What is shown next to each answer?",
+]
+
+SAMPLE_PROMPTS = [PROMPT_TEMPLATE.format(context=CONTEXT, question=question) for question in QUESTIONS]
+
+def summarize(seconds):
+    """
+    Summarize latency samples.
+
+    Args:
+        seconds: Iterable of durations in seconds
+
+    Returns:
+        dict: count, mean, p50, p95 and max, in milliseconds
+    """
+    samples = np.asarray(list(seconds), dtype=np.float64) * 1000
+    if samples.size == 0:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": int(samples.size),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "max_ms": float(samples.max()),
+    }
+
+def format_mb(n_bytes):
+    return f"{n_bytes / (1024 * 1024):.1f} MB"
@@ -0,0 +1,168 @@
+import logging
+import math
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MAX_TOKENS = 128
+DEFAULT_OVERLAP_TOKENS = 24
+
+# Sentence ends (terminal punctuation plus closing quotes/brackets) or paragraph breaks
+BOUNDARY_PATTERN = re.compile(r"[.!?]+[\"')\]]*\s+|\n\s*\n")
+WORD_PATTERN = re.compile(r"\S+")
+
+# Sentences are tokenized in batches to amortize per-call tokenizer overhead
+COUNT_BATCH_SIZE = 256
+
+class ChunkerError(Exception):
+    """Raised when chunking parameters are invalid."""
+    pass
+
+@dataclass
+class Chunk:
+    """A chunk of text with its character span in the source and its token count."""
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+def tokenizer_token_counter(tokenizer):
+    """
+    Build a batch token counter from a Hugging Face tokenizer.
+
+    Args:
+        tokenizer: A (preferably fast) tokenizer
+
+    Returns:
+        callable: Maps a list of strings to a list of token counts, excluding special tokens
+    """
+    def count(texts):
+        encoded = tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+    return count
+
+def estimate_token_counter(texts):
+    """Approximate WordPiece token counts from word counts, for use without a tokenizer."""
+    return [math.ceil(len(text.split()) * 1.3) for text in texts]
+
+_default_counter = None
+_default_counter_lock = threading.Lock()
+
+def default_token_counter():
+    """
+    Return a token counter for the all-MiniLM-L6-v2 tokenizer, loading it on first use.
+
+    Falls back to estimate_token_counter if transformers is not installed.
+    """
+    global _default_counter
+    with _default_counter_lock:
+        if _default_counter is None:
+            try:
+                from transformers import AutoTokenizer
+                _default_counter = tokenizer_token_counter(AutoTokenizer.from_pretrained(TOKENIZER_NAME))
+            except ImportError:
+                logger.warning("transformers is not installed; estimating token counts from word counts")
+                _default_counter = estimate_token_counter
+    return _default_counter
+
+def sentence_spans(text):
+    """Yield (start, end) spans of sentences and paragraphs, excluding surrounding whitespace."""
+    position = len(text) - len(text.lstrip())
+    for match in BOUNDARY_PATTERN.finditer(text, position):
+        end = match.end()
+        # Keep the punctuation, drop the trailing whitespace
+        stripped_end = end - (len(match.group()) - len(match.group().rstrip()))
+        if stripped_end > position:
+            yield position, stripped_end
+        position = end
+    tail_end = len(text.rstrip())
+    if position < tail_end:
+        yield position, tail_end
+
+def _split_oversized(text, start, end, tokens, max_tokens, count_tokens):
+    """Split a sentence longer than max_tokens at word boundaries into pieces that fit."""
+    words = [(m.start(), m.end()) for m in WORD_PATTERN.finditer(text, start, end)]
+    parts = max(2, math.ceil(tokens / max_tokens))
+    per_part = max(1, math.ceil(len(words) / parts))
+
+    pieces = [words[i:i + per_part] for i in range(0, len(words), per_part)]
+    spans = [(piece[0][0], piece[-1][1]) for piece in pieces]
+    counts = count_tokens([text[s:e] for s, e in spans])
+
+    for (s, e), count in zip(spans, counts):
+        if count > max_tokens and e - s < end - start and len(WORD_PATTERN.findall(text, s, e)) > 1:
+            yield from _split_oversized(text, s, e, count, max_tokens, count_tokens)
+        else:
+            # A single word longer than the limit is emitted as is
+            yield s, e, count
+
+def _segments(text, max_tokens, count_tokens):
+    """Yield (start, end, tokens) for each sentence, counting tokens in batches."""
+    spans = sentence_spans(text)
+    while True:
+        batch = []
+        for span in spans:
+            batch.append(span)
+            if len(batch) == COUNT_BATCH_SIZE:
+                break
+        if not batch:
+            return
+        counts = count_tokens([text[s:e] for s, e in batch])
+        for (start, end), tokens in zip(batch, counts):
+            if tokens > max_tokens:
+                yield from _split_oversized(text, start, end, tokens, max_tokens, count_tokens)
+            else:
+                yield start, end, tokens
+
+def iter_chunks(text, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS, token_counter=None):
+    """
+    Lazily split text into sentence-aligned chunks bounded by a token budget.
+
+    The text is scanned once: sentences are packed greedily into a window until
+    the next one would exceed ``max_tokens``, the window is emitted, and its
+    trailing sentences (up to ``overlap_tokens``) start the next chunk. Token
+    counts add up across whitespace-separated sentences for WordPiece, so every
+    sentence is tokenized exactly once. Sentences longer than the budget are
+    split at word boundaries.
+
+    Args:
+        text: The text to split
+        max_tokens: Maximum tokenizer tokens per chunk
+        overlap_tokens: Maximum tokens shared between consecutive chunks
+        token_counter: Callable mapping a list of strings to token counts;
+            defaults to the all-MiniLM-L6-v2 tokenizer
+
+    Yields:
+        Chunk: Chunks in order, with character offsets into ``text``
+
+    Raises:
+        ChunkerError: If the size parameters are invalid
+    """
+    if max_tokens <= 0:
+        raise ChunkerError("max_tokens must be positive")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ChunkerError("overlap_tokens must be between 0 and max_tokens - 1")
+
+    count_tokens = token_counter or default_token_counter()
+    window = deque()
+    window_tokens = 0
+
+    for segment in _segments(text, max_tokens, count_tokens):
+        tokens = segment[2]
+        if window and window_tokens + tokens > max_tokens:
+            yield Chunk(text[window[0][0]:window[-1][1]], window[0][0], window[-1][1], window_tokens)
+
+            # Keep the tail for overlap, always dropping at least one sentence
+            window_tokens -= window.popleft()[2]
+            while window and (window_tokens > overlap_tokens or window_tokens + tokens > max_tokens):
+                window_tokens -= window.popleft()[2]
+
+        window.append(segment)
+        window_tokens += tokens
+
+    if window:
+        yield Chunk(text[window[0][0]:window[-1][1]], window[0][0], window[-1][1], window_tokens)
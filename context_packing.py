@@ -0,0 +1,129 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List
+
+from chunking import sentence_spans, tokenizer_token_counter, estimate_token_counter
+from llm import LLM_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+# flan-t5 was trained on 512-token inputs; longer prompts are truncated
+MAX_INPUT_TOKENS = 512
+
+PROMPT_TEMPLATE = """Answer the question using only the information in the context. If the context doesn't contain enough information to answer the question, say "I don't have enough information to answer this question based on the website content."
+
+Context:
+{context}
+
+Question:
+{question}
+
+Answer:"""
+
+@dataclass
+class PackedContext:
+    """A prompt whose context fits the model's input budget."""
+    prompt: str
+    context: str
+    tokens: int
+    source_ids: List[int] = field(default_factory=list)
+    duplicate_sentences: int = 0
+    dropped_sentences: int = 0
+
+_prompt_counter = None
+_prompt_counter_lock = threading.Lock()
+
+def prompt_token_counter():
+    """
+    Return a token counter for the flan-t5 tokenizer, loading it on first use.
+
+    Only the tokenizer is loaded, not the model. Falls back to
+    chunking.estimate_token_counter if transformers is not installed.
+    """
+    global _prompt_counter
+    with _prompt_counter_lock:
+        if _prompt_counter is None:
+            try:
+                from transformers import AutoTokenizer
+                _prompt_counter = tokenizer_token_counter(AutoTokenizer.from_pretrained(LLM_MODEL_NAME))
+            except ImportError:
+                logger.warning("transformers is not installed; estimating prompt token counts from word counts")
+                _prompt_counter = estimate_token_counter
+    return _prompt_counter
+
+def _sentence_key(sentence):
+    return " ".join(sentence.lower().split())
+
+def pack_context(chunks, question, source_ids=None, max_tokens=MAX_INPUT_TOKENS, token_counter=None):
+    """
+    Build the generation prompt from retrieved chunks within a token budget.
+
+    Chunks are split into sentences and sentences already seen (chunk overlap,
+    repeated boilerplate) are dropped. The remaining sentences are added in
+    relevance order while they fit into the tokens left after the instructions
+    and the question, so the question is never truncated. The final prompt is
+    counted once more and trimmed if tokenization across sentence joins made it
+    longer than the sum of its parts.
+
+    Args:
+        chunks: Retrieved chunk texts, most relevant first
+        question: The user's question
+        source_ids: Chunk ids parallel to ``chunks`` (defaults to positions)
+        max_tokens: Model input limit, including the end-of-sequence token
+        token_counter: Callable mapping a list of strings to token counts
+            (defaults to the flan-t5 tokenizer)
+
+    Returns:
+        PackedContext: The prompt, its token count and the ids of chunks it uses
+    """
+    count_tokens = token_counter or prompt_token_counter()
+    if source_ids is None:
+        source_ids = list(range(len(chunks)))
+    # One token is reserved for the end-of-sequence token the tokenizer appends
+    budget = max_tokens - 1
+
+    sentences, seen, duplicates = [], set(), 0
+    for source_id, chunk in zip(source_ids, chunks):
+        for start, end in sentence_spans(chunk):
+            sentence = chunk[start:end]
+            key = _sentence_key(sentence)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            sentences.append((source_id, sentence))
+
+    available = budget - count_tokens([PROMPT_TEMPLATE.format(context="", question=question)])[0]
+    counts = count_tokens([sentence for _, sentence in sentences]) if sentences else []
+
+    selected, used = [], 0
+    for (source_id, sentence), tokens in zip(sentences, counts):
+        # One token of slack per join; a sentence that does not fit may
+        # leave room for a shorter, less relevant one
+        if used + tokens + 1 > available:
+            continue
+        selected.append((source_id, sentence))
+        used += tokens + 1
+
+    while True:
+        context = " ".join(sentence for _, sentence in selected)
+        prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+        tokens = count_tokens([prompt])[0] + 1
+        if tokens <= max_tokens or not selected:
+            break
+        selected.pop()
+
+    packed_ids = []
+    for source_id, _ in selected:
+        if source_id not in packed_ids:
+            packed_ids.append(source_id)
+
+    return PackedContext(
+        prompt=prompt,
+        context=context,
+        tokens=tokens,
+        source_ids=packed_ids,
+        duplicate_sentences=duplicates,
+        dropped_sentences=len(sentences) - len(selected)
+    )
@@ -0,0 +1,239 @@
+import hashlib
+import heapq
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Threads searching shards in parallel, shared by all corpora
+SEARCH_WORKERS = int(os.environ.get("RAG_SEARCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_search_pool = None
+_search_pool_lock = threading.Lock()
+
+class CorpusError(Exception):
+    """Raised when a corpus operation refers to sites it does not hold."""
+    pass
+
+@dataclass
+class SearchHit:
+    """A chunk found by ShardedCorpus.search."""
+    site: str
+    chunk_id: int
+    distance: float
+    store_key: str
+
+    @property
+    def source(self):
+        """
+        Hashable reference to the chunk, resolved by ShardedCorpus.chunk.
+
+        It names the store rather than the site label, since labels belong to
+        one session while cached sources are shared by every session that
+        loads the same store.
+        """
+        return (self.store_key, self.chunk_id)
+
+def get_search_pool():
+    """Return the thread pool shared by all corpora, creating it on first use."""
+    global _search_pool
+    if _search_pool is None:
+        with _search_pool_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="shard-search")
+    return _search_pool
+
+def _search_shard(site, store, queries, k):
+    distances, ids = store.index.search(queries, k)
+    # Approximate indexes may return fewer than k hits, padded with -1
+    return [
+        SearchHit(site, int(i), float(d), store.key)
+        for d, i in zip(distances[0], ids[0]) if i >= 0
+    ]
+
+class ShardedCorpus:
+    """
+    Several sites' vector stores searched as one corpus.
+
+    Each site is a shard: a store_registry.StoreHandle (or anything with
+    ``key``, ``index``, ``chunks`` and ``model``) added and removed on its own,
+    so adding a site never re-embeds the others. search() queries the shards in
+    parallel on a shared thread pool (FAISS releases the GIL while searching)
+    and merges their top-k by distance; all shards must use the same embedding
+    model, so their L2 distances are comparable.
+    """
+
+    def __init__(self):
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, site, store):
+        """
+        Add a site's store, replacing the site's previous store if any.
+
+        Args:
+            site: Site label, e.g. its URL
+            store: The site's store
+
+        Returns:
+            The replaced store, or None; the caller releases it
+        """
+        with self._lock:
+            previous = self._shards.pop(site, None)
+            self._shards[site] = store
+        return previous
+
+    def remove(self, site):
+        """
+        Remove a site.
+
+        Args:
+            site: Site label
+
+        Returns:
+            The removed store, or None if the site was not in the corpus; the caller releases it
+        """
+        with self._lock:
+            return self._shards.pop(site, None)
+
+    def _select(self, sites):
+        with self._lock:
+            if sites is None:
+                return list(self._shards.items())
+            missing = [site for site in sites if site not in self._shards]
+            if missing:
+                raise CorpusError(f"Sites not in the corpus: {', '.join(missing)}")
+            return [(site, self._shards[site]) for site in sites]
+
+    @property
+    def sites(self):
+        """Site labels, in the order they were added."""
+        with self._lock:
+            return list(self._shards)
+
+    def store(self, site):
+        """Return a site's store, or None."""
+        with self._lock:
+            return self._shards.get(site)
+
+    @property
+    def model(self):
+        """The embedding model shared by the shards, or None if the corpus is empty."""
+        with self._lock:
+            for store in self._shards.values():
+                return store.model
+        return None
+
+    def key(self, sites=None):
+        """
+        Return a key for the content searched with a site filter, e.g. for answer caching.
+
+        A single site's key is its store's key, so it matches the store's own
+        cache entries; several sites get a digest of their store keys.
+
+        Args:
+            sites: Site labels to search, or None for all
+
+        Returns:
+            str: The key
+        """
+        keys = self.store_keys(sites)
+        if len(keys) == 1:
+            return keys[0]
+        return hashlib.sha256("\0".join(keys).encode("utf-8")).hexdigest()
+
+    def store_keys(self, sites=None):
+        """
+        Return the keys of the stores searched with a site filter.
+
+        Args:
+            sites: Site labels to search, or None for all
+
+        Returns:
+            list: Sorted store keys
+        """
+        return sorted(store.key for _, store in self._select(sites))
+
+    def chunk_count(self, sites=None):
+        """Total number of chunks in the selected sites."""
+        return sum(len(store.chunks) for _, store in self._select(sites))
+
+    def search(self, query_embedding, k=3, sites=None):
+        """
+        Find the k chunks nearest to a query across the selected sites.
+
+        Args:
+            query_embedding: Query embedding, shape (dimension,) or (1, dimension)
+            k: Number of chunks to return
+            sites: Site labels to search, or None for all
+
+        Returns:
+            list: Up to k SearchHit, nearest first
+
+        Raises:
+            CorpusError: If a requested site is not in the corpus
+        """
+        shards = self._select(sites)
+        queries = np.ascontiguousarray(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))
+        if len(shards) == 1:
+            site, store = shards[0]
+            return _search_shard(site, store, queries, k)[:k]
+
+        pool = get_search_pool()
+        futures = [pool.submit(_search_shard, site, store, queries, k) for site, store in shards]
+        hits = [hit for future in futures for hit in future.result()]
+        return heapq.nsmallest(k, hits, key=lambda hit: hit.distance)
+
+    def _shard_for(self, source):
+        store_key, _ = source
+        with self._lock:
+            for site, store in self._shards.items():
+                if store.key == store_key:
+                    return site, store
+        raise CorpusError(f"Store not in the corpus: {store_key}")
+
+    def chunk(self, source):
+        """
+        Return the text of a chunk.
+
+        Args:
+            source: SearchHit.source, a (store key, chunk id) pair
+
+        Returns:
+            str: The chunk text
+
+        Raises:
+            CorpusError: If no site in the corpus holds the store any more
+        """
+        _, store = self._shard_for(source)
+        return store.chunks[source[1]]
+
+    def source_site(self, source):
+        """
+        Return the label this corpus gives the site holding a chunk.
+
+        Args:
+            source: SearchHit.source, a (store key, chunk id) pair
+
+        Returns:
+            str: Site label
+
+        Raises:
+            CorpusError: If no site in the corpus holds the store any more
+        """
+        site, _ = self._shard_for(source)
+        return site
+
+    def __len__(self):
+        with self._lock:
+            return len(self._shards)
+
+    def __contains__(self, site):
+        with self._lock:
+            return site in self._shards
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+CACHE_ROOT = os.environ.get("RAG_CACHE_DIR", ".rag_cache")
+DEFAULT_EMBEDDING_CACHE_DIR = os.path.join(CACHE_ROOT, "embeddings")
+
+# Size of a model's cache files above which it is compacted, in MB
+DEFAULT_MAX_BYTES = int(os.environ.get("RAG_EMBEDDING_CACHE_MB", "512")) * 1024 * 1024
+# Share of max_bytes kept by a compaction, so the next one is many appends away
+COMPACT_FRACTION = 0.75
+
+KEY_BYTES = 16
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.bin"
+META_FILE = "meta.json"
+# Written once a compaction's new files are complete; its presence means "finish the swap"
+COMPACT_FILE = "compact.json"
+COMPACT_SUFFIX = ".compact"
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, chunk-text hash).
+
+    Each model gets its own directory with three append-only files: ``keys.bin``
+    holds 16-byte BLAKE2b digests of chunk texts, ``vectors.bin`` the matching
+    rows as a raw float16 (or float32) array, and ``meta.json`` the dtype and
+    dimension. Vectors are read through a memory map, so a large cache costs
+    little resident memory. All methods are thread-safe; a cache directory
+    must only be used by one process at a time.
+
+    With the default float16 storage, cached vectors are rounded to about three
+    significant digits, so a store built from cache hits differs slightly (and
+    may order near-ties differently) from a fresh float32 build. Use
+    ``dtype="float32"`` where builds must be bit-identical.
+
+    When the files grow past ``max_bytes`` the cache is compacted: the least
+    recently used rows are dropped and the rest rewritten. Rows not used since
+    the cache was opened count as older than any used row, and among them
+    earlier appends count as older.
+    """
+
+    def __init__(self, model_name, directory=DEFAULT_EMBEDDING_CACHE_DIR, dtype="float16", max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            model_name: Name of the embedding model the vectors come from
+            directory: Root directory of the cache
+            dtype: On-disk storage type, "float16" or "float32" (ignored if the cache exists)
+            max_bytes: Size of the keys and vectors files above which the cache is compacted
+        """
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.directory = os.path.join(directory, safe_name)
+        self.dtype = np.dtype(dtype)
+        self.dimension = None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._vectors = None
+        # Row -> tick of its last lookup hit or append, for compaction
+        self._last_used = {}
+        self._clock = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        self._finish_compaction()
+        meta_path = self._path(META_FILE)
+        if not os.path.isfile(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dtype = np.dtype(meta["dtype"])
+        self.dimension = meta["dimension"]
+
+        # Make sure both data files exist even if the first append never completed
+        for name in (KEYS_FILE, VECTORS_FILE):
+            open(self._path(name), "ab").close()
+
+        with open(self._path(KEYS_FILE), "rb") as f:
+            keys = f.read()
+        row_bytes = self.dimension * self.dtype.itemsize
+        # Vectors are appended before keys, so a torn write leaves extra vectors, never extra keys
+        count = min(len(keys) // KEY_BYTES, os.path.getsize(self._path(VECTORS_FILE)) // row_bytes)
+        # Drop any torn tail so later appends stay row-aligned
+        os.truncate(self._path(KEYS_FILE), count * KEY_BYTES)
+        os.truncate(self._path(VECTORS_FILE), count * row_bytes)
+        for row in range(count):
+            self._rows[keys[row * KEY_BYTES:(row + 1) * KEY_BYTES]] = row
+
+    def _finish_compaction(self):
+        """Complete a compaction interrupted after its files were written, or discard a partial one."""
+        committed = os.path.isfile(self._path(COMPACT_FILE))
+        for name in (VECTORS_FILE, KEYS_FILE):
+            partial = self._path(name + COMPACT_SUFFIX)
+            if not os.path.isfile(partial):
+                continue
+            if committed:
+                os.replace(partial, self._path(name))
+            else:
+                os.remove(partial)
+        if committed:
+            os.remove(self._path(COMPACT_FILE))
+
+    @property
+    def row_bytes(self):
+        """On-disk size of one cached embedding, key included."""
+        return KEY_BYTES + (self.dimension or 0) * self.dtype.itemsize
+
+    @property
+    def nbytes(self):
+        """Size of the keys and vectors files, in bytes."""
+        return len(self._rows) * self.row_bytes
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+    def _mapped_vectors(self):
+        """Return a memory map covering every committed row, remapping after appends."""
+        if self._vectors is None or len(self._vectors) < len(self._rows):
+            self._vectors = np.memmap(
+                self._path(VECTORS_FILE),
+                dtype=self.dtype,
+                mode="r",
+                shape=(len(self._rows), self.dimension)
+            )
+        return self._vectors
+
+    def lookup(self, texts):
+        """
+        Look up embeddings for many texts at once.
+
+        Args:
+            texts: List of chunk texts
+
+        Returns:
+            tuple: (vectors, found) - float32 array with cached rows filled in (zeros
+            elsewhere, or None if the cache is empty) and a boolean hit mask
+        """
+        digests = [self._digest(text) for text in texts]
+        with self._lock:
+            rows = [self._rows.get(digest, -1) for digest in digests]
+            found = np.array([row >= 0 for row in rows], dtype=bool)
+            hits = int(found.sum())
+            self.hits += hits
+            self.misses += len(texts) - hits
+
+            if self.dimension is None:
+                return None, found
+
+            vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+            if hits:
+                self._clock += 1
+                for row in rows:
+                    if row >= 0:
+                        self._last_used[row] = self._clock
+                stored = self._mapped_vectors()
+                positions = np.flatnonzero(found)
+                # Sorted row order keeps the gather sequential on disk
+                cached_rows = np.array([rows[i] for i in positions])
+                order = np.argsort(cached_rows)
+                vectors[positions[order]] = stored[cached_rows[order]]
+        return vectors, found
+
+    def add(self, texts, vectors):
+        """
+        Append embeddings for texts that are not cached yet.
+
+        Args:
+            texts: List of chunk texts
+            vectors: Array of shape (len(texts), dimension)
+        """
+        vectors = np.asarray(vectors)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = int(vectors.shape[1])
+                with open(self._path(META_FILE), "w", encoding="utf-8") as f:
+                    json.dump({"dtype": self.dtype.name, "dimension": self.dimension}, f)
+
+            new_keys = {}
+            new_rows = []
+            for text, vector in zip(texts, vectors):
+                digest = self._digest(text)
+                if digest in self._rows or digest in new_keys:
+                    continue
+                new_keys[digest] = len(new_rows)
+                new_rows.append(vector)
+            if not new_keys:
+                return
+
+            data = np.asarray(new_rows, dtype=self.dtype)
+            with open(self._path(VECTORS_FILE), "ab") as f:
+                f.write(data.tobytes())
+            with open(self._path(KEYS_FILE), "ab") as f:
+                f.write(b"".join(new_keys))
+
+            start = len(self._rows)
+            self._clock += 1
+            for digest, offset in new_keys.items():
+                self._rows[digest] = start + offset
+                self._last_used[start + offset] = self._clock
+
+            if self.nbytes > self.max_bytes:
+                self._compact(int(self.max_bytes * COMPACT_FRACTION))
+
+    def compact(self, max_bytes=None):
+        """
+        Drop least recently used rows until the files fit in ``max_bytes``.
+
+        Args:
+            max_bytes: Target size (defaults to the cache's max_bytes)
+
+        Returns:
+            int: Number of rows dropped
+        """
+        with self._lock:
+            return self._compact(self.max_bytes if max_bytes is None else max_bytes)
+
+    def _compact(self, max_bytes):
+        if self.dimension is None:
+            return 0
+        keep = max(0, min(len(self._rows), max_bytes // self.row_bytes))
+        dropped = len(self._rows) - keep
+        if not dropped:
+            return 0
+
+        # Most recently used first; unused rows by append order, newest first
+        rows = sorted(self._rows.items(), key=lambda item: (self._last_used.get(item[1], 0), item[1]), reverse=True)
+        # Rewritten in their old order, which keeps reads of one site's rows mostly sequential
+        kept = sorted(rows[:keep], key=lambda item: item[1])
+        old_rows = np.array([row for _, row in kept], dtype=np.int64)
+        stored = self._mapped_vectors()
+        with open(self._path(VECTORS_FILE + COMPACT_SUFFIX), "wb") as f:
+            # Copied in slices so a large cache is never read into memory at once
+            for start in range(0, len(old_rows), 4096):
+                f.write(np.ascontiguousarray(stored[old_rows[start:start + 4096]]).tobytes())
+        with open(self._path(KEYS_FILE + COMPACT_SUFFIX), "wb") as f:
+            f.write(b"".join(digest for digest, _ in kept))
+        with open(self._path(COMPACT_FILE), "w", encoding="utf-8") as f:
+            json.dump({"rows": keep}, f)
+
+        # Unmapped before the swap, which Windows refuses on a mapped file
+        del stored
+        self._vectors = None
+        self._finish_compaction()
+        self._rows = {digest: new_row for new_row, (digest, _) in enumerate(kept)}
+        self._last_used = {
+            new_row: self._last_used[old_row]
+            for new_row, (_, old_row) in enumerate(kept) if old_row in self._last_used
+        }
+        return dropped
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,192 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for embedding large corpora; 0 or 1 encodes in-process
+EMBED_WORKERS = int(os.environ.get("RAG_EMBED_WORKERS", "0"))
+DEFAULT_BATCH_SIZE = 64
+# Seconds between liveness checks while waiting for workers
+POLL_INTERVAL = 1.0
+
+class EmbeddingEngineError(Exception):
+    """Raised when the worker pool cannot start or a worker fails to encode a batch."""
+    pass
+
+def load_sentence_transformer(model_name):
+    """Load a sentence-transformers model on CPU (the default worker loader)."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+def _limit_threads(threads):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+def _worker(model_name, load_model, threads, tasks, results):
+    """Worker loop: load a model, then encode batches straight into the caller's shared memory."""
+    try:
+        _limit_threads(threads)
+        model = load_model(model_name)
+        results.put(("ready", None, model.get_sentence_embedding_dimension()))
+    except Exception as e:
+        results.put(("error", None, f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        call_id, shm_name, dimension, n_rows, positions, texts = task
+        try:
+            embeddings = np.asarray(model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                out = np.ndarray((n_rows, dimension), dtype=np.float32, buffer=shm.buf)
+                out[positions] = embeddings
+                # The view must be gone before the mapping is closed
+                del out
+            finally:
+                shm.close()
+            results.put(("done", call_id, len(texts)))
+        except Exception as e:
+            results.put(("error", call_id, f"{type(e).__name__}: {e}"))
+
+class EmbeddingEngine:
+    """
+    Pool of worker processes, each holding its own copy of the embedding model.
+
+    encode() sorts texts by length so every batch holds similarly sized texts
+    (little padding), hands the batches to idle workers and has each worker
+    write its embeddings directly into a shared-memory result array at the
+    texts' original positions, so no embedding arrays are pickled back.
+    Each worker gets an equal share of the CPU cores for torch.
+    """
+
+    def __init__(self, model_name, workers=None, batch_size=DEFAULT_BATCH_SIZE, load_model=load_sentence_transformer):
+        """
+        Args:
+            model_name: Model to load in every worker
+            workers: Number of worker processes (defaults to the CPU count)
+            batch_size: Texts per batch handed to a worker
+            load_model: Picklable callable(model_name) returning an object with
+                encode(texts, batch_size) and get_sentence_embedding_dimension()
+
+        Raises:
+            EmbeddingEngineError: If a worker fails to load the model
+        """
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.dimension = None
+
+        # spawn: forking a process that has already loaded torch is unsafe
+        context = multiprocessing.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._calls = itertools.count()
+        self._lock = threading.Lock()
+
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._processes = [
+            context.Process(
+                target=_worker,
+                args=(model_name, load_model, threads, self._tasks, self._results),
+                name=f"embedding-worker-{i}",
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        try:
+            for _ in range(self.workers):
+                kind, _, payload = self._next_result()
+                if kind == "error":
+                    raise EmbeddingEngineError(f"Embedding worker failed to start: {payload}")
+                self.dimension = payload
+        except Exception:
+            self.close()
+            raise
+
+    def _next_result(self):
+        while True:
+            try:
+                return self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self._processes):
+                    raise EmbeddingEngineError("An embedding worker exited unexpectedly")
+
+    def encode(self, texts):
+        """
+        Encode texts across the worker pool.
+
+        Args:
+            texts: List of texts
+
+        Returns:
+            np.ndarray: float32 embeddings of shape (len(texts), dimension), in input order
+
+        Raises:
+            EmbeddingEngineError: If a worker fails
+        """
+        n_texts = len(texts)
+        if n_texts == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        # Longest first, so the slowest batches start early and finish together
+        order = sorted(range(n_texts), key=lambda i: len(texts[i]), reverse=True)
+        batches = [order[i:i + self.batch_size] for i in range(0, n_texts, self.batch_size)]
+
+        with self._lock:
+            shm = shared_memory.SharedMemory(create=True, size=n_texts * self.dimension * 4)
+            try:
+                call_id = next(self._calls)
+                for positions in batches:
+                    self._tasks.put((call_id, shm.name, self.dimension, n_texts, positions, [texts[i] for i in positions]))
+
+                errors = []
+                remaining = len(batches)
+                while remaining:
+                    kind, result_call, payload = self._next_result()
+                    # Results of an earlier call that failed part-way are stale
+                    if result_call != call_id:
+                        continue
+                    remaining -= 1
+                    if kind == "error":
+                        errors.append(payload)
+                if errors:
+                    raise EmbeddingEngineError(f"Embedding worker failed: {errors[0]}")
+
+                result = np.ndarray((n_texts, self.dimension), dtype=np.float32, buffer=shm.buf)
+                embeddings = result.copy()
+                del result
+                return embeddings
+            finally:
+                shm.close()
+                shm.unlink()
+
+    def close(self):
+        """Stop the workers."""
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,7 +1,20 @@
-from sentence_transformers import SentenceTransformer
+import hashlib
+import logging
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import List
 import faiss
-from textwrap import wrap
 import numpy as np
+from ann_index import INDEX_RERANK, INDEX_STORAGE, SQ_TRAIN_SAMPLE, IndexBuilder, IndexSpec, ReservoirSample, create_index
+from chunking import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, iter_chunks, tokenizer_token_counter
+import metrics
+from startup_timing import timed
+from vector_store import (
+    DEFAULT_SITE_STORE_DIR, DEFAULT_STORE_DIR, MappedChunkTable, VectorStorePersistenceError, content_hash,
+    has_vector_store, load_vector_store, save_vector_store, store_path
+)
 
 class EmbeddingError(Exception):
     """Base exception for embedding-related errors."""
@@ -15,14 +28,180 @@ class VectorStoreError(EmbeddingError):
     """Raised when vector store creation fails."""
     pass
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+logger = logging.getLogger(__name__)
 
-def create_vector_store(text):
+MODEL_NAME = "all-MiniLM-L6-v2"
+CHUNK_TOKENS = DEFAULT_MAX_TOKENS
+CHUNK_OVERLAP_TOKENS = DEFAULT_OVERLAP_TOKENS
+EMBED_BATCH_SIZE = 64
+# Rough characters per chunk, used to size the index before chunking finishes
+CHARS_PER_CHUNK_ESTIMATE = 450
+# FAISS ids are signed 64-bit; chunk ids keep to the non-negative range
+CHUNK_ID_MASK = (1 << 63) - 1
+
+_model = None
+_count_tokens = None
+_model_lock = threading.Lock()
+
+def get_embedding_model():
+    """
+    Return the sentence embedding model, loading it on first use.
+
+    sentence-transformers (and with it torch) is imported here rather than at
+    module import, so importing this module is cheap. Loading is thread-safe:
+    concurrent callers wait for a single load.
+
+    Returns:
+        SentenceTransformer: The embedding model
+    """
+    global _model, _count_tokens
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with timed("embeddings.import"):
+                    from sentence_transformers import SentenceTransformer
+                with timed("embeddings.load"):
+                    model = SentenceTransformer(MODEL_NAME)
+                _count_tokens = tokenizer_token_counter(model.tokenizer)
+                _model = model
+    return _model
+
+def count_tokens(texts):
+    """Count all-MiniLM-L6-v2 tokens for a list of texts (excluding special tokens)."""
+    get_embedding_model()
+    return _count_tokens(texts)
+
+def __getattr__(name):
+    # Keep `embeddings.model` working for callers that predate lazy loading
+    if name == "model":
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _encode(texts, engine=None):
+    if engine is not None:
+        return engine.encode(texts)
+    return np.asarray(get_embedding_model().encode(texts), dtype=np.float32)
+
+def encode_chunks(chunks, embedding_cache=None, engine=None):
+    """
+    Encode chunks, reusing cached embeddings and encoding only the misses.
+
+    Args:
+        chunks: List of chunk texts
+        embedding_cache: Optional embedding_cache.EmbeddingCache
+        engine: Optional embedding_engine.EmbeddingEngine to encode in worker processes
+
+    Returns:
+        tuple: (embeddings, hits) - float32 array in chunk order and number of cache hits
+    """
+    if embedding_cache is None:
+        return _encode(chunks, engine), 0
+
+    embeddings, found = embedding_cache.lookup(chunks)
+    missing = np.flatnonzero(~found)
+    hits = len(chunks) - len(missing)
+
+    if len(missing):
+        new_embeddings = _encode([chunks[i] for i in missing], engine)
+        if embeddings is None:
+            embeddings = np.zeros((len(chunks), new_embeddings.shape[1]), dtype=np.float32)
+        embeddings[missing] = new_embeddings
+        embedding_cache.add([chunks[i] for i in missing], new_embeddings)
+
+    logger.info("Embedding cache: %d hits, %d misses", hits, len(missing))
+    return embeddings, hits
+
+def _sources(text):
+    """Validate create_vector_store input and return it as an iterable of documents."""
+    if isinstance(text, str):
+        if not text:
+            raise ChunkingError("Invalid text input: text must be a non-empty string")
+        if len(text.strip()) < 100:
+            raise ChunkingError("Text content is too short to process (minimum 100 characters required)")
+        return [text]
+    if text is None:
+        raise ChunkingError("Invalid text input: text must be a non-empty string")
+    try:
+        iter(text)
+    except TypeError:
+        raise ChunkingError("Invalid text input: text must be a string or an iterable of page texts")
+    return text
+
+def _document_chunks(source):
+    """Yield the chunking.Chunk objects kept for one document, skipping very short ones."""
+    if not isinstance(source, str):
+        raise ChunkingError("Invalid text input: every page must be a string")
+    try:
+        for chunk in iter_chunks(source, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, count_tokens):
+            # Filter chunks
+            if len(chunk.text) <= 100:
+                continue
+            yield chunk
+    except ChunkingError:
+        raise
+    except Exception as e:
+        raise ChunkingError(f"Failed to split text into chunks: {str(e)}")
+
+def iter_chunk_batches(sources, batch_size=EMBED_BATCH_SIZE):
+    """
+    Stream chunks from one or more documents in fixed-size batches.
+
+    Each document is chunked lazily and chunks never span two documents.
+
+    Args:
+        sources: Iterable of document texts; a sized sequence enables progress fractions
+        batch_size: Number of chunks per batch
+
+    Yields:
+        tuple: (chunks, fraction) - list of chunk texts and the fraction of input
+        consumed so far (None when the number of documents is unknown)
+
+    Raises:
+        ChunkingError: If text chunking fails
+    """
+    total = len(sources) if hasattr(sources, "__len__") else None
+    batch = []
+    fraction = None
+
+    for position, source in enumerate(sources):
+        for chunk in _document_chunks(source):
+            batch.append(chunk.text)
+            if len(batch) == batch_size:
+                if total:
+                    fraction = (position + chunk.end / len(source)) / total
+                yield batch, fraction
+                batch = []
+
+    if batch:
+        yield batch, 1.0 if total else None
+
+def _estimate_chunk_count(sources):
+    """Estimate how many chunks a sized list of documents will produce, or None."""
+    if not hasattr(sources, "__len__"):
+        return None
+    return sum(len(source) for source in sources if isinstance(source, str)) // CHARS_PER_CHUNK_ESTIMATE
+
+@metrics.traced("embeddings.build")
+def create_vector_store(text, embedding_cache=None, batch_size=EMBED_BATCH_SIZE, progress_callback=None, index_target=None, engine=None):
     """
     Create a FAISS vector store from text content.
+
+    Text is streamed through the chunker, encoded in fixed-size batches and added
+    to the index batch by batch, so peak memory is bounded by one batch of
+    embeddings plus the index itself, whatever the corpus size. Large corpora get
+    an approximate (HNSW / IVF) index, trained on a sample drawn from all batches
+    while the vectors wait in a temporary file.
     
     Args:
-        text: The text content to process
+        text: The text content to process, or an iterable of page texts
+        embedding_cache: Optional embedding_cache.EmbeddingCache; only uncached chunks are encoded
+        batch_size: Number of chunks encoded and indexed per batch
+        progress_callback: Optional callable(chunks_done, fraction) invoked after each
+            batch; fraction is in [0, 1], or None if the input size is unknown
+        index_target: "recall", "balanced" or "latency"; selects flat, HNSW or IVF(-PQ)
+            from the estimated corpus size (see ann_index.choose_index_spec)
+        engine: Optional embedding_engine.EmbeddingEngine; batches are then sized
+            to keep every worker process busy
         
     Returns:
         tuple: (index, chunks, model) - FAISS index, text chunks, and embedding model
@@ -33,48 +212,535 @@ def create_vector_store(text):
     """
     try:
         # Validate input
-        if not text or not isinstance(text, str):
-            raise ChunkingError("Invalid text input: text must be a non-empty string")
-        
-        if len(text.strip()) < 100:
-            raise ChunkingError("Text content is too short to process (minimum 100 characters required)")
+        sources = _sources(text)
 
-        # Split into larger overlapping chunks 
-        try:
-            raw_chunks = wrap(text, 500)
-        except Exception as e:
-            raise ChunkingError(f"Failed to split text into chunks: {str(e)}")
+        if engine is not None:
+            # A few worker batches per worker, so no process idles while others finish
+            batch_size = max(batch_size, engine.batch_size * engine.workers * 4)
 
-        # Filter chunks
-        chunks = [chunk.strip() for chunk in raw_chunks if len(chunk.strip()) > 100]
+        builder = None
+        chunks = []
 
-        if len(chunks) == 0:
-            raise ChunkingError("No valid text chunks could be extracted. The content may be too short or contain only whitespace.")
+        for batch, fraction in iter_chunk_batches(sources, batch_size):
+            # Create embeddings
+            try:
+                with metrics.span("embeddings.encode", chunks=len(batch)) as encode_span:
+                    embeddings, hits = encode_chunks(batch, embedding_cache, engine)
+                    encode_span.set(cache_hits=hits)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to create embeddings: {str(e)}")
+            metrics.inc("rag_chunks_embedded_total", len(batch) - hits)
+            metrics.inc("rag_embedding_cache_hits_total", hits)
 
-        # Create embeddings
-        try:
-            embeddings = model.encode(chunks)
-            embeddings = np.array(embeddings)
-        except Exception as e:
-            raise VectorStoreError(f"Failed to create embeddings: {str(e)}")
+            # Validate embeddings
+            if embeddings.shape[0] != len(batch):
+                raise VectorStoreError("Embedding generation produced no results")
 
-        # Validate embeddings
-        if embeddings.shape[0] == 0:
-            raise VectorStoreError("Embedding generation produced no results")
+            # Add the batch to the FAISS index
+            try:
+                if builder is None:
+                    builder = IndexBuilder(embeddings.shape[1], _estimate_chunk_count(sources), index_target)
+                builder.add(embeddings)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to create vector store index: {str(e)}")
+
+            chunks.extend(batch)
+            if progress_callback is not None:
+                progress_callback(len(chunks), fraction)
+
+        if len(chunks) == 0:
+            raise ChunkingError("No valid text chunks could be extracted. The content may be too short or contain only whitespace.")
 
-        # Create FAISS index
         try:
-            dimension = embeddings.shape[1]
-            index = faiss.IndexFlatL2(dimension)
-            index.add(embeddings)
+            index = builder.finish()
         except Exception as e:
             raise VectorStoreError(f"Failed to create vector store index: {str(e)}")
 
-        return index, chunks, model
+        return index, chunks, get_embedding_model()
         
     except (ChunkingError, VectorStoreError):
         # Re-raise our custom exceptions
         raise
     except Exception as e:
         # Catch any unexpected errors
-        raise VectorStoreError(f"Unexpected error during vector store creation: {str(e)}")
\ No newline at end of file
+        raise VectorStoreError(f"Unexpected error during vector store creation: {str(e)}")
+
+def vector_store_key(text):
+    """
+    Return the key identifying the vector store for some text.
+
+    The key covers the text, the embedding model, the chunking parameters and any
+    compact index storage, so it names both the persisted store directory and the
+    shared in-memory copy.
+
+    Args:
+        text: The text content, or a list of page texts
+
+    Returns:
+        str: Hex digest
+    """
+    if INDEX_STORAGE == "float32" and not INDEX_RERANK:
+        # Keep the keys of stores persisted before compact storage existed
+        return content_hash(text, MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+    return content_hash(text, MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, INDEX_STORAGE, INDEX_RERANK)
+
+def load_or_create_vector_store(text, store_dir=DEFAULT_STORE_DIR, embedding_cache=None, progress_callback=None, engine=None):
+    """
+    Return the vector store for some text, reusing a persisted copy when one exists.
+
+    Stores are keyed by a hash of the text, the embedding model and the chunking
+    parameters. A hit memory-maps the saved index and chunks instead of re-encoding,
+    so reopening a previously processed site is nearly instant.
+
+    Args:
+        text: The text content to process, or a list of page texts
+        store_dir: Root directory for persisted stores
+        embedding_cache: Optional embedding_cache.EmbeddingCache used when building
+        progress_callback: Optional callable(chunks_done, fraction), see create_vector_store
+        engine: Optional embedding_engine.EmbeddingEngine used when building
+
+    Returns:
+        tuple: (index, chunks, model) - FAISS index, text chunks, and embedding model
+
+    Raises:
+        ChunkingError: If text chunking fails or produces no valid chunks
+        VectorStoreError: If vector store creation fails
+    """
+    if not isinstance(text, str):
+        # Pages are hashed before building, so they must be materialized
+        text = list(_sources(text))
+    elif not text:
+        raise ChunkingError("Invalid text input: text must be a non-empty string")
+
+    path = store_path(vector_store_key(text), store_dir)
+
+    if has_vector_store(path):
+        try:
+            index, chunks, _ = load_vector_store(path)
+            return index, chunks, get_embedding_model()
+        except VectorStorePersistenceError:
+            # Discard a corrupt store and rebuild it below
+            shutil.rmtree(path, ignore_errors=True)
+
+    index, chunks, embedding_model = create_vector_store(
+        text,
+        embedding_cache,
+        progress_callback=progress_callback,
+        engine=engine
+    )
+
+    try:
+        save_vector_store(path, index, chunks, {
+            "model": MODEL_NAME,
+            "chunk_tokens": CHUNK_TOKENS,
+            "chunk_overlap_tokens": CHUNK_OVERLAP_TOKENS
+        })
+    except VectorStorePersistenceError:
+        # Persistence is an optimization; the freshly built store is still usable
+        pass
+
+    return index, chunks, embedding_model
+
+def chunk_id(url, offset):
+    """
+    Return the stable vector id of a chunk.
+
+    Args:
+        url: URL of the page the chunk comes from
+        offset: Character offset of the chunk in the page text
+
+    Returns:
+        int: Non-negative 63-bit id, the same on every crawl
+    """
+    digest = hashlib.blake2b(f"{url}#{offset}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & CHUNK_ID_MASK
+
+@dataclass
+class DocumentEntry:
+    """A page in an IncrementalVectorStore: its content hash and the ids of its chunks."""
+    content_hash: str
+    ids: List[int] = field(default_factory=list)
+
+@dataclass
+class RefreshResult:
+    """What an IncrementalVectorStore.refresh changed."""
+    added_pages: int = 0
+    changed_pages: int = 0
+    removed_pages: int = 0
+    unchanged_pages: int = 0
+    # Stored pages missing from a partial crawl, left as they were
+    kept_pages: int = 0
+    added_chunks: int = 0
+    removed_chunks: int = 0
+
+class _PendingVectors:
+    """New vectors of a refresh, spooled to a temporary file until the quantizer is fitted."""
+
+    def __init__(self):
+        self.ids = []
+        self.dimension = None
+        self._file = tempfile.TemporaryFile(prefix="rag-vectors-")
+
+    def add(self, ids, vectors):
+        self.dimension = vectors.shape[1]
+        self.ids.extend(ids)
+        np.ascontiguousarray(vectors, dtype=np.float32).tofile(self._file)
+
+    def vectors(self):
+        self._file.flush()
+        return np.memmap(self._file, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension))
+
+    def close(self):
+        self._file.close()
+
+def _add_with_ids(index, vectors, ids, batch_size=SQ_TRAIN_SAMPLE):
+    for start in range(0, len(ids), batch_size):
+        index.add_with_ids(np.ascontiguousarray(vectors[start:start + batch_size]), ids[start:start + batch_size])
+
+class IncrementalVectorStore:
+    """
+    A vector store for a crawled site that re-crawls update in place.
+
+    Vectors are keyed by stable (page URL, chunk offset) ids in an IndexIDMap2,
+    and a document table maps every page to its content hash and chunk ids.
+    refresh() compares page hashes, removes the vectors of changed or deleted
+    pages and encodes only the chunks of new or changed pages, so its cost
+    follows what changed rather than the site size. ``chunks`` maps ids to
+    chunk texts (a vector_store.MappedChunkTable, so a loaded store keeps its
+    persisted chunks memory-mapped), and ids returned by ``index.search`` look
+    chunks up just like positions in a list.
+
+    The index is always flat (with RAG_INDEX_STORAGE compression): HNSW cannot
+    remove vectors, and exact re-ranking assumes ids are positions. With sq8
+    storage, a refresh's new vectors wait in a temporary file until it ends,
+    and the quantizer's value ranges are fitted on a sample of all of them.
+    While the store holds fewer than SQ_TRAIN_SAMPLE vectors, it is refitted
+    whenever it grows to twice the vectors it was fitted on, so a store first
+    built from a page or two is not stuck with their ranges.
+    """
+
+    def __init__(self, storage=None):
+        """
+        Args:
+            storage: "float32", "fp16" or "sq8" (defaults to RAG_INDEX_STORAGE)
+        """
+        self.storage = storage or INDEX_STORAGE
+        self.index = None
+        self.chunks = MappedChunkTable()
+        self.documents = {}
+        # Vectors the scalar quantizer was last fitted on
+        self.trained_vectors = 0
+        self._pending = None
+
+    def _add(self, ids, texts, embedding_cache, engine):
+        try:
+            with metrics.span("embeddings.encode", chunks=len(texts)) as encode_span:
+                embeddings, hits = encode_chunks(texts, embedding_cache, engine)
+                encode_span.set(cache_hits=hits)
+        except Exception as e:
+            raise VectorStoreError(f"Failed to create embeddings: {str(e)}")
+        metrics.inc("rag_chunks_embedded_total", len(texts) - hits)
+        metrics.inc("rag_embedding_cache_hits_total", hits)
+        if embeddings.shape[0] != len(texts):
+            raise VectorStoreError("Embedding generation produced no results")
+
+        try:
+            if self._pending is not None:
+                self._pending.add(ids, embeddings)
+            else:
+                if self.index is None:
+                    self.index = self._create_index(embeddings.shape[1])
+                self.index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+        except Exception as e:
+            raise VectorStoreError(f"Failed to update vector store index: {str(e)}")
+        self.chunks.update(zip(ids, texts))
+
+    def _create_index(self, dimension, training_sample=None):
+        base = create_index(IndexSpec("flat", storage=self.storage), dimension)
+        if training_sample is not None:
+            base.train(training_sample)
+        index = faiss.IndexIDMap2(base)
+        index.own_fields = True
+        base.this.disown()
+        return index
+
+    def _flush_pending(self):
+        """Add a refresh's spooled vectors, first refitting the quantizer if the store outgrew it."""
+        pending, self._pending = self._pending, None
+        try:
+            if not pending.ids:
+                return
+            vectors = pending.vectors()
+            ids = np.asarray(pending.ids, dtype=np.int64)
+            stored = self.index.ntotal if self.index is not None else 0
+            if self.index is not None and (self.trained_vectors >= SQ_TRAIN_SAMPLE or stored + len(ids) < 2 * self.trained_vectors):
+                _add_with_ids(self.index, vectors, ids)
+                return
+
+            stored_ids = faiss.vector_to_array(self.index.id_map).astype(np.int64) if stored else None
+
+            def batches():
+                # Stored vectors were encoded within the old ranges, so decoding them loses little
+                for start in range(0, stored, SQ_TRAIN_SAMPLE):
+                    count = min(SQ_TRAIN_SAMPLE, stored - start)
+                    yield faiss.downcast_index(self.index.index).reconstruct_n(start, count), stored_ids[start:start + count]
+                for start in range(0, len(ids), SQ_TRAIN_SAMPLE):
+                    yield np.ascontiguousarray(vectors[start:start + SQ_TRAIN_SAMPLE]), ids[start:start + SQ_TRAIN_SAMPLE]
+
+            sample = ReservoirSample(SQ_TRAIN_SAMPLE, pending.dimension)
+            for batch_vectors, _ in batches():
+                sample.add(batch_vectors)
+            index = self._create_index(pending.dimension, sample.vectors)
+            for batch_vectors, batch_ids in batches():
+                index.add_with_ids(batch_vectors, batch_ids)
+            self.index = index
+            self.trained_vectors = len(sample.vectors)
+        except Exception as e:
+            raise VectorStoreError(f"Failed to update vector store index: {str(e)}")
+        finally:
+            pending.close()
+
+    def remove_documents(self, urls):
+        """
+        Remove pages and their vectors.
+
+        Args:
+            urls: URLs of the pages to remove; unknown URLs are ignored
+
+        Returns:
+            int: Number of chunks removed
+        """
+        ids = []
+        for url in urls:
+            entry = self.documents.pop(url, None)
+            if entry is not None:
+                ids.extend(entry.ids)
+        if ids and self.index is not None:
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for i in ids:
+            self.chunks.pop(i, None)
+        return len(ids)
+
+    def refresh(self, pages, embedding_cache=None, engine=None, batch_size=EMBED_BATCH_SIZE, progress_callback=None,
+                keep=(), gone=(), complete=True):
+        """
+        Bring the store up to date with a crawl.
+
+        Pages whose text changed are removed and re-added, unchanged pages are
+        left alone and pages in ``gone`` (deleted, or fetched with nothing left
+        to index) are removed. Other stored pages missing from ``pages`` are
+        removed only if the crawl was ``complete`` and they are not in ``keep``,
+        so a timeout, a server error or the page cap never deletes a page. If it raises, the store may be partially refreshed and
+        should be discarded.
+
+        Args:
+            pages: Iterable of scraper.CrawledPage or (url, text) pairs
+            embedding_cache: Optional embedding_cache.EmbeddingCache; only uncached chunks are encoded
+            engine: Optional embedding_engine.EmbeddingEngine to encode in worker processes
+            batch_size: Number of chunks encoded and added per batch
+            progress_callback: Optional callable(chunks_done, fraction), see create_vector_store
+            keep: URLs whose stored pages are kept as they are, e.g. CrawlResult.skipped_urls
+            gone: URLs known to have no content, e.g. CrawlResult.gone_urls
+            complete: Whether ``pages`` lists the whole site, e.g. CrawlResult.complete
+
+        Returns:
+            RefreshResult: Page and chunk counts of the update
+
+        Raises:
+            ChunkingError: If text chunking fails
+            VectorStoreError: If encoding or indexing fails
+        """
+        texts = {}
+        for page in pages:
+            url, text = (page.url, page.text) if hasattr(page, "url") else page
+            texts[url] = text
+
+        result = RefreshResult()
+        keep, gone = set(keep), set(gone)
+        stale = []
+        for url in self.documents:
+            if url in texts:
+                continue
+            if url in gone or (complete and url not in keep):
+                stale.append(url)
+            else:
+                result.kept_pages += 1
+        result.removed_pages = len(stale)
+        updated = []
+        for url, text in texts.items():
+            digest = content_hash(text)
+            entry = self.documents.get(url)
+            if entry is None:
+                result.added_pages += 1
+            elif entry.content_hash == digest:
+                result.unchanged_pages += 1
+                continue
+            else:
+                result.changed_pages += 1
+                stale.append(url)
+            updated.append((url, text, digest))
+
+        result.removed_chunks = self.remove_documents(stale)
+
+        if IndexSpec("flat", storage=self.storage).needs_training:
+            self._pending = _PendingVectors()
+        batch_ids = []
+        batch_texts = []
+        for position, (url, text, digest) in enumerate(updated):
+            entry = DocumentEntry(digest)
+            for chunk in _document_chunks(text):
+                entry.ids.append(chunk_id(url, chunk.start))
+                batch_ids.append(entry.ids[-1])
+                batch_texts.append(chunk.text)
+                if len(batch_ids) == batch_size:
+                    self._add(batch_ids, batch_texts, embedding_cache, engine)
+                    result.added_chunks += len(batch_ids)
+                    batch_ids, batch_texts = [], []
+                    if progress_callback is not None:
+                        progress_callback(result.added_chunks, (position + chunk.end / len(text)) / len(updated))
+            self.documents[url] = entry
+        if batch_ids:
+            self._add(batch_ids, batch_texts, embedding_cache, engine)
+            result.added_chunks += len(batch_ids)
+            if progress_callback is not None:
+                progress_callback(result.added_chunks, 1.0)
+        if self._pending is not None:
+            self._flush_pending()
+
+        return result
+
+    def save(self, path, metadata=None):
+        """
+        Persist the store, replacing any previous copy at ``path``.
+
+        Args:
+            path: Store directory
+            metadata: Optional JSON-serializable dict stored alongside
+
+        Raises:
+            VectorStorePersistenceError: If the store cannot be written
+        """
+        if self.index is None:
+            raise VectorStorePersistenceError("Failed to save vector store: the store is empty")
+        # Chunks are written in the index's internal order, which the id map records
+        ids = faiss.vector_to_array(self.index.id_map)
+        meta = dict(metadata or {})
+        meta.update({
+            "storage": self.storage,
+            "trained_vectors": self.trained_vectors,
+            "documents": {url: [entry.content_hash, entry.ids] for url, entry in self.documents.items()}
+        })
+        save_vector_store(path, self.index, [self.chunks[int(i)] for i in ids], meta, replace=True)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a persisted store so it can be refreshed.
+
+        The index is read into memory, since refreshing modifies it, while the
+        chunk texts stay memory-mapped.
+
+        Args:
+            path: Store directory
+
+        Returns:
+            IncrementalVectorStore: The loaded store
+
+        Raises:
+            VectorStorePersistenceError: If the store is missing or unreadable
+        """
+        index, chunks, metadata = load_vector_store(path, mmap_index=False)
+        if not isinstance(index, faiss.IndexIDMap2) or "documents" not in metadata:
+            raise VectorStorePersistenceError("Failed to load vector store: not an incremental store")
+        store = cls(metadata.get("storage"))
+        store.index = index
+        # Stores saved before this was recorded were fitted on one batch; refit them
+        store.trained_vectors = metadata.get("trained_vectors", 0)
+        store.chunks = MappedChunkTable(chunks, faiss.vector_to_array(index.id_map))
+        store.documents = {
+            url: DocumentEntry(digest, ids) for url, (digest, ids) in metadata["documents"].items()
+        }
+        return store
+
+def site_store_key(site):
+    """
+    Return the key of the incremental store for a site.
+
+    Unlike vector_store_key, the key does not depend on the pages' text, so every
+    re-crawl of the site finds and updates the same store.
+
+    Args:
+        site: The site's seed URL
+
+    Returns:
+        str: Hex digest
+    """
+    return content_hash(site, MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, INDEX_STORAGE)
+
+@metrics.traced("embeddings.refresh")
+def load_or_refresh_site_store(site, pages, store_dir=DEFAULT_SITE_STORE_DIR, embedding_cache=None, progress_callback=None, engine=None,
+                               keep=(), gone=(), complete=True):
+    """
+    Return the vector store for a crawled site, updating its persisted copy.
+
+    The site's previous store is loaded and refreshed with ``pages``, so only new
+    and changed pages are encoded, then saved back for the next crawl.
+
+    Args:
+        site: The site's seed URL
+        pages: Crawled pages, see IncrementalVectorStore.refresh
+        store_dir: Root directory for persisted site stores
+        embedding_cache: Optional embedding_cache.EmbeddingCache used for new chunks
+        progress_callback: Optional callable(chunks_done, fraction), see create_vector_store
+        engine: Optional embedding_engine.EmbeddingEngine used for new chunks
+        keep: URLs not fetched by this crawl whose stored pages are kept, see IncrementalVectorStore.refresh
+        gone: URLs known to have no content, e.g. deleted pages
+        complete: Whether ``pages`` lists the whole site
+
+    Returns:
+        tuple: (index, chunks, model) - ID-mapped FAISS index, MappedChunkTable of
+            chunk texts keyed by vector id, and embedding model
+
+    Raises:
+        ChunkingError: If text chunking fails or the site yields no valid chunks
+        VectorStoreError: If vector store creation fails
+    """
+    path = store_path(site_store_key(site), store_dir)
+
+    store = None
+    if has_vector_store(path):
+        try:
+            store = IncrementalVectorStore.load(path)
+        except VectorStorePersistenceError:
+            # Rebuild a corrupt store from scratch below
+            shutil.rmtree(path, ignore_errors=True)
+    if store is None:
+        store = IncrementalVectorStore()
+
+    result = store.refresh(
+        pages,
+        embedding_cache,
+        engine,
+        progress_callback=progress_callback,
+        keep=keep,
+        gone=gone,
+        complete=complete
+    )
+    logger.info("Refreshed %s: %s", site, result)
+
+    if not store.chunks:
+        raise ChunkingError("No valid text chunks could be extracted. The content may be too short or contain only whitespace.")
+
+    if result.added_chunks or result.removed_chunks or not has_vector_store(path):
+        try:
+            store.save(path, {
+                "site": site,
+                "model": MODEL_NAME,
+                "chunk_tokens": CHUNK_TOKENS,
+                "chunk_overlap_tokens": CHUNK_OVERLAP_TOKENS
+            })
+        except VectorStorePersistenceError:
+            # Persistence is an optimization; the refreshed store is still usable
+            pass
+
+    return store.index, store.chunks, get_embedding_model()
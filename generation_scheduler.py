@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 20
+
+class SchedulerClosedError(Exception):
+    """Raised when a prompt is submitted to a scheduler that has been closed."""
+    pass
+
+class GenerationScheduler:
+    """
+    Process-wide micro-batching queue in front of a batch generation function.
+
+    Prompts submitted from any thread (one per Streamlit session) are queued.
+    A single worker thread takes the first waiting prompt, keeps collecting
+    more for at most ``max_wait_ms`` or until ``max_batch_size`` prompts are
+    gathered, runs one batched generation and resolves each caller's Future.
+    Under load this turns many contending generate calls into a few padded
+    batches; when idle a lone prompt waits at most ``max_wait_ms`` extra.
+    """
+
+    def __init__(self, generate_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        """
+        Args:
+            generate_batch: Callable mapping a list of prompts to a list of answers
+            max_batch_size: Maximum prompts per generation call
+            max_wait_ms: Maximum time the first prompt of a batch waits for companions
+        """
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.prompts = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt):
+        """
+        Queue a prompt for generation.
+
+        Args:
+            prompt: The full prompt
+
+        Returns:
+            concurrent.futures.Future: Resolves to the generated answer
+
+        Raises:
+            SchedulerClosedError: If the scheduler has been closed
+        """
+        if self._closed:
+            raise SchedulerClosedError("The generation scheduler has been closed")
+        future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Submit a prompt and block until its answer is ready."""
+        return self.submit(prompt).result(timeout)
+
+    @property
+    def mean_batch_size(self):
+        return self.prompts / self.batches if self.batches else 0.0
+
+    def close(self):
+        """Stop accepting prompts, finish queued ones and stop the worker."""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # Drop requests whose callers cancelled while queued
+            batch = [(prompt, future) for prompt, future in self._collect(first) if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                answers = self.generate_batch([prompt for prompt, _ in batch])
+                if len(answers) != len(batch):
+                    raise RuntimeError(f"Batch generation returned {len(answers)} answers for {len(batch)} prompts")
+            except Exception as e:
+                logger.exception("Batched generation failed")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.prompts += len(batch)
+            for (_, future), answer in zip(batch, answers):
+                future.set_result(answer)
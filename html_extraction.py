@@ -0,0 +1,207 @@
+import os
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Parser used to turn HTML into text: "bs4" (BeautifulSoup html.parser), "lxml" or "selectolax"
+HTML_BACKEND = os.environ.get("RAG_HTML_BACKEND", "bs4")
+BACKENDS = ("bs4", "lxml", "selectolax")
+# Keep only the main content (drops headers, sidebars, cookie banners) when RAG_MAIN_CONTENT=1
+MAIN_CONTENT = os.environ.get("RAG_MAIN_CONTENT", "0") == "1"
+
+# Always removed before extracting text
+REMOVED_TAGS = ("script", "style", "nav", "footer")
+# Additionally removed in main-content mode
+BOILERPLATE_TAGS = ("header", "aside", "form", "noscript", "iframe", "dialog", "template")
+BOILERPLATE_ROLES = {"banner", "navigation", "complementary", "contentinfo", "dialog", "alertdialog", "search"}
+# Class or id tokens of page chrome such as cookie banners, sidebars and share bars
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:cookies?|consent|gdpr|banner|sidebar|menu|breadcrumbs?|ads?|advert|advertisement"
+    r"|promo|newsletter|subscribe|popup|modal|share|social|related|skip)(?:$|[\s_-])",
+    re.IGNORECASE
+)
+# Elements never removed as boilerplate, whatever their class names say
+PROTECTED_TAGS = {"html", "body", "main", "article"}
+MAIN_SELECTORS = ("main", "[role=main]", "article")
+
+class HTMLExtractionError(Exception):
+    """Raised when an HTML backend is unavailable or fails to parse a document."""
+    pass
+
+def extractor_name(backend=None, main_content=None):
+    """
+    Name an extraction configuration, e.g. "lxml" or "bs4+main".
+
+    Text cached under one name is not reused by another configuration.
+    """
+    backend = backend or HTML_BACKEND
+    main_content = MAIN_CONTENT if main_content is None else main_content
+    return backend + ("+main" if main_content else "")
+
+def _normalize(text):
+    return " ".join(text.split())
+
+def _is_boilerplate(tag, attributes):
+    if tag in PROTECTED_TAGS:
+        return False
+    if tag in BOILERPLATE_TAGS:
+        return True
+    if (attributes.get("role") or "").lower() in BOILERPLATE_ROLES or attributes.get("aria-modal") == "true":
+        return True
+    names = " ".join(filter(None, [attributes.get("id"), attributes.get("class")]))
+    return bool(names) and BOILERPLATE_PATTERN.search(names) is not None
+
+def _pick_main(candidates, text_of):
+    """Return the first <main>/[role=main] element, else the longest <article>, else None."""
+    for selector, nodes in candidates:
+        if not nodes:
+            continue
+        if selector != "article":
+            return nodes[0]
+        return max(nodes, key=lambda node: len(text_of(node)))
+    return None
+
+def _extract_bs4(html, base_url, main_content):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Collect links before navigation blocks are stripped out
+    links = []
+    if base_url is not None:
+        for anchor in soup.find_all("a", href=True):
+            links.append(urljoin(base_url, anchor["href"]))
+
+    for element in soup(list(REMOVED_TAGS)):
+        element.extract()
+
+    root = soup
+    if main_content:
+        for element in soup.find_all(True):
+            # Descendants of an element removed earlier are detached already
+            if element.decomposed:
+                continue
+            attributes = {name: " ".join(value) if isinstance(value, list) else value for name, value in element.attrs.items()}
+            if _is_boilerplate(element.name, attributes):
+                element.decompose()
+        text_of = lambda node: node.get_text(separator=" ")
+        main = _pick_main([(selector, soup.select(selector)) for selector in MAIN_SELECTORS], text_of)
+        if main is not None:
+            root = main
+
+    return _normalize(root.get_text(separator=" ")), links
+
+def _extract_lxml(html, base_url, main_content):
+    try:
+        import lxml.html
+        from lxml import etree
+    except ImportError:
+        raise HTMLExtractionError("The lxml backend needs lxml: pip install lxml")
+
+    if not html.strip():
+        return "", []
+    # Encoding ourselves sidesteps lxml's refusal of str input with an XML encoding declaration
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    document = lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+
+    links = []
+    if base_url is not None:
+        for anchor in document.iter("a"):
+            href = anchor.get("href")
+            if href is not None:
+                links.append(urljoin(base_url, href))
+
+    etree.strip_elements(document, etree.Comment, etree.ProcessingInstruction, *REMOVED_TAGS, with_tail=False)
+
+    root = document
+    if main_content:
+        boilerplate = [element for element in document.iter(etree.Element) if _is_boilerplate(element.tag, element.attrib)]
+        for element in boilerplate:
+            # drop_tree keeps the text that follows the element
+            element.drop_tree()
+        text_of = lambda node: " ".join(node.itertext())
+        candidates = [
+            ("main", document.xpath("//main")),
+            ("[role=main]", document.xpath("//*[@role='main']")),
+            ("article", document.xpath("//article")),
+        ]
+        main = _pick_main(candidates, text_of)
+        if main is not None:
+            root = main
+
+    return _normalize(" ".join(root.itertext())), links
+
+def _strip_selectolax_boilerplate(node):
+    # Walk the tree rather than a flat selection, so no node is touched after an ancestor was removed
+    child = node.child if node is not None else None
+    while child is not None:
+        following = child.next
+        # Text and comment nodes have pseudo tags such as "-text"
+        if child.tag and child.tag[0].isalpha():
+            attributes = {name: value or "" for name, value in child.attributes.items()}
+            if _is_boilerplate(child.tag, attributes):
+                child.decompose()
+            else:
+                _strip_selectolax_boilerplate(child)
+        child = following
+
+def _extract_selectolax(html, base_url, main_content):
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        raise HTMLExtractionError("The selectolax backend needs selectolax: pip install selectolax")
+
+    tree = LexborHTMLParser(html)
+
+    links = []
+    if base_url is not None:
+        for anchor in tree.css("a[href]"):
+            links.append(urljoin(base_url, anchor.attributes.get("href") or ""))
+
+    for node in tree.css(", ".join(REMOVED_TAGS)):
+        node.decompose()
+
+    root = tree.root
+    if main_content:
+        _strip_selectolax_boilerplate(tree.root)
+        text_of = lambda node: node.text(separator=" ")
+        main = _pick_main([(selector, tree.css(selector)) for selector in MAIN_SELECTORS], text_of)
+        if main is not None:
+            root = main
+
+    if root is None:
+        return "", links
+    return _normalize(root.text(separator=" ")), links
+
+_EXTRACTORS = {
+    "bs4": _extract_bs4,
+    "lxml": _extract_lxml,
+    "selectolax": _extract_selectolax,
+}
+
+def extract(html, base_url=None, backend=None, main_content=None):
+    """
+    Extract visible text and outgoing links from an HTML document.
+
+    Args:
+        html: Raw HTML markup
+        base_url: URL the document was served from, used to resolve relative links
+        backend: "bs4", "lxml" or "selectolax" (defaults to RAG_HTML_BACKEND)
+        main_content: Drop page chrome and keep the main content (defaults to RAG_MAIN_CONTENT)
+
+    Returns:
+        tuple: (text, links) - whitespace-normalized text and absolute link URLs
+
+    Raises:
+        HTMLExtractionError: If the backend is unknown or unavailable, or parsing fails
+    """
+    backend = backend or HTML_BACKEND
+    main_content = MAIN_CONTENT if main_content is None else main_content
+    if backend not in _EXTRACTORS:
+        raise HTMLExtractionError(f"Unknown HTML backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+
+    try:
+        return _EXTRACTORS[backend](html, base_url, main_content)
+    except HTMLExtractionError:
+        raise
+    except Exception as e:
+        raise HTMLExtractionError(f"Failed to parse website HTML: {str(e)}")
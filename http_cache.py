@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+CACHE_ROOT = os.environ.get("RAG_CACHE_DIR", ".rag_cache")
+DEFAULT_CACHE_DIR = os.path.join(CACHE_ROOT, "http")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+@dataclass
+class CacheEntry:
+    """A cached page's validators plus the text and links extracted from it."""
+    url: str
+    text: str
+    links: List[str] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+    # html_extraction.extractor_name of the configuration that produced ``text``
+    extractor: str = "bs4"
+    # Charset the body was decoded with, and the URL it was served from (after redirects)
+    encoding: Optional[str] = None
+    base_url: Optional[str] = None
+
+class ResponseCache:
+    """
+    Disk-backed, size-capped LRU cache of fetched pages keyed by URL.
+
+    Each entry is stored as two files named after the SHA-256 of the URL: the raw
+    response body and a JSON sidecar holding the ETag/Last-Modified validators
+    together with the extracted text and links. File modification times double
+    as the LRU clock, so recency survives restarts. All methods are thread-safe.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        """
+        Args:
+            directory: Directory holding the cache files (created if missing)
+            max_bytes: Total on-disk size above which least recently used entries are evicted
+            ttl: Seconds during which an entry is served without revalidation;
+                None always revalidates with the server
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU order from the files on disk."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            meta_path, body_path = self._paths(key)
+            try:
+                size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+                entries.append((os.path.getmtime(meta_path), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total_bytes += size
+
+    def get(self, url):
+        """
+        Look up a cached entry and mark it as recently used.
+
+        Args:
+            url: The page URL
+
+        Returns:
+            CacheEntry or None: The cached entry, or None on a miss
+        """
+        key = self._key(url)
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            meta_path, _ = self._paths(key)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                os.utime(meta_path)
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            self._sizes.move_to_end(key)
+        return CacheEntry(**meta)
+
+    def is_fresh(self, entry):
+        """Return True if the entry is young enough to skip revalidation."""
+        return self.ttl is not None and time.time() - entry.stored_at < self.ttl
+
+    def validators(self, entry):
+        """
+        Build conditional request headers for revalidating an entry.
+
+        Args:
+            entry: A CacheEntry, or None
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (empty if none apply)
+        """
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, url, body, text, links=None, etag=None, last_modified=None, extractor="bs4", encoding=None, base_url=None):
+        """
+        Store a fetched page, evicting least recently used entries if over the size cap.
+
+        Args:
+            url: The page URL
+            body: Raw response body (bytes)
+            text: Text extracted from the body
+            links: Absolute links found on the page
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+            extractor: Name of the extraction configuration that produced ``text``
+            encoding: Charset the body was decoded with, so it can be extracted again
+            base_url: URL the body was served from, used to resolve its links
+
+        Returns:
+            CacheEntry: The stored entry
+        """
+        entry = CacheEntry(
+            url=url,
+            text=text,
+            links=list(links or []),
+            etag=etag,
+            last_modified=last_modified,
+            stored_at=time.time(),
+            extractor=extractor,
+            encoding=encoding,
+            base_url=base_url
+        )
+        meta = json.dumps(entry.__dict__).encode("utf-8")
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+
+        with self._lock:
+            self._remove(key)
+            # Write the body first so a sidecar never points at a missing body
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, meta)
+            self._sizes[key] = len(body) + len(meta)
+            self._total_bytes += self._sizes[key]
+            self._evict()
+        return entry
+
+    def revalidated(self, entry):
+        """
+        Record a 304 Not Modified response for an entry, restarting its TTL.
+
+        Args:
+            entry: The entry that was revalidated
+
+        Returns:
+            CacheEntry: The same entry with an updated timestamp
+        """
+        entry.stored_at = time.time()
+        key = self._key(entry.url)
+        meta_path, _ = self._paths(key)
+        with self._lock:
+            if key in self._sizes:
+                self._write_atomic(meta_path, json.dumps(entry.__dict__).encode("utf-8"))
+                self._sizes.move_to_end(key)
+        return entry
+
+    def body(self, entry):
+        """
+        Read the raw response body stored with an entry.
+
+        Args:
+            entry: A CacheEntry
+
+        Returns:
+            bytes or None: The body, or None if it is no longer cached
+        """
+        key = self._key(entry.url)
+        _, body_path = self._paths(key)
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            try:
+                with open(body_path, "rb") as f:
+                    return f.read()
+            except OSError:
+                self._remove(key)
+                return None
+
+    def reextracted(self, entry, text, links, extractor):
+        """
+        Replace an entry's text and links with ones extracted again from its body.
+
+        The validators and timestamp are kept, so the entry stays as fresh as it was.
+
+        Args:
+            entry: The entry whose body was extracted again
+            text: Newly extracted text
+            links: Newly extracted absolute links
+            extractor: Name of the extraction configuration that produced ``text``
+
+        Returns:
+            CacheEntry: The same entry with the new text
+        """
+        entry.text = text
+        entry.links = list(links)
+        entry.extractor = extractor
+        meta = json.dumps(entry.__dict__).encode("utf-8")
+        key = self._key(entry.url)
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            if key in self._sizes:
+                self._write_atomic(meta_path, meta)
+                size = len(meta) + os.path.getsize(body_path)
+                self._total_bytes += size - self._sizes[key]
+                self._sizes[key] = size
+                self._sizes.move_to_end(key)
+                self._evict()
+        return entry
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in list(self._sizes):
+                self._remove(key)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, key):
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._sizes:
+            oldest = next(iter(self._sizes))
+            self._remove(oldest)
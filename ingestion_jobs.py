@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Websites processed at the same time, across all sessions
+INGEST_WORKERS = int(os.environ.get("RAG_INGEST_WORKERS", "2"))
+# Seconds a finished job is kept for watchers that never collect it, e.g. closed sessions
+FINISHED_JOB_TTL = float(os.environ.get("RAG_FINISHED_JOB_TTL", "600"))
+
+QUEUED = "queued"
+CRAWLING = "crawling"
+EMBEDDING = "embedding"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STAGES = (DONE, FAILED, CANCELLED)
+
+class JobCancelledError(Exception):
+    """Raised inside a job's work when the job has been cancelled."""
+    pass
+
+class IngestionJob:
+    """
+    Status of one background ingestion, updated by its worker and polled by the UI.
+
+    Progress fields (``stage``, ``pages_done``, ``pages_found``, ``chunks``,
+    ``fraction``) are plain attributes written by the worker thread; readers
+    may see a slightly stale value but never a torn one. When the job is done,
+    ``result`` holds what its work function returned and ``error`` any
+    exception it raised.
+    """
+
+    def __init__(self, key, description=""):
+        self.key = key
+        self.description = description
+        self.stage = QUEUED
+        self.pages_done = 0
+        self.pages_found = 0
+        self.chunks = 0
+        self.fraction = 0.0
+        self.warnings = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.watchers = 0
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.stage in FINISHED_STAGES
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """
+        Stop the job's work if it was cancelled; call this between units of work.
+
+        Raises:
+            JobCancelledError: If the job has been cancelled
+        """
+        if self._cancel.is_set():
+            raise JobCancelledError(f"Job {self.key} was cancelled")
+
+    def report_pages(self, pages_done, pages_found):
+        """Progress callback for scraper.crawl_website; raises JobCancelledError once cancelled."""
+        self.pages_done = pages_done
+        self.pages_found = pages_found
+        self.check_cancelled()
+
+    def report_chunks(self, chunks, fraction):
+        """Progress callback for vector store builds; raises JobCancelledError once cancelled."""
+        self.chunks = chunks
+        if fraction is not None:
+            self.fraction = min(fraction, 1.0)
+        self.check_cancelled()
+
+class JobManager:
+    """
+    Runs ingestion jobs on a small thread pool, off the Streamlit script thread.
+
+    Jobs are deduplicated by key: submitting a key whose job is still running
+    returns that job, so a second click or another session watching the same
+    website does not start the work again. Each submit() counts as a watcher
+    and must be paired with release(); a running job whose watchers all
+    released is cancelled, and a finished one is forgotten (its result
+    becomes unreachable once callers drop their references). Finished jobs
+    whose watchers never release them, such as those of closed sessions, are
+    forgotten ``finished_ttl`` seconds after they finish, so their results
+    (e.g. store handles) are not held for the life of the process.
+    """
+
+    def __init__(self, max_workers=INGEST_WORKERS, finished_ttl=FINISHED_JOB_TTL):
+        """
+        Args:
+            max_workers: Number of jobs that run at the same time; others queue
+            finished_ttl: Seconds a finished job is kept while still watched
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self.finished_ttl = finished_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, work, description=""):
+        """
+        Start a job for ``key``, or join the one already running.
+
+        Args:
+            key: Deduplication key, e.g. the normalized website URL and crawl settings
+            work: Callable(job) doing the ingestion; it reports progress through
+                the job and its return value becomes ``job.result``
+            description: Short label shown with the job's progress
+
+        Returns:
+            IngestionJob: The new or already running job
+        """
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is None or job.finished or job.cancelled:
+                job = IngestionJob(key, description)
+                self._jobs[key] = job
+                self._executor.submit(self._run, job, work)
+            job.watchers += 1
+            return job
+
+    def _run(self, job, work):
+        try:
+            job.check_cancelled()
+            result = work(job)
+            job.check_cancelled()
+        except Exception as e:
+            job.error = e
+            # Work may wrap the cancellation error in its own exception type
+            job.stage = CANCELLED if job.cancelled else FAILED
+            if job.stage == FAILED:
+                logger.warning("Ingestion job %s failed: %s", job.key, e)
+        else:
+            job.result = result
+            job.fraction = 1.0
+            job.stage = DONE
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if job.watchers <= 0:
+                    self._forget(job)
+                self._expire()
+
+    def get(self, key):
+        """Return the current job for ``key``, or None."""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(key)
+
+    def release(self, job):
+        """
+        Stop watching a job; the last watcher's release cancels it if still running.
+
+        Args:
+            job: A job returned by submit()
+        """
+        with self._lock:
+            job.watchers -= 1
+            if job.watchers > 0:
+                return
+            if job.finished:
+                self._forget(job)
+            else:
+                job._cancel.set()
+
+    def cancel(self, job):
+        """Cancel a job for all of its watchers; the worker stops at its next progress report."""
+        job._cancel.set()
+
+    def _forget(self, job):
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+
+    def _expire(self):
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if job.finished_at is not None and now - job.finished_at > self.finished_ttl:
+                logger.info("Forgetting ingestion job %s, finished %.0fs ago", job.key, now - job.finished_at)
+                self._forget(job)
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._jobs)
+
+    def shutdown(self):
+        """Cancel every job and wait for the workers to stop."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel.set()
+        self._executor.shutdown(wait=True)
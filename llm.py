@@ -0,0 +1,245 @@
+import logging
+import os
+import threading
+
+from startup_timing import timed, report
+
+logger = logging.getLogger(__name__)
+
+LLM_MODEL_NAME = "google/flan-t5-base"
+MAX_NEW_TOKENS = 200
+# Batch concurrent questions from all sessions into one generate call (RAG_LLM_BATCHING=1)
+BATCH_GENERATION = os.environ.get("RAG_LLM_BATCHING", "0") == "1"
+BATCH_SIZE = int(os.environ.get("RAG_LLM_BATCH_SIZE", "8"))
+# Longest a question waits for others to join its batch
+BATCH_WAIT_MS = float(os.environ.get("RAG_LLM_BATCH_WAIT_MS", "20"))
+# Stream answers token by token unless RAG_STREAM_ANSWERS=0; batching turns streaming off by default
+STREAM_ANSWERS = os.environ.get("RAG_STREAM_ANSWERS", "0" if BATCH_GENERATION else "1") != "0"
+# Seconds to wait for the next token before giving up on a stuck generation
+STREAM_TIMEOUT = 120
+WARM_UP_PROMPT = "Answer the question. Question: What is this website about? Answer:"
+
+# Inference backend: "torch" (fp32), "int8" (dynamic quantization) or "onnx" (ONNX Runtime)
+LLM_BACKEND = os.environ.get("RAG_LLM_BACKEND", "torch")
+BACKENDS = ("torch", "int8", "onnx")
+CACHE_ROOT = os.environ.get("RAG_CACHE_DIR", ".rag_cache")
+ONNX_EXPORT_DIR = os.path.join(CACHE_ROOT, "onnx", LLM_MODEL_NAME.replace("/", "__"))
+
+class LLMError(Exception):
+    """Base exception for answer generation errors."""
+    pass
+
+class LLMBackendError(LLMError):
+    """Raised when an inference backend is unknown or cannot be loaded."""
+    pass
+
+_llms = {}
+_load_lock = threading.Lock()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+def _load_torch(quantize):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL_NAME)
+    model = AutoModelForSeq2SeqLM.from_pretrained(LLM_MODEL_NAME)
+    model.eval()
+    if quantize:
+        # int8 weights for every Linear layer, activations quantized on the fly
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+def _load_onnx():
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise LLMBackendError("The onnx backend needs optimum[onnxruntime]: pip install 'optimum[onnxruntime]'")
+    from transformers import AutoTokenizer
+
+    if os.path.isdir(ONNX_EXPORT_DIR):
+        tokenizer = AutoTokenizer.from_pretrained(ONNX_EXPORT_DIR)
+        model = ORTModelForSeq2SeqLM.from_pretrained(ONNX_EXPORT_DIR, use_cache=True)
+    else:
+        # One-time export of the encoder and the KV-cached decoder
+        tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL_NAME)
+        model = ORTModelForSeq2SeqLM.from_pretrained(LLM_MODEL_NAME, export=True, use_cache=True)
+        model.save_pretrained(ONNX_EXPORT_DIR)
+        tokenizer.save_pretrained(ONNX_EXPORT_DIR)
+    return tokenizer, model
+
+def get_llm(backend=None):
+    """
+    Return the (tokenizer, model) pair for a backend, loading flan-t5 on first use.
+
+    transformers is imported here rather than at module import, so importing this
+    module is cheap. Loading is thread-safe: concurrent callers wait for a single load.
+
+    Args:
+        backend: "torch", "int8" or "onnx" (defaults to RAG_LLM_BACKEND)
+
+    Returns:
+        tuple: (tokenizer, model)
+
+    Raises:
+        LLMBackendError: If the backend is unknown or its dependencies are missing
+    """
+    backend = backend or LLM_BACKEND
+    if backend not in BACKENDS:
+        raise LLMBackendError(f"Unknown LLM backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+
+    if backend not in _llms:
+        with _load_lock:
+            if backend not in _llms:
+                with timed("llm.import"):
+                    import torch  # noqa: F401
+                    from transformers import AutoModelForSeq2SeqLM  # noqa: F401
+                with timed(f"llm.load[{backend}]"):
+                    if backend == "onnx":
+                        _llms[backend] = _load_onnx()
+                    else:
+                        _llms[backend] = _load_torch(quantize=backend == "int8")
+    return _llms[backend]
+
+def generate_answer(prompt, backend=None):
+    """
+    Generate an answer for a prompt with flan-t5.
+
+    With RAG_LLM_BATCHING=1 and the default backend the prompt goes through the
+    process-wide scheduler, so concurrent sessions share batched generate calls.
+
+    Args:
+        prompt: The full prompt, including context and question
+        backend: Inference backend (defaults to RAG_LLM_BACKEND)
+
+    Returns:
+        str: The generated answer
+    """
+    if BATCH_GENERATION and backend is None:
+        return get_scheduler().generate(prompt)
+    return generate_answers([prompt], backend)[0]
+
+def generate_answers(prompts, backend=None):
+    """
+    Generate answers for several prompts with a single padded model.generate call.
+
+    Args:
+        prompts: List of full prompts
+        backend: Inference backend (defaults to RAG_LLM_BACKEND)
+
+    Returns:
+        list: The generated answers, in prompt order
+    """
+    import torch
+
+    tokenizer, model = get_llm(backend)
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+    with torch.no_grad():
+        outputs = model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS, temperature=0.3)
+    answers = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    return [answer.strip() for answer in answers]
+
+def get_scheduler():
+    """
+    Return the process-wide GenerationScheduler, starting it on first use.
+
+    Returns:
+        GenerationScheduler: Batches prompts for the default backend
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from generation_scheduler import GenerationScheduler
+                _scheduler = GenerationScheduler(generate_answers, max_batch_size=BATCH_SIZE, max_wait_ms=BATCH_WAIT_MS)
+    return _scheduler
+
+def generate_answer_stream(prompt, backend=None):
+    """
+    Generate an answer for a prompt, yielding text pieces as tokens are decoded.
+
+    model.generate runs on a worker thread and feeds a TextIteratorStreamer, so
+    the first piece arrives after the encoder pass and one decoder step instead
+    of after the whole answer.
+
+    Args:
+        prompt: The full prompt, including context and question
+        backend: Inference backend (defaults to RAG_LLM_BACKEND)
+
+    Yields:
+        str: Successive pieces of the answer; their concatenation is the full answer
+
+    Raises:
+        Exception: Whatever model.generate raised on the worker thread
+    """
+    import torch
+    from transformers import TextIteratorStreamer
+
+    tokenizer, model = get_llm(backend)
+    inputs = tokenizer(prompt, return_tensors="pt", truncation=True)
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True, timeout=STREAM_TIMEOUT)
+    errors = []
+
+    def run():
+        try:
+            with torch.no_grad():
+                model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS, temperature=0.3, streamer=streamer)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer, which re-raises below
+            streamer.end()
+
+    worker = threading.Thread(target=run, name="llm-stream", daemon=True)
+    worker.start()
+    for piece in streamer:
+        if piece:
+            yield piece
+    worker.join()
+
+    if errors:
+        raise errors[0]
+
+def _warm_up():
+    # Imported here to keep llm importable without sentence-transformers
+    from embeddings import get_embedding_model
+
+    try:
+        embedding_model = get_embedding_model()
+        with timed("embeddings.first_inference"):
+            embedding_model.encode(["warm up"])
+
+        get_llm()
+        with timed("llm.first_inference"):
+            generate_answer(WARM_UP_PROMPT)
+
+        logger.info("Model warm-up finished:\n%s", report())
+    except Exception:
+        # Warm-up is best effort; the real request will surface any error
+        logger.exception("Model warm-up failed")
+
+def warm_up(background=True):
+    """
+    Load both models and run one dummy encode/generate so the first real query is fast.
+
+    Safe to call on every script run: the warm-up runs at most once per process.
+
+    Args:
+        background: Run on a daemon thread instead of blocking the caller
+
+    Returns:
+        threading.Thread or None: The warm-up thread when running in the background
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is not None:
+            return _warm_up_thread
+        _warm_up_thread = threading.Thread(target=_warm_up, name="model-warm-up", daemon=True)
+        _warm_up_thread.start()
+    if not background:
+        _warm_up_thread.join()
+        return None
+    return _warm_up_thread
@@ -0,0 +1,348 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("rag.metrics")
+
+# Set to 1 to record spans and counters; when off, spans cost one flag check
+METRICS_ENABLED = os.environ.get("RAG_METRICS", "0") == "1"
+# Set to 1 to also log every span as a JSON line on the "rag.metrics" logger
+METRICS_JSON_LOGS = os.environ.get("RAG_METRICS_JSON_LOGS", "0") == "1"
+# Where app.py writes a Prometheus text snapshot after each answer (empty: no file)
+METRICS_FILE = os.environ.get("RAG_METRICS_FILE", "")
+# Port serving the snapshot at /metrics (0: no endpoint)
+METRICS_PORT = int(os.environ.get("RAG_METRICS_PORT", "0"))
+
+# Upper bounds of the span duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = METRICS_ENABLED
+_current_trace = contextvars.ContextVar("rag_metrics_trace", default=None)
+
+def rss_bytes():
+    """Current resident set size of this process, in bytes (Linux), else peak RSS; 0 if unknown."""
+    try:
+        # Unix-only; imported here so the app still imports on Windows
+        import resource
+    except ImportError:
+        return 0
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and duration histograms, exported as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def counter(self, name, **labels):
+        """Return a counter's value (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def prometheus_text(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The snapshot, one sample per line
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items())
+            # Copied while locked; bucket counts are made cumulative below
+            histograms = [(key, list(h.buckets), h.count, h.sum) for key, h in histograms]
+
+        def emit(samples, kind):
+            seen = set()
+            for (name, labels), value in samples:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        emit(counters, "counter")
+        emit(gauges, "gauge")
+        seen = set()
+        for (name, labels), buckets, count, total in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket in zip(DURATION_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class Span:
+    """A timed stage; attributes (chunk counts, token counts, ...) can be added while it runs."""
+
+    __slots__ = ("name", "attrs", "start", "duration", "_trace")
+
+    def __init__(self, name, attrs, trace):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = None
+        self._trace = trace
+
+    def set(self, **attrs):
+        """Attach attributes to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if self._trace is not None:
+            self._trace.spans.append(self)
+        if _enabled:
+            REGISTRY.observe("rag_span_duration_seconds", self.duration, span=self.name)
+            if METRICS_JSON_LOGS:
+                logger.info(json.dumps({
+                    "event": "span",
+                    "span": self.name,
+                    "duration_ms": round(self.duration * 1000, 3),
+                    "timestamp": time.time(),
+                    **self.attrs
+                }, default=str))
+        return False
+
+class _NoopSpan:
+    """Stand-in returned while metrics are off and no trace is active."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """The spans recorded while a trace is active in this thread, e.g. for one answer."""
+
+    def __init__(self):
+        self.spans = []
+        self._token = None
+
+    def breakdown(self):
+        """Return (span name, milliseconds) pairs in completion order."""
+        return [(span.name, span.duration * 1000) for span in self.spans]
+
+    def __enter__(self):
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_trace.reset(self._token)
+        return False
+
+def configure(enabled):
+    """Turn recording on or off at runtime (the default comes from RAG_METRICS)."""
+    global _enabled
+    _enabled = enabled
+
+def is_enabled():
+    """Return whether metrics are being recorded."""
+    return _enabled
+
+def span(name, **attrs):
+    """
+    Time a stage as a context manager.
+
+    Durations go to the ``rag_span_duration_seconds`` histogram (and JSON logs
+    if enabled) and to the active Trace, if any. With metrics off and no trace,
+    a shared no-op span is returned.
+
+    Args:
+        name: Stage name, "<component>.<stage>", e.g. "scrape.page" or "answer.search"
+        **attrs: Attributes logged with the span
+
+    Returns:
+        Span: Use ``with span(...) as s: s.set(chunks=n)``
+    """
+    trace = _current_trace.get()
+    if not _enabled and trace is None:
+        return _NOOP_SPAN
+    return Span(name, attrs, trace)
+
+def traced(name):
+    """
+    Decorator timing every call of a function as a span.
+
+    Args:
+        name: Stage name, see span()
+
+    Returns:
+        callable: The decorator
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def inc(name, value=1, **labels):
+    """Increment a counter, e.g. inc("rag_answer_cache_hits_total"); no-op while disabled."""
+    if _enabled:
+        REGISTRY.inc(name, value, **labels)
+
+def set_gauge(name, value, **labels):
+    """Set a gauge; no-op while disabled."""
+    if _enabled:
+        REGISTRY.set_gauge(name, value, **labels)
+
+def snapshot():
+    """
+    Return the Prometheus text snapshot, refreshing the process RSS gauge first.
+
+    Returns:
+        str: Prometheus text exposition
+    """
+    REGISTRY.set_gauge("rag_process_rss_bytes", rss_bytes())
+    return REGISTRY.prometheus_text()
+
+def write_snapshot(path=METRICS_FILE):
+    """
+    Atomically write the Prometheus text snapshot to a file, e.g. for a textfile collector.
+
+    Write failures are logged rather than raised, so metrics never break a request.
+
+    Args:
+        path: Destination file; nothing is written if empty or metrics are off
+    """
+    if not path or not _enabled:
+        return
+    tmp_path = None
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(snapshot())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write metrics snapshot to %s: %s", path, e)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def start_http_server(port=METRICS_PORT, host="0.0.0.0"):
+    """
+    Serve the snapshot at http://host:port/metrics from a daemon thread.
+
+    Args:
+        port: Port to listen on
+        host: Interface to bind
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = snapshot().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def format_breakdown(trace):
+    """Format a trace as "name 12 ms · name 840 ms" for display."""
+    return " · ".join(f"{name} {ms:.0f} ms" if ms >= 10 else f"{name} {ms:.1f} ms" for name, ms in trace.breakdown())
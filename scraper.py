@@ -1,5 +1,26 @@
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from urllib.parse import urldefrag, urlparse
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from html_extraction import extract, extractor_name, HTMLExtractionError
+import metrics
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+REQUEST_TIMEOUT = 10
+MIN_CONTENT_LENGTH = 100
+
+# Links to these resources are never worth fetching as pages
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp",
+    ".ico", ".css", ".js", ".json", ".xml", ".mp3", ".mp4", ".avi", ".mov", ".woff", ".woff2",
+)
 
 class WebsiteScraperError(Exception):
     """Base exception for website scraper errors."""
@@ -13,66 +34,257 @@ class ContentExtractionError(WebsiteScraperError):
     """Raised when content extraction fails."""
     pass
 
-def get_website_text(url):
+class PageNotFoundError(NetworkError):
+    """Raised when the server reports that a page does not exist (HTTP 404 or 410)."""
+    pass
+
+def _is_known_empty(error):
+    """Whether a crawl error shows the page has no content, rather than leaving it unknown."""
+    return isinstance(error, (PageNotFoundError, ContentExtractionError))
+
+@dataclass
+class CrawledPage:
+    """Text extracted from a single crawled page."""
+    url: str
+    text: str
+
+@dataclass
+class CrawlResult:
+    """Outcome of a multi-page crawl."""
+    pages: List[CrawledPage] = field(default_factory=list)
+    errors: Dict[str, WebsiteScraperError] = field(default_factory=dict)
+    # Same-site links found but not fetched because of max_depth or max_pages
+    unvisited: Set[str] = field(default_factory=set)
+
+    @property
+    def text(self):
+        """All page texts joined into a single document."""
+        return " ".join(page.text for page in self.pages)
+
+    @property
+    def gone_urls(self):
+        """
+        URLs known to have nothing to index: reported deleted (404/410), or
+        fetched but too short or not HTML.
+        """
+        return {url for url, error in self.errors.items() if _is_known_empty(error)}
+
+    @property
+    def skipped_urls(self):
+        """URLs whose current content is unknown: a transport or server error, or not visited."""
+        return {url for url, error in self.errors.items() if not _is_known_empty(error)} | self.unvisited
+
+    @property
+    def complete(self):
+        """Whether every page of the site was reached, so a page missing from ``pages`` no longer exists."""
+        return not self.skipped_urls
+
+def create_session(pool_size=10):
+    """
+    Create a keep-alive HTTP session with a connection pool sized for crawling.
+
+    Args:
+        pool_size: Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Session with browser-like headers
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def _fetch(url, session=None, headers=None):
+    """
+    Fetch a URL, translating requests failures into NetworkError.
+
+    Args:
+        url: The URL to fetch
+        session: Optional requests.Session to reuse pooled connections
+        headers: Optional extra request headers (e.g. conditional validators)
+
+    Returns:
+        requests.Response: The successful response
+
+    Raises:
+        NetworkError: If network-related errors occur (connection, timeout, SSL, HTTP status)
+    """
+    response = None
+    try:
+        if session is not None:
+            response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        else:
+            response = requests.get(url, headers={**HEADERS, **(headers or {})}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()  # Raise exception for bad status codes
+    except requests.exceptions.Timeout:
+        raise NetworkError("The website took too long to respond. Please try again.")
+    except requests.exceptions.ConnectionError:
+        raise NetworkError("Unable to reach the website. Please check the URL and your internet connection.")
+    except requests.exceptions.SSLError:
+        raise NetworkError("SSL certificate error. The website may have security issues.")
+    except requests.exceptions.HTTPError as e:
+        if response.status_code == 403:
+            raise NetworkError("Access forbidden. The website is blocking automated access.")
+        elif response.status_code == 404:
+            raise PageNotFoundError("Page not found. Please check the URL.")
+        elif response.status_code == 410:
+            raise PageNotFoundError("Page no longer exists.")
+        elif response.status_code >= 500:
+            raise NetworkError("The website server is experiencing issues. Please try again later.")
+        else:
+            raise NetworkError(f"HTTP error {response.status_code}: {str(e)}")
+    except requests.exceptions.RequestException as e:
+        raise NetworkError(f"Network error: {str(e)}")
+
+    return response
+
+def _parse_html(html, base_url=None):
+    """
+    Extract visible text and outgoing links from an HTML document.
+
+    The parser and main-content mode come from RAG_HTML_BACKEND and
+    RAG_MAIN_CONTENT, see html_extraction.extract.
+
+    Args:
+        html: Raw HTML markup
+        base_url: URL the document was served from, used to resolve relative links
+
+    Returns:
+        tuple: (text, links) - whitespace-normalized text and absolute link URLs
+
+    Raises:
+        ContentExtractionError: If the HTML cannot be parsed
+    """
+    try:
+        return extract(html, base_url)
+    except HTMLExtractionError as e:
+        raise ContentExtractionError(str(e))
+
+def _reextract(cache, entry, extractor):
+    """
+    Extract a cached page's text again with the current backend and mode.
+
+    Args:
+        cache: The http_cache.ResponseCache holding the entry
+        entry: A CacheEntry extracted with another configuration
+        extractor: Name of the current extraction configuration
+
+    Returns:
+        CacheEntry or None: The updated entry, or None if its body is gone or cannot be parsed
+    """
+    body = cache.body(entry)
+    if body is None:
+        return None
+    try:
+        # Entries cached before encodings were recorded fall back to UTF-8
+        html = body.decode(entry.encoding or "utf-8", errors="replace")
+    except LookupError:
+        html = body.decode("utf-8", errors="replace")
+    try:
+        with metrics.span("scrape.parse", url=entry.url) as parse_span:
+            text, links = _parse_html(html, entry.base_url or entry.url)
+            parse_span.set(chars=len(text), links=len(links))
+    except ContentExtractionError:
+        return None
+    return cache.reextracted(entry, text, links, extractor)
+
+def _load_page(url, session=None, cache=None, require_html=False):
+    """
+    Fetch and parse one page, going through the response cache when one is given.
+
+    A fresh cache entry is returned without touching the network; otherwise the
+    cached ETag/Last-Modified validators are sent and a 304 response reuses the
+    cached text and links without downloading or parsing the page again. An
+    entry extracted with another backend or mode is first extracted again from
+    its cached body, so switching RAG_HTML_BACKEND does not re-download pages.
+
+    Args:
+        url: The page URL
+        session: Optional requests.Session to reuse pooled connections
+        cache: Optional http_cache.ResponseCache
+        require_html: Whether to reject responses whose Content-Type is not HTML
+
+    Returns:
+        tuple: (text, links, final_url) - extracted text (not yet validated),
+            absolute links and the URL the page was served from after redirects
+
+    Raises:
+        NetworkError: If the page cannot be fetched
+        ContentExtractionError: If the page is not HTML or cannot be parsed
+    """
+    extractor = extractor_name()
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and entry.extractor != extractor:
+        # Text extracted with another backend or mode is extracted again from the cached body
+        entry = _reextract(cache, entry, extractor)
+    if entry is not None and cache.is_fresh(entry):
+        metrics.inc("rag_http_cache_requests_total", result="fresh")
+        return entry.text, entry.links, entry.base_url or url
+
+    headers = cache.validators(entry) if cache is not None else None
+    response = _fetch(url, session, headers)
+
+    if response.status_code == 304 and entry is not None:
+        cache.revalidated(entry)
+        metrics.inc("rag_http_cache_requests_total", result="revalidated")
+        return entry.text, entry.links, entry.base_url or url
+    if cache is not None:
+        metrics.inc("rag_http_cache_requests_total", result="miss")
+
+    content_type = response.headers.get("Content-Type", "")
+    if require_html and content_type and "html" not in content_type.lower():
+        raise ContentExtractionError(f"Skipped non-HTML content ({content_type}).")
+
+    with metrics.span("scrape.parse", url=url) as parse_span:
+        text, links = _parse_html(response.text, response.url or url)
+        parse_span.set(chars=len(text), links=len(links))
+
+    # Only pages worth indexing are cached, so failures are retried next time
+    if cache is not None and len(text) >= MIN_CONTENT_LENGTH:
+        cache.put(
+            url,
+            response.content,
+            text,
+            links=links,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            extractor=extractor,
+            encoding=response.encoding,
+            base_url=response.url or url
+        )
+
+    return text, links, response.url or url
+
+def _check_content(text):
+    """Raise ContentExtractionError if the extracted text is too short to be useful."""
+    if not text or len(text.strip()) < MIN_CONTENT_LENGTH:
+        raise ContentExtractionError("Unable to extract sufficient content from this website. The site may be empty or blocking automated access.")
+
+def get_website_text(url, session=None, cache=None):
     """
     Fetch and extract text content from a website URL.
-    
+
     Args:
         url: The website URL to scrape
-        
+        session: Optional requests.Session to reuse pooled connections
+        cache: Optional http_cache.ResponseCache for conditional revalidation
+
     Returns:
         str: Extracted text content from the website
-        
+
     Raises:
         NetworkError: If network-related errors occur (connection, timeout, SSL)
         ContentExtractionError: If content extraction fails or no content found
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
+        with metrics.span("scrape.page", url=url) as page_span:
+            text, _, _ = _load_page(url, session, cache)
+            page_span.set(chars=len(text))
 
-        # Make request with timeout
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()  # Raise exception for bad status codes
-        except requests.exceptions.Timeout:
-            raise NetworkError("The website took too long to respond. Please try again.")
-        except requests.exceptions.ConnectionError:
-            raise NetworkError("Unable to reach the website. Please check the URL and your internet connection.")
-        except requests.exceptions.SSLError:
-            raise NetworkError("SSL certificate error. The website may have security issues.")
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 403:
-                raise NetworkError("Access forbidden. The website is blocking automated access.")
-            elif response.status_code == 404:
-                raise NetworkError("Page not found. Please check the URL.")
-            elif response.status_code >= 500:
-                raise NetworkError("The website server is experiencing issues. Please try again later.")
-            else:
-                raise NetworkError(f"HTTP error {response.status_code}: {str(e)}")
-        except requests.exceptions.RequestException as e:
-            raise NetworkError(f"Network error: {str(e)}")
-
-        # Parse HTML content
-        try:
-            soup = BeautifulSoup(response.text, "html.parser")
-        except Exception as e:
-            raise ContentExtractionError(f"Failed to parse website HTML: {str(e)}")
-
-        # Remove scripts and styles
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.extract()
-
-        # Extract text
-        text = soup.get_text(separator=" ")
-        
-        # Clean up whitespace
-        text = " ".join(text.split())
-        
         # Validate that we got meaningful content
-        if not text or len(text.strip()) < 100:
-            raise ContentExtractionError("Unable to extract sufficient content from this website. The site may be empty or blocking automated access.")
+        _check_content(text)
 
         return text
 
@@ -81,4 +293,183 @@ def get_website_text(url):
         raise
     except Exception as e:
         # Catch any unexpected errors
-        raise ContentExtractionError(f"Unexpected error while processing website: {str(e)}")
\ No newline at end of file
+        raise ContentExtractionError(f"Unexpected error while processing website: {str(e)}")
+
+def _normalize_url(url):
+    """Drop fragments so that anchors on the same page are not crawled twice."""
+    url, _ = urldefrag(url)
+    return url
+
+def _is_crawlable(url, netlocs):
+    """Check that a link stays on the crawled hosts and points at a likely HTML page."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return False
+    if parsed.netloc.lower() not in netlocs:
+        return False
+    return not parsed.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+def _crawl_page(url, session, cache):
+    """
+    Fetch one page for the crawler.
+
+    Returns:
+        tuple: (text, links, final_url) - extracted text (not yet validated),
+            absolute links and the URL the page was served from after redirects
+
+    Raises:
+        NetworkError: If the page cannot be fetched
+        ContentExtractionError: If the page is not HTML or cannot be parsed
+        WebsiteScraperError: On any other error, which leaves the page's content unknown
+    """
+    try:
+        return _load_page(url, session, cache, require_html=True)
+
+    except (NetworkError, ContentExtractionError):
+        raise
+    except Exception as e:
+        raise WebsiteScraperError(f"Unexpected error while processing website: {str(e)}")
+
+def _sitemap_urls(start_url, session, max_urls):
+    """
+    Read page URLs from the site's sitemap.xml, following one level of sitemap indexes.
+
+    A missing or malformed sitemap is not an error; an empty list is returned instead.
+    """
+    parsed = urlparse(start_url)
+    sitemaps = [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+    urls = []
+
+    while sitemaps and len(urls) < max_urls:
+        sitemap_url = sitemaps.pop(0)
+        try:
+            response = _fetch(sitemap_url, session)
+            root = ET.fromstring(response.content)
+        except (NetworkError, ET.ParseError):
+            continue
+
+        is_index = root.tag.endswith("sitemapindex")
+        for loc in root.iter():
+            if not loc.tag.endswith("loc") or not loc.text:
+                continue
+            if is_index:
+                # Only expand the top-level index to keep sitemap discovery bounded
+                if sitemap_url.endswith("/sitemap.xml"):
+                    sitemaps.append(loc.text.strip())
+            else:
+                urls.append(loc.text.strip())
+
+    return urls[:max_urls]
+
+def crawl_website(start_url, max_depth=2, max_pages=50, max_workers=8, use_sitemap=True, session=None, cache=None, progress_callback=None):
+    """
+    Crawl a website from a seed URL, following same-domain links concurrently.
+
+    Pages are fetched on a bounded thread pool over a shared keep-alive session.
+    Pages listed in sitemap.xml are fetched as well, but their links are not
+    followed further since the sitemap already enumerates the site. If the seed
+    redirects to another host (apex to www, or to HTTPS on another name), links
+    to that host are followed too. A page that fails is recorded in
+    ``CrawlResult.errors`` and does not stop the crawl.
+
+    Args:
+        start_url: The URL to start crawling from
+        max_depth: Maximum number of link hops to follow from the seed page
+        max_pages: Maximum number of pages to fetch
+        max_workers: Maximum number of concurrent requests
+        use_sitemap: Whether to also fetch pages listed in the site's sitemap.xml
+        session: Optional requests.Session; a pooled session is created if omitted
+        cache: Optional http_cache.ResponseCache shared by all page fetches
+        progress_callback: Optional callable(pages_done, pages_found) invoked after
+            each page; if it raises, queued fetches are cancelled and the error propagates
+
+    Returns:
+        CrawlResult: Successfully extracted pages in discovery order, plus per-page
+            errors and the links left unvisited
+
+    Raises:
+        NetworkError: If no page could be crawled and the seed page failed to download
+        ContentExtractionError: If no page yielded sufficient content
+    """
+    if session is None:
+        session = create_session(pool_size=max_workers)
+
+    start_url = _normalize_url(start_url)
+    netlocs = {urlparse(start_url).netloc.lower()}
+
+    result = CrawlResult()
+    order = {}
+    # URLs already scheduled, plus the URL the seed redirected to
+    seen = set()
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def schedule(url, depth):
+            order[url] = len(order)
+            seen.add(url)
+            result.unvisited.discard(url)
+            pending[executor.submit(_crawl_page, url, session, cache)] = (url, depth)
+
+        schedule(start_url, 0)
+        sitemap = _sitemap_urls(start_url, session, max_pages) if use_sitemap and max_pages > 1 else []
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    try:
+                        text, links, final_url = future.result()
+                    except WebsiteScraperError as e:
+                        result.errors[url] = e
+                        links = ()
+                    else:
+                        if url == start_url:
+                            # Links on a redirected seed point at the host it redirected to
+                            final_url = _normalize_url(final_url)
+                            netlocs.add(urlparse(final_url).netloc.lower())
+                            seen.add(final_url)
+                        try:
+                            _check_content(text)
+                            result.pages.append(CrawledPage(url=url, text=text))
+                        except ContentExtractionError as e:
+                            # Link hub pages may have little text but still lead somewhere useful
+                            result.errors[url] = e
+
+                    if url == start_url:
+                        # Scheduled once the seed's final host is known
+                        for sitemap_url in sitemap:
+                            sitemap_url = _normalize_url(sitemap_url)
+                            if sitemap_url in seen or not _is_crawlable(sitemap_url, netlocs):
+                                continue
+                            if len(order) < max_pages:
+                                schedule(sitemap_url, max_depth)
+                            else:
+                                result.unvisited.add(sitemap_url)
+
+                    for link in links:
+                        link = _normalize_url(link)
+                        if link in seen or not _is_crawlable(link, netlocs):
+                            continue
+                        if depth < max_depth and len(order) < max_pages:
+                            schedule(link, depth + 1)
+                        else:
+                            # Recorded so a partial crawl is not mistaken for deleted pages
+                            result.unvisited.add(link)
+
+                    if progress_callback is not None:
+                        progress_callback(len(order) - len(pending), len(order))
+        except BaseException:
+            # Don't let the executor run the queued fetches before the error propagates
+            for future in pending:
+                future.cancel()
+            raise
+
+    if not result.pages:
+        if start_url in result.errors:
+            raise result.errors[start_url]
+        raise ContentExtractionError("Unable to extract sufficient content from any page of this website.")
+
+    result.pages.sort(key=lambda page: order[page.url])
+    return result
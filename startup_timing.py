@@ -0,0 +1,49 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Phase name -> seconds, in the order phases first ran
+TIMINGS = OrderedDict()
+_lock = threading.Lock()
+
+@contextmanager
+def timed(name):
+    """
+    Record how long a startup phase takes.
+
+    Phases are named "<component>.<phase>", e.g. "llm.import", "llm.load" or
+    "llm.first_inference". Only the first successful run of each phase is kept.
+
+    Args:
+        name: Phase name
+    """
+    start = time.perf_counter()
+    yield
+    # Failed phases are not recorded
+    elapsed = time.perf_counter() - start
+    with _lock:
+        TIMINGS.setdefault(name, elapsed)
+
+def report():
+    """
+    Format recorded phases as a table grouped by component.
+
+    Returns:
+        str: Human-readable startup timing breakdown
+    """
+    with _lock:
+        timings = list(TIMINGS.items())
+    if not timings:
+        return "No startup phases recorded yet."
+
+    lines = [f"{'phase':<36} {'seconds':>8}"]
+    totals = OrderedDict()
+    for name, seconds in timings:
+        lines.append(f"{name:<36} {seconds:>8.2f}")
+        component = name.split(".", 1)[0]
+        totals[component] = totals.get(component, 0.0) + seconds
+    lines.append("-" * 45)
+    for component, seconds in totals.items():
+        lines.append(f"{component + ' total':<36} {seconds:>8.2f}")
+    return "\n".join(lines)
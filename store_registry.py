@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ann_index import index_nbytes
+
+logger = logging.getLogger(__name__)
+
+# Target size of the stores kept in memory, in MB; stores in use are never evicted
+DEFAULT_MEMORY_BUDGET = int(os.environ.get("RAG_STORE_MEMORY_MB", "1024")) * 1024 * 1024
+
+def store_nbytes(index, chunks):
+    """
+    Estimate the memory held by a vector store.
+
+    Args:
+        index: FAISS index
+        chunks: List of chunk texts, a vector_store.MappedChunks or
+            MappedChunkTable, or a dict of chunk texts keyed by vector id
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    chunk_bytes = getattr(chunks, "nbytes", None)
+    if isinstance(chunks, dict):
+        chunks = chunks.values()
+    if chunk_bytes is None:
+        chunk_bytes = sum(len(chunk.encode("utf-8")) for chunk in chunks)
+    return index_nbytes(index) + chunk_bytes
+
+def _close_chunks(entry):
+    """Release the mmap and file descriptor of an evicted store's MappedChunks."""
+    _, chunks, _ = entry.future.result()
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+class _BuildCancelled(Exception):
+    """Set on a build's future when its builder was cancelled; waiters retry the build."""
+    pass
+
+class _Entry:
+    def __init__(self, key):
+        self.key = key
+        self.future = Future()
+        self.refs = 0
+        self.nbytes = 0
+
+class StoreHandle:
+    """
+    A session's reference to a shared vector store.
+
+    The index, chunks and model are shared with every other session that
+    acquired the same key and must be treated as read-only. The reference is
+    released by release() or when the handle is garbage collected.
+    """
+
+    def __init__(self, key, index, chunks, model, finalizer_args):
+        self.key = key
+        self.index = index
+        self.chunks = chunks
+        self.model = model
+        self._release = weakref.finalize(self, *finalizer_args)
+
+    def release(self):
+        """Drop this handle's reference; further use of the store is undefined."""
+        self._release()
+
+class VectorStoreRegistry:
+    """
+    Process-wide cache of built vector stores, shared by all sessions.
+
+    Stores are keyed by embeddings.vector_store_key, so sessions processing the
+    same content share one index and one chunk list. A build for a key that is
+    already being built waits for that build instead of starting another, and
+    takes the build over if its builder is cancelled. When the estimated size
+    of all stores exceeds ``memory_budget``, the least recently used stores
+    without live handles are dropped, closing their memory-mapped chunks.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Args:
+            memory_budget: Target total size of cached stores, in bytes
+        """
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict()
+        # Reentrant: a handle can be garbage collected while the lock is held
+        self._lock = threading.RLock()
+
+    def acquire(self, key, build_fn, is_cancelled=None):
+        """
+        Return a handle to the store for ``key``, building it if needed.
+
+        Args:
+            key: Store key, e.g. from embeddings.vector_store_key
+            build_fn: Callable returning (index, chunks, model); only called by
+                the first of any concurrent acquirers of the same key
+            is_cancelled: Optional callable telling whether this caller's work
+                was cancelled, e.g. ``lambda: job.cancelled``. A build that fails
+                once its builder is cancelled is retried by the waiters, each
+                with its own build_fn, instead of failing them too.
+
+        Returns:
+            StoreHandle: Shared handle to the store
+
+        Raises:
+            Exception: Whatever build_fn raised, in the builder and every waiter.
+                If build_fn raised a BaseException such as KeyboardInterrupt,
+                the builder re-raises it and waiters get a RuntimeError.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                building = entry is None
+                if building:
+                    entry = _Entry(key)
+                    self._entries[key] = entry
+                else:
+                    self._entries.move_to_end(key)
+                # Counted before the build finishes so eviction cannot drop it
+                entry.refs += 1
+
+            try:
+                if building:
+                    self._build(entry, build_fn, is_cancelled)
+                index, chunks, model = entry.future.result()
+            except _BuildCancelled:
+                # Another caller's cancelled build; try again, building if no one else is
+                self._release(entry)
+                continue
+            except BaseException:
+                self._release(entry)
+                raise
+            return StoreHandle(key, index, chunks, model, (self._release, entry))
+
+    def _build(self, entry, build_fn, is_cancelled=None):
+        try:
+            index, chunks, model = build_fn()
+            entry.nbytes = store_nbytes(index, chunks)
+        except BaseException as e:
+            with self._lock:
+                # Forget the failure so the next request retries
+                if self._entries.get(entry.key) is entry:
+                    del self._entries[entry.key]
+            if isinstance(e, Exception):
+                # Work may wrap the cancellation error in its own exception type
+                if is_cancelled is not None and is_cancelled():
+                    entry.future.set_exception(_BuildCancelled(f"Build of vector store {entry.key} was cancelled"))
+                    raise
+                entry.future.set_exception(e)
+                return
+            # An interrupt (KeyboardInterrupt, Streamlit's rerun/stop) keeps
+            # unwinding the builder; waiters get an ordinary error instead
+            error = RuntimeError(f"Build of vector store {entry.key} was interrupted")
+            error.__cause__ = e
+            entry.future.set_exception(error)
+            raise
+        entry.future.set_result((index, chunks, model))
+        with self._lock:
+            self._evict()
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+            self._evict()
+
+    def _evict(self):
+        total = sum(entry.nbytes for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.memory_budget:
+                break
+            entry = self._entries[key]
+            if entry.refs > 0 or not entry.future.done():
+                continue
+            logger.info("Evicting vector store %s (%d bytes)", key, entry.nbytes)
+            del self._entries[key]
+            total -= entry.nbytes
+            _close_chunks(entry)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
@@ -0,0 +1,291 @@
+"""
+Test script for compact index storage and exact re-ranking.
+
+This script tests:
+1. fp16/sq8 storage shrinking the index, with re-ranking restoring exact results
+2. Saving a re-ranked store and memory-mapping it back
+3. choose_index_spec picking flat, HNSW, IVF or IVF-PQ by corpus size and target
+4. Falling back to a flat index when too few vectors arrive to train
+5. Training on a sample of the whole stream rather than its first batches
+6. HNSW and IVF recall@k against the exact flat index
+7. IVF-PQ results being re-ranked to exact distances even with re-ranking off
+
+Small random unit vectors stand in for embeddings, so no model download is
+needed. Run this script to verify compact indexes are working correctly.
+"""
+
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+
+import ann_index
+from ann_index import IndexBuilder, IndexFactoryError, RerankIndex, choose_index_spec, index_nbytes
+from vector_store import load_vector_store, save_vector_store
+
+def make_vectors(n, dimension=32, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def build(vectors, storage, rerank, batch_size=300):
+    builder = IndexBuilder(vectors.shape[1], len(vectors), "recall", storage, rerank)
+    for i in range(0, len(vectors), batch_size):
+        builder.add(vectors[i:i + batch_size])
+    return builder.finish()
+
+def make_clustered(n, dimension=32, clusters=100, seed=0):
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+@contextmanager
+def size_thresholds(target, flat_max, hnsw_max):
+    """Lower a target's size thresholds so small test corpora get approximate indexes."""
+    saved = dict(ann_index.SIZE_THRESHOLDS)
+    ann_index.SIZE_THRESHOLDS[target] = (flat_max, hnsw_max)
+    try:
+        yield
+    finally:
+        ann_index.SIZE_THRESHOLDS.clear()
+        ann_index.SIZE_THRESHOLDS.update(saved)
+
+def recall_at_k(found, truth):
+    return sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / truth.size
+
+def test_compact_storage_with_rerank():
+    """Test that fp16/sq8 shrink the index and re-ranking restores exact results"""
+    print("Testing compact storage...")
+
+    vectors = make_vectors(2000)
+    queries = make_vectors(50, seed=1)
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    truth_distances, truth = exact.search(queries, 3)
+
+    assert index_nbytes(build(vectors, "fp16", 0)) == vectors.nbytes // 2
+    compact = build(vectors, "sq8", 0)
+    assert index_nbytes(compact) == vectors.nbytes // 4
+    assert compact.ntotal == len(vectors)
+
+    reranked = build(vectors, "sq8", 20)
+    assert isinstance(reranked, RerankIndex)
+    distances, ids = reranked.search(queries, 3)
+    assert np.array_equal(ids, truth), "Re-ranked ids should match the exact index"
+    assert np.allclose(distances, truth_distances, atol=1e-5)
+
+    print("✅ sq8 index is a quarter of float32 and re-ranking matches exact search")
+    return True
+
+def test_rerank_index_persistence():
+    """Test that a re-ranked store is saved and memory-mapped back"""
+    print("\nTesting re-ranked store persistence...")
+
+    vectors = make_vectors(500)
+    index = build(vectors, "sq8", 10)
+    chunks = [f"chunk {i}" for i in range(len(vectors))]
+    expected = index.search(vectors[:5], 3)
+
+    with tempfile.TemporaryDirectory() as root:
+        save_vector_store(f"{root}/store", index, chunks)
+        loaded, loaded_chunks, metadata = load_vector_store(f"{root}/store")
+        assert isinstance(loaded, RerankIndex)
+        assert metadata["rerank"] == 10
+        assert isinstance(loaded.vectors, np.memmap), "Vectors should stay on disk"
+        distances, ids = loaded.search(vectors[:5], 3)
+        assert np.array_equal(ids, expected[1])
+        assert np.array_equal(distances, expected[0])
+        assert loaded_chunks[int(ids[0][0])] == "chunk 0"
+        del loaded, loaded_chunks
+
+    print("✅ Re-ranked store round-trips with memory-mapped vectors")
+    return True
+
+def test_choose_index_spec_by_size():
+    """Test that the index kind follows the corpus size thresholds of each target"""
+    print("\nTesting index selection by size...")
+
+    expected = [
+        (None, "balanced", "flat"),
+        (10_000, "balanced", "flat"),
+        (10_001, "balanced", "hnsw"),
+        (500_000, "balanced", "hnsw"),
+        (500_001, "balanced", "ivfpq"),
+        (50_000, "recall", "flat"),
+        (2_000_001, "recall", "ivf"),
+        (5_000, "latency", "hnsw"),
+        (100_001, "latency", "ivfpq"),
+    ]
+    for n_vectors, target, kind in expected:
+        spec = choose_index_spec(n_vectors, 384, target, "float32")
+        assert spec.kind == kind, f"{n_vectors} vectors for '{target}' should use {kind}, got {spec.kind}"
+
+    spec = choose_index_spec(1_000_000, 384, "balanced", "sq8")
+    assert spec.params["nlist"] == 4000 and spec.params["m"] == 96 and spec.storage == "sq8"
+    assert choose_index_spec(1_000_000, 384, "latency", "float32").params["m"] == 48
+    for target, storage in (("fastest", "float32"), ("balanced", "int4")):
+        try:
+            choose_index_spec(1000, 384, target, storage)
+            assert False, f"Expected IndexFactoryError for {target}/{storage}"
+        except IndexFactoryError:
+            pass
+
+    print(f"✅ {len(expected)} corpus sizes mapped to the expected index kinds")
+    return True
+
+def test_untrainable_corpus_falls_back_to_flat():
+    """Test that an IVF build with fewer vectors than lists becomes a flat index"""
+    print("\nTesting fallback to a flat index...")
+
+    vectors = make_vectors(100)
+    for storage, index_type in (("float32", faiss.IndexFlatL2), ("sq8", faiss.IndexScalarQuantizer)):
+        builder = IndexBuilder(vectors.shape[1], 3_000_000, "recall", storage, 0)
+        assert builder.spec.kind == "ivf" and builder.spec.params["nlist"] > len(vectors)
+        builder.add(vectors[:60])
+        builder.add(vectors[60:])
+        index = builder.finish()
+        assert builder.spec.kind == "flat" and builder.spec.storage == storage
+        assert isinstance(index, index_type), f"Expected {index_type.__name__}, got {type(index).__name__}"
+        assert index.ntotal == len(vectors)
+        _, ids = index.search(vectors[:5], 1)
+        assert ids[:, 0].tolist() == list(range(5)), "The fallback index should find each vector itself"
+
+    empty = IndexBuilder(32, 3_000_000, "recall", "float32", 0).finish()
+    assert empty.ntotal == 0
+
+    print(f"✅ {len(vectors)} vectors for {builder.spec.kind} fell back to a flat index")
+    return True
+
+def test_training_sample_covers_whole_stream():
+    """Test that training samples the whole stream, not just its first batches"""
+    print("\nTesting reservoir-sampled training...")
+
+    # Crawl order groups sections: small values arrive first, large ones last
+    rng = np.random.default_rng(0)
+    n = 3 * ann_index.SQ_TRAIN_SAMPLE
+    vectors = rng.random((n, 8), dtype=np.float32)
+    vectors[n // 2:] *= 10
+
+    builder = IndexBuilder(8, None, "balanced", "sq8", 0)
+    assert builder.spec.kind == "flat" and builder.spec.needs_training
+    for i in range(0, n, 1000):
+        builder.add(vectors[i:i + 1000])
+    late_share = (builder._sample.vectors.max(axis=1) > 1).mean()
+    index = builder.finish()
+
+    assert 0.45 < late_share < 0.55, f"About half the sample should come from the late half, got {late_share:.2f}"
+    assert index.ntotal == n
+    error = np.abs(index.reconstruct_n(0, n) - vectors).max()
+    assert error < 0.1, f"Late vectors should not be clipped to early value ranges, max error {error:.2f}"
+
+    print(f"✅ {late_share:.0%} of the training sample came from the last half of the stream")
+    return True
+
+def test_approximate_recall():
+    """Test that HNSW and IVF recall@k stays close to the exact flat index"""
+    print("\nTesting approximate index recall...")
+
+    vectors = make_clustered(30_200)
+    vectors, queries = vectors[:30_000], vectors[30_000:]
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, 10)
+
+    recalls = {}
+    for target, kind in (("balanced", "hnsw"), ("recall", "ivf")):
+        with size_thresholds(target, 1_000, 10_000 if kind == "ivf" else 100_000):
+            builder = IndexBuilder(vectors.shape[1], len(vectors), target, "float32", 0)
+            # Sorted order stands in for a crawl that visits one section at a time
+            ordered = np.argsort(vectors[:, 0])
+            for i in range(0, len(vectors), 3000):
+                builder.add(vectors[ordered[i:i + 3000]])
+            index = builder.finish()
+        assert builder.spec.kind == kind and index.ntotal == len(vectors)
+        _, found = index.search(queries, 10)
+        recalls[kind] = recall_at_k(ordered[found], truth)
+        assert recalls[kind] >= 0.95, f"{kind} recall@10 is {recalls[kind]:.3f}, expected at least 0.95"
+
+    print("✅ recall@10 against flat: " + ", ".join(f"{kind} {recall:.3f}" for kind, recall in recalls.items()))
+    return True
+
+def test_pq_results_are_exact():
+    """Test that IVF-PQ builds re-rank to exact distances even with re-ranking off"""
+    print("\nTesting IVF-PQ re-ranking...")
+
+    # 106 = 2 x 53 allows only two sub-quantizers: quick to train, and coarse PQ
+    # distances; a 6-dimensional latent space keeps the true neighbours distinct
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((30_200, 6)).astype(np.float32) @ rng.standard_normal((6, 106)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors, queries = vectors[:30_000], vectors[30_000:]
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, 3)
+
+    with size_thresholds("latency", 1_000, 10_000):
+        builder = IndexBuilder(vectors.shape[1], len(vectors), "latency", "float32", 0)
+        for i in range(0, len(vectors), 3000):
+            builder.add(vectors[i:i + 3000])
+        index = builder.finish()
+
+    assert builder.spec.kind == "ivfpq" and isinstance(index, RerankIndex), "IVF-PQ should always be re-ranked"
+    assert index.candidates == ann_index.PQ_RERANK
+    distances, ids = index.search(queries, 3)
+    pq_recall = recall_at_k(index.index.search(queries, 3)[1], truth)
+    recall = recall_at_k(ids, truth)
+    exact_distances = ((vectors[ids] - queries[:, None, :]) ** 2).sum(axis=2)
+    assert np.allclose(distances, exact_distances, atol=1e-5), "Returned distances should be exact L2 distances"
+    assert recall >= 0.95 and recall > pq_recall, f"Re-ranked recall@3 {recall:.3f}, PQ alone {pq_recall:.3f}"
+
+    print(f"✅ IVF-PQ recall@3 {pq_recall:.3f} alone, {recall:.3f} re-ranked with exact distances")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running ANN Index Tests")
+    print("=" * 60)
+
+    tests = [
+        test_compact_storage_with_rerank,
+        test_rerank_index_persistence,
+        test_choose_index_spec_by_size,
+        test_untrainable_corpus_falls_back_to_flat,
+        test_training_sample_covers_whole_stream,
+        test_approximate_recall,
+        test_pq_results_are_exact,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The compact index storage is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,146 @@
+"""
+Test script for the semantic answer cache.
+
+This script tests:
+1. Exact matches, paraphrase matches and per-site separation
+2. Size eviction, TTL expiry and per-site invalidation
+3. Invalidating a site dropping answers cached for combined multi-site keys
+4. Expired nearest answers not hiding valid paraphrase hits
+
+Question embeddings are hand-made vectors, so no model is needed.
+Run this script to verify the answer cache is working correctly.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from answer_cache import AnswerCache
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_exact_and_similar_hits():
+    """Test exact matches, paraphrase matches and per-site separation"""
+    print("Testing exact and similar hits...")
+
+    cache = AnswerCache(similarity_threshold=0.95)
+    cache.put("site-a", "What does the chatbot do?", unit(1, 0, 0), "It answers questions.", [3, 1])
+
+    hit = cache.get("site-a", "  what does the CHATBOT do ")
+    assert hit is not None and hit.answer == "It answers questions.", "Normalized question should hit"
+    assert hit.source_ids == [3, 1]
+
+    assert cache.get_similar("site-a", unit(1, 0.1, 0)) is not None, "Near-duplicate should hit"
+    assert cache.get_similar("site-a", unit(0, 1, 0)) is None, "Unrelated question should miss"
+    assert cache.get("site-b", "What does the chatbot do?") is None, "Other sites should not share answers"
+    assert cache.get_similar("site-b", unit(1, 0, 0)) is None
+
+    print(f"✅ {cache.hits} hits, {cache.misses} misses")
+    return True
+
+def test_eviction_and_invalidation():
+    """Test size eviction, TTL expiry and per-site invalidation"""
+    print("\nTesting eviction and invalidation...")
+
+    cache = AnswerCache(max_entries=2)
+    cache.put("site", "first", unit(1, 0, 0), "1", [])
+    cache.put("site", "second", unit(0, 1, 0), "2", [])
+    cache.get("site", "first")
+    cache.put("site", "third", unit(0, 0, 1), "3", [])
+    assert cache.get("site", "second") is None, "Least recently used answer should be evicted"
+    assert cache.get_similar("site", unit(0, 1, 0)) is None, "Evicted answer should leave the similarity index"
+    assert cache.get("site", "first") is not None
+
+    cache.invalidate("site")
+    assert len(cache) == 0, "Invalidation should drop every answer for the site"
+    assert cache.get_similar("site", unit(1, 0, 0)) is None
+
+    cache = AnswerCache(ttl=0.05)
+    cache.put("site", "question", unit(1, 0, 0), "answer", [])
+    time.sleep(0.1)
+    assert cache.get("site", "question") is None, "Expired answer should not be served"
+    assert len(cache) == 0
+
+    print("✅ Eviction, expiry and invalidation work")
+    return True
+
+def test_combined_key_invalidation():
+    """Test that invalidating one store drops answers cached for corpora that include it"""
+    print("\nTesting combined key invalidation...")
+
+    cache = AnswerCache()
+    cache.put("docs+blog", "question", unit(1, 0, 0), "combined", [], store_keys=["docs", "blog"])
+    cache.put("blog+news", "question", unit(1, 0, 0), "other", [], store_keys=["blog", "news"])
+    cache.put("docs", "question", unit(1, 0, 0), "docs only", [])
+
+    cache.invalidate("docs")
+    assert cache.get("docs", "question") is None
+    assert cache.get("docs+blog", "question") is None, "A combined key including the site should be dropped"
+    assert cache.get_similar("docs+blog", unit(1, 0, 0)) is None
+    assert cache.get("blog+news", "question").answer == "other", "Combined keys without the site should stay"
+
+    cache.invalidate("news")
+    assert len(cache) == 0 and not cache._dependents, "Dependencies of dropped answers should be forgotten"
+
+    print("✅ Combined keys invalidated with their sites")
+    return True
+
+def test_expired_neighbour_does_not_hide_hits():
+    """Test that an expired nearest question is removed and a slightly further valid one still hits"""
+    print("\nTesting expired neighbours...")
+
+    cache = AnswerCache(ttl=60, similarity_threshold=0.9)
+    cache.put("site", "old question", unit(1, 0, 0), "old", [])
+    cache.put("site", "new question", unit(1, 0.2, 0), "new", [])
+    cache._entries[("site", "old question")].stored_at -= 120
+
+    hit = cache.get_similar("site", unit(1, 0.02, 0))
+    assert hit is not None and hit.answer == "new", "The valid paraphrase behind an expired one should hit"
+    assert cache._sites["site"].index.ntotal == 1, "The expired answer should leave the similarity index"
+
+    print("✅ Expired neighbour skipped")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Answer Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_exact_and_similar_hits,
+        test_eviction_and_invalidation,
+        test_combined_key_invalidation,
+        test_expired_neighbour_does_not_hide_hits,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The answer cache is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
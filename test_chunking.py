@@ -0,0 +1,136 @@
+"""
+Test script for the token-aware chunker.
+
+This script tests:
+1. Chunk offsets pointing back into the source text
+2. Token limits being respected
+3. Overlap between consecutive chunks
+4. Splitting of sentences longer than the token limit
+5. Lazy generation
+
+A whitespace token counter stands in for the real tokenizer, so no model
+download is needed. Run this script to verify the chunker is working correctly.
+"""
+
+import sys
+
+from chunking import iter_chunks, ChunkerError
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+def make_text(sentences=40):
+    return " ".join(f"Sentence number {i} has exactly seven words." for i in range(sentences))
+
+def test_offsets_and_limits():
+    """Test that chunk offsets and token counts are exact."""
+    print("Testing chunk offsets and token limits...")
+
+    text = "  " + make_text() + "\n\nA final paragraph. "
+    chunks = list(iter_chunks(text, max_tokens=30, overlap_tokens=7, token_counter=count_words))
+
+    assert len(chunks) > 1, "Text should be split into several chunks"
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text, "Offsets should slice the chunk text"
+        assert chunk.tokens == len(chunk.text.split()), "Token count should match the counter"
+        assert chunk.tokens <= 30, "Chunks should respect max_tokens"
+        assert chunk.text.endswith("."), "Chunks should end on a sentence boundary"
+    assert chunks[-1].text.endswith("A final paragraph."), "Last paragraph should be included"
+
+    print("✅ Offsets and limits test passed!")
+    return True
+
+def test_overlap():
+    """Test that consecutive chunks share trailing sentences."""
+    print("\nTesting chunk overlap...")
+
+    text = make_text()
+    with_overlap = list(iter_chunks(text, max_tokens=30, overlap_tokens=7, token_counter=count_words))
+    without_overlap = list(iter_chunks(text, max_tokens=30, overlap_tokens=0, token_counter=count_words))
+
+    for previous, current in zip(with_overlap, with_overlap[1:]):
+        assert current.start < previous.end, "Chunks should overlap"
+        assert previous.end - current.start <= len("Sentence number 10 has exactly seven words."), "Overlap should stay within overlap_tokens"
+    for previous, current in zip(without_overlap, without_overlap[1:]):
+        assert current.start > previous.end, "Chunks should not overlap when overlap_tokens is 0"
+
+    print("✅ Overlap test passed!")
+    return True
+
+def test_oversized_sentence():
+    """Test that a sentence longer than the limit is split at word boundaries."""
+    print("\nTesting oversized sentence splitting...")
+
+    text = " ".join(f"word{i}" for i in range(95)) + ". Short tail."
+    chunks = list(iter_chunks(text, max_tokens=20, overlap_tokens=0, token_counter=count_words))
+
+    assert all(chunk.tokens <= 20 for chunk in chunks), "Split pieces should fit the limit"
+    assert " ".join(chunk.text for chunk in chunks).split() == text.split(), "No words should be lost"
+
+    print("✅ Oversized sentence test passed!")
+    return True
+
+def test_lazy_and_validation():
+    """Test that chunks are produced lazily and parameters are validated."""
+    print("\nTesting lazy generation and validation...")
+
+    calls = []
+
+    def counting(texts):
+        calls.append(len(texts))
+        return count_words(texts)
+
+    chunks = iter_chunks(make_text(2000), max_tokens=30, overlap_tokens=0, token_counter=counting)
+    next(chunks)
+    assert sum(calls) < 2000, "Only a prefix of the text should be tokenized for the first chunk"
+
+    for max_tokens, overlap in [(0, 0), (10, 10), (10, -1)]:
+        try:
+            next(iter_chunks("text", max_tokens=max_tokens, overlap_tokens=overlap, token_counter=count_words))
+            assert False, "Invalid parameters should raise ChunkerError"
+        except ChunkerError:
+            pass
+
+    print("✅ Lazy generation and validation test passed!")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Chunking Tests")
+    print("=" * 60)
+
+    tests = [
+        test_offsets_and_limits,
+        test_overlap,
+        test_oversized_sentence,
+        test_lazy_and_validation
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The chunker is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,93 @@
+"""
+Test script for token-budgeted context packing.
+
+This script tests:
+1. Sentences shared by overlapping chunks appearing once
+2. The token budget being respected, relevant chunks preferred and the question kept
+
+A whitespace token counter stands in for the flan-t5 tokenizer, so no model
+download is needed. Run this script to verify context packing is working correctly.
+"""
+
+import sys
+
+from context_packing import pack_context
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+def sentences(start, stop):
+    return " ".join(f"Fact number {i} is here." for i in range(start, stop))
+
+def test_overlap_is_deduplicated():
+    """Test that sentences shared by overlapping chunks appear once"""
+    print("Testing overlap deduplication...")
+
+    chunks = [sentences(0, 6), sentences(4, 10)]
+    packed = pack_context(chunks, "Which facts exist?", source_ids=[7, 2], token_counter=count_words)
+
+    for i in range(10):
+        assert packed.context.count(f"Fact number {i} is") == 1, f"Fact {i} should appear exactly once"
+    assert packed.duplicate_sentences == 2
+    assert packed.source_ids == [7, 2]
+    assert packed.tokens == count_words([packed.prompt])[0] + 1
+
+    print(f"✅ {packed.duplicate_sentences} duplicate sentences removed, {packed.tokens} tokens used")
+    return True
+
+def test_budget_keeps_question():
+    """Test that packing respects the budget, prefers relevant chunks and keeps the question"""
+    print("\nTesting token budget...")
+
+    question = "What is the final question?"
+    chunks = [sentences(0, 20), sentences(100, 120)]
+    packed = pack_context(chunks, question, max_tokens=80, token_counter=count_words)
+
+    assert packed.tokens <= 80, f"Prompt uses {packed.tokens} tokens"
+    assert packed.prompt.rstrip().endswith("Answer:") and question in packed.prompt, "Question must survive"
+    assert "Fact number 0 is" in packed.context, "Most relevant chunk should be packed first"
+    assert "Fact number 100 is" not in packed.context, "Less relevant chunk should not fit"
+    assert packed.source_ids == [0]
+    assert packed.dropped_sentences > 0
+
+    print(f"✅ {packed.tokens}/80 tokens, {packed.dropped_sentences} sentences dropped")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Context Packing Tests")
+    print("=" * 60)
+
+    tests = [
+        test_overlap_is_deduplicated,
+        test_budget_keeps_question,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Context packing is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
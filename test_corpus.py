@@ -0,0 +1,155 @@
+"""
+Test script for the sharded multi-site corpus.
+
+This script tests:
+1. Parallel shard search matching one index over all sites
+2. Searching a subset of sites, replacing a site and removing one
+3. Cached sources resolving in another session that labels the same store differently
+
+Shards are small flat FAISS indexes over random vectors, so no model is
+needed. Run this script to verify the corpus is working correctly.
+"""
+
+import sys
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+
+from answer_cache import AnswerCache
+from corpus import CorpusError, ShardedCorpus
+
+def make_store(key, vectors):
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    chunks = [f"{key} chunk {i}" for i in range(len(vectors))]
+    return SimpleNamespace(key=key, index=index, chunks=chunks, model=None)
+
+def make_vectors(n, seed, dimension=16):
+    return np.random.default_rng(seed).standard_normal((n, dimension)).astype(np.float32)
+
+def test_search_merges_shards():
+    """Test that parallel shard search returns the same top-k as one index over all sites"""
+    print("Testing merged shard search...")
+
+    sites = {f"https://site{i}.example": make_vectors(200 + 50 * i, seed=i) for i in range(4)}
+    corpus = ShardedCorpus()
+    for site, vectors in sites.items():
+        corpus.add(site, make_store(site, vectors))
+
+    union = np.vstack(list(sites.values()))
+    owners = [(site, i) for site, vectors in sites.items() for i in range(len(vectors))]
+    exact = faiss.IndexFlatL2(union.shape[1])
+    exact.add(union)
+
+    for query in make_vectors(20, seed=99):
+        hits = corpus.search(query, k=5)
+        distances, ids = exact.search(query.reshape(1, -1), 5)
+        assert [hit.source for hit in hits] == [owners[i] for i in ids[0]]
+        assert np.allclose([hit.distance for hit in hits], distances[0], atol=1e-4)
+
+    hit = hits[0]
+    assert corpus.chunk(hit.source) == f"{hit.site} chunk {hit.chunk_id}"
+    assert corpus.source_site(hit.source) == hit.site
+    assert corpus.chunk_count() == len(union)
+
+    print(f"✅ Top-5 across {len(corpus)} shards matches a single index")
+    return True
+
+def test_site_filter_and_replacement():
+    """Test searching a subset of sites, replacing a site and removing one"""
+    print("\nTesting site filter...")
+
+    corpus = ShardedCorpus()
+    corpus.add("docs", make_store("docs-v1", make_vectors(100, seed=1)))
+    corpus.add("blog", make_store("blog-v1", make_vectors(100, seed=2)))
+    query = make_vectors(1, seed=3)[0]
+
+    assert {hit.site for hit in corpus.search(query, k=10, sites=["blog"])} == {"blog"}
+    assert corpus.key(["docs"]) == "docs-v1"
+    assert corpus.key() == corpus.key(["blog", "docs"]) != corpus.key(["docs"])
+    assert corpus.store_keys() == ["blog-v1", "docs-v1"]
+
+    previous = corpus.add("docs", make_store("docs-v2", make_vectors(100, seed=4)))
+    assert previous.key == "docs-v1" and corpus.sites == ["blog", "docs"]
+    assert corpus.remove("blog").key == "blog-v1"
+    assert {hit.site for hit in corpus.search(query, k=10)} == {"docs"}
+
+    try:
+        corpus.search(query, sites=["blog"])
+        assert False, "Expected CorpusError"
+    except CorpusError:
+        pass
+
+    print("✅ Filtered, replaced and removed sites")
+    return True
+
+def test_cached_sources_across_sessions():
+    """Test that sources cached by one session resolve in a session with other site labels"""
+    print("\nTesting cached sources across sessions...")
+
+    store = make_store("example-v1", make_vectors(100, seed=5))
+    first, second = ShardedCorpus(), ShardedCorpus()
+    first.add("http://example.com", store)
+    second.add("https://example.com/", store)
+    cache = AnswerCache()
+    query = make_vectors(1, seed=6)[0]
+
+    hits = first.search(query, k=3)
+    cache.put(first.key(), "What is on the site?", query, "Things.", [hit.source for hit in hits], first.store_keys())
+
+    assert second.key() == first.key(), "The same store should share cached answers"
+    cached = cache.get(second.key(), "what is on the site")
+    assert cached is not None
+    assert [second.chunk(source) for source in cached.source_ids] == [first.chunk(hit.source) for hit in hits]
+    assert {second.source_site(source) for source in cached.source_ids} == {"https://example.com/"}
+
+    second.remove("https://example.com/")
+    try:
+        second.chunk(cached.source_ids[0])
+        assert False, "Expected CorpusError"
+    except CorpusError:
+        pass
+
+    print(f"✅ {len(cached.source_ids)} cached sources resolved under another site label")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Corpus Tests")
+    print("=" * 60)
+
+    tests = [
+        test_search_merges_shards,
+        test_site_filter_and_replacement,
+        test_cached_sources_across_sessions,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The sharded corpus is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,212 @@
+"""
+Test script for the persistent embedding cache.
+
+This script tests:
+1. Bulk lookups returning cached rows and a hit mask, with hit/miss counts
+2. encode_chunks encoding only the cache misses
+3. Reopening the cache from disk, including after a torn append
+4. Compaction dropping least recently used rows once over max_bytes
+5. Finishing a compaction interrupted before its files were swapped in
+
+A small deterministic fake encoder stands in for all-MiniLM-L6-v2, so no model
+download is needed. Run this script to verify the embedding cache is working correctly.
+"""
+
+import os
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+import embeddings
+from embedding_cache import COMPACT_FILE, COMPACT_SUFFIX, KEYS_FILE, VECTORS_FILE, EmbeddingCache
+
+DIMENSION = 8
+
+class FakeModel:
+    """Embeds a text from its hash; records which texts were encoded."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([vector_for(text) for text in texts], dtype=np.float32)
+
+def vector_for(text):
+    return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(DIMENSION).astype(np.float32)
+
+def texts(start, stop):
+    return [f"chunk number {i} of the site" for i in range(start, stop)]
+
+def test_bulk_lookup_and_counts():
+    """Test that a bulk lookup fills in cached rows, reports a hit mask and counts hits"""
+    print("Testing bulk lookup...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("model", directory, dtype="float32")
+        vectors, found = cache.lookup(texts(0, 3))
+        assert vectors is None and not found.any(), "An empty cache should miss everything"
+
+        cache.add(texts(0, 3), [vector_for(text) for text in texts(0, 3)])
+        cache.add(texts(0, 1), [vector_for(texts(0, 1)[0])])
+        assert len(cache) == 3, "Texts already cached should not be appended again"
+
+        query = texts(2, 5)
+        vectors, found = cache.lookup(query)
+        assert found.tolist() == [True, False, False]
+        assert np.array_equal(vectors[0], vector_for(query[0])), "Hits should return the stored vector"
+        assert not vectors[1:].any(), "Misses should be zero rows"
+        assert (cache.hits, cache.misses) == (1, 5)
+
+    print(f"✅ {cache.hits} hit and {cache.misses} misses counted")
+    return True
+
+def test_encode_chunks_encodes_misses_only():
+    """Test that encode_chunks reuses cached rows and encodes only the rest"""
+    print("\nTesting miss-only encoding...")
+
+    model = FakeModel()
+    embeddings._model = model
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = EmbeddingCache("model", directory)
+            first, hits = embeddings.encode_chunks(texts(0, 4), cache)
+            assert hits == 0 and model.encoded == texts(0, 4)
+
+            model.encoded = []
+            second, hits = embeddings.encode_chunks(texts(2, 6), cache)
+    finally:
+        embeddings._model = None
+
+    assert hits == 2 and model.encoded == texts(4, 6), "Only the two new chunks should be encoded"
+    assert second.dtype == np.float32 and second.shape == (4, DIMENSION)
+    # Hits come back from float16 storage, so they are close to but not exactly the fresh vectors
+    assert np.allclose(second[:2], first[2:], atol=1e-2)
+    assert not np.array_equal(second[:2], first[2:]), "float16 storage should round cached vectors"
+    assert np.array_equal(second[2:], np.array([vector_for(text) for text in texts(4, 6)]))
+
+    print("✅ 2 of 4 chunks encoded, 2 read from the cache")
+    return True
+
+def test_reopen_from_disk():
+    """Test that a reopened cache serves earlier rows and drops a torn append"""
+    print("\nTesting reopening from disk...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("org/model name", directory, dtype="float32")
+        cache.add(texts(0, 5), [vector_for(text) for text in texts(0, 5)])
+        # A crash after the vectors but before the keys leaves an extra half-written row
+        with open(os.path.join(cache.directory, VECTORS_FILE), "ab") as f:
+            f.write(b"\0" * 10)
+
+        reopened = EmbeddingCache("org/model name", directory, dtype="float16")
+        vectors, found = reopened.lookup(texts(0, 5))
+        assert found.all() and len(reopened) == 5
+        assert reopened.dtype == np.float32, "The stored dtype should win over the argument"
+        assert np.array_equal(vectors, np.array([vector_for(text) for text in texts(0, 5)]))
+
+        reopened.add(texts(5, 6), [vector_for(texts(5, 6)[0])])
+        vectors, found = EmbeddingCache("org/model name", directory).lookup(texts(0, 6))
+        assert found.all(), "Appends after a torn tail should stay row-aligned"
+
+    print("✅ Reopened cache served all rows")
+    return True
+
+def test_compaction_keeps_recent_rows():
+    """Test that growing past max_bytes drops the least recently used rows"""
+    print("\nTesting compaction...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        row_bytes = 16 + DIMENSION * 2
+        cache = EmbeddingCache("model", directory, max_bytes=10 * row_bytes)
+        cache.add(texts(0, 8), [vector_for(text) for text in texts(0, 8)])
+        # Rows 0 and 1 are used again, so they outlive rows 2-7
+        cache.lookup(texts(0, 2))
+        cache.add(texts(8, 11), [vector_for(text) for text in texts(8, 11)])
+
+        assert len(cache) == 7, "A compaction should keep 75% of max_bytes"
+        assert cache.nbytes <= cache.max_bytes
+        assert os.path.getsize(os.path.join(cache.directory, KEYS_FILE)) == 7 * 16
+        _, found = cache.lookup(texts(0, 11))
+        assert found.tolist() == [True, True] + [False] * 4 + [True] * 5, "Least recently used rows should go"
+
+        vectors, found = EmbeddingCache("model", directory).lookup(texts(8, 11))
+        assert found.all() and np.allclose(vectors, [vector_for(text) for text in texts(8, 11)], atol=1e-2)
+        assert cache.compact(0) == 7 and len(cache) == 0
+
+    print("✅ Compaction kept the 7 most recently used rows")
+    return True
+
+def test_interrupted_compaction():
+    """Test that a committed compaction is finished on open and an uncommitted one discarded"""
+    print("\nTesting interrupted compaction...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("model", directory, dtype="float32")
+        cache.add(texts(0, 4), [vector_for(text) for text in texts(0, 4)])
+        keep = texts(2, 4)
+
+        # Uncommitted: partial files without the marker are thrown away
+        with open(os.path.join(cache.directory, KEYS_FILE + COMPACT_SUFFIX), "wb") as f:
+            f.write(b"partial")
+        assert len(EmbeddingCache("model", directory)) == 4
+        assert not os.path.exists(os.path.join(cache.directory, KEYS_FILE + COMPACT_SUFFIX))
+
+        # Committed, crashed after swapping the vectors but before the keys
+        with open(os.path.join(cache.directory, KEYS_FILE + COMPACT_SUFFIX), "wb") as f:
+            f.write(b"".join(EmbeddingCache._digest(text) for text in keep))
+        np.array([vector_for(text) for text in keep], dtype=np.float32).tofile(os.path.join(cache.directory, VECTORS_FILE))
+        open(os.path.join(cache.directory, COMPACT_FILE), "w").close()
+
+        reopened = EmbeddingCache("model", directory)
+        vectors, found = reopened.lookup(texts(0, 4))
+        assert found.tolist() == [False, False, True, True], "The committed compaction should be completed"
+        assert np.array_equal(vectors[2:], np.array([vector_for(text) for text in keep]))
+        assert not os.path.exists(os.path.join(cache.directory, COMPACT_FILE))
+
+    print("✅ Interrupted compactions recovered")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Embedding Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_bulk_lookup_and_counts,
+        test_encode_chunks_encodes_misses_only,
+        test_reopen_from_disk,
+        test_compaction_keeps_recent_rows,
+        test_interrupted_compaction,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The embedding cache is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,106 @@
+"""
+Test script for the multi-process embedding engine.
+
+This script tests:
+1. Length-sorted batches coming back in input order through shared memory
+2. A failing batch raising while the engine keeps working
+
+Workers load a small deterministic fake model, so no model download is
+needed. Run this script to verify the embedding engine is working correctly.
+"""
+
+import sys
+
+import numpy as np
+
+from embedding_engine import EmbeddingEngine, EmbeddingEngineError
+
+class FakeModel:
+    """Embeds a text as (length, character sum, word count); fails on "boom"."""
+
+    def encode(self, texts, batch_size=32):
+        if "boom" in texts:
+            raise ValueError("cannot encode boom")
+        return np.array([fake_embedding(text) for text in texts], dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+def fake_embedding(text):
+    return [len(text), sum(map(ord, text)) % 1000, len(text.split())]
+
+def load_fake_model(model_name):
+    return FakeModel()
+
+def test_embeddings_keep_input_order():
+    """Test that length-sorted batches come back in input order through shared memory"""
+    print("Testing embeddings keep input order...")
+
+    texts = [("word " * (i % 17 + 1)) + str(i) for i in range(500)]
+    with EmbeddingEngine("fake", workers=2, batch_size=16, load_model=load_fake_model) as engine:
+        embeddings = engine.encode(texts)
+        empty = engine.encode([])
+
+    expected = np.array([fake_embedding(text) for text in texts], dtype=np.float32)
+    assert embeddings.dtype == np.float32
+    assert np.array_equal(embeddings, expected), "Embeddings should be returned in input order"
+    assert empty.shape == (0, 3)
+
+    print(f"✅ {len(texts)} texts encoded by 2 workers in input order")
+    return True
+
+def test_worker_errors_are_raised():
+    """Test that a failing batch raises and the engine keeps working"""
+    print("\nTesting worker errors...")
+
+    with EmbeddingEngine("fake", workers=2, batch_size=4, load_model=load_fake_model) as engine:
+        try:
+            engine.encode(["fine text"] * 10 + ["boom"])
+            assert False, "Expected EmbeddingEngineError"
+        except EmbeddingEngineError as e:
+            assert "boom" in str(e)
+        embeddings = engine.encode(["still works"])
+
+    assert embeddings[0][0] == len("still works")
+
+    print("✅ Worker error raised and the engine recovered")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Embedding Engine Tests")
+    print("=" * 60)
+
+    tests = [
+        test_embeddings_keep_input_order,
+        test_worker_errors_are_raised,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The embedding engine is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,132 @@
+"""
+Test script for streamed vector store creation.
+
+This script tests:
+1. Chunk batches being full-sized and in document order, with no chunk spanning two documents
+2. Progress callbacks reporting the chunks done and a rising fraction ending at 1.0
+3. Batched builds matching a one-shot build of the same text
+
+The fake model and whitespace token counter from test_helpers stand in for
+all-MiniLM-L6-v2, so no model download is needed. Run this script to verify
+streamed vector store creation is working correctly.
+"""
+
+import sys
+
+import numpy as np
+
+from chunking import iter_chunks
+from embeddings import CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, create_vector_store, iter_chunk_batches
+from test_helpers import count_words, fake_model, make_page
+
+def expected_chunks(pages):
+    """Chunk each page on its own, keeping the chunks create_vector_store keeps."""
+    return [
+        [chunk.text for chunk in iter_chunks(page, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, count_words) if len(chunk.text) > 100]
+        for page in pages
+    ]
+
+def test_batch_boundaries():
+    """Test that batches are full-sized, ordered and chunked one document at a time"""
+    print("Testing chunk batch boundaries...")
+
+    pages = [make_page(i, sentences) for i, sentences in enumerate((60, 20, 90))]
+    per_page = expected_chunks(pages)
+    with fake_model():
+        batches = list(iter_chunk_batches(pages, batch_size=4))
+        unsized = list(iter_chunk_batches(iter(pages), batch_size=4))
+
+    chunks = [chunk for batch, _ in batches for chunk in batch]
+    assert chunks == [chunk for page in per_page for chunk in page], "Batches should concatenate to every page's chunks"
+    assert all(len(batch) == 4 for batch, _ in batches[:-1]), "Only the last batch may be short"
+    assert 0 < len(batches[-1][0]) <= 4
+
+    fractions = [fraction for _, fraction in batches]
+    assert all(0 < a <= b <= 1 for a, b in zip(fractions, fractions[1:])), f"Fractions should rise: {fractions}"
+    assert fractions[-1] == 1.0
+    assert [batch for batch, _ in unsized] == [batch for batch, _ in batches]
+    assert all(fraction is None for _, fraction in unsized), "An unsized input has no progress fraction"
+
+    print(f"✅ {len(chunks)} chunks from {len(pages)} pages streamed in {len(batches)} batches")
+    return True
+
+def test_progress_callback():
+    """Test that progress reports the chunks done after each encoded batch"""
+    print("\nTesting progress callbacks...")
+
+    pages = [make_page(i) for i in range(4)]
+    total = sum(len(page) for page in expected_chunks(pages))
+    progress = []
+    with fake_model() as model:
+        _, chunks, _ = create_vector_store(pages, batch_size=5, progress_callback=lambda done, fraction: progress.append((done, fraction)))
+
+    done = [count for count, _ in progress]
+    assert len(chunks) == total
+    assert done == list(range(5, total, 5)) + [total], f"Unexpected chunk counts: {done}"
+    assert model.batches == [b - a for a, b in zip([0] + done, done)], "Each batch should be encoded once"
+    fractions = [fraction for _, fraction in progress]
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+    print(f"✅ {len(progress)} progress updates for {total} chunks")
+    return True
+
+def test_batched_build_matches_one_shot():
+    """Test that a build in small batches equals encoding and indexing everything at once"""
+    print("\nTesting batched against one-shot builds...")
+
+    pages = [make_page(i) for i in range(4)]
+    with fake_model() as model:
+        one_shot, one_shot_chunks, _ = create_vector_store(pages, batch_size=10_000)
+        assert len(model.batches) == 1
+        batched, batched_chunks, _ = create_vector_store(pages, batch_size=3)
+        queries = model.encode(one_shot_chunks[:5])
+
+    assert batched_chunks == one_shot_chunks
+    assert batched.ntotal == one_shot.ntotal == len(one_shot_chunks)
+    assert np.array_equal(batched.reconstruct_n(0, batched.ntotal), one_shot.reconstruct_n(0, one_shot.ntotal))
+    distances, ids = batched.search(queries, 3)
+    expected_distances, expected_ids = one_shot.search(queries, 3)
+    assert np.array_equal(ids, expected_ids) and np.array_equal(distances, expected_distances)
+
+    print(f"✅ {len(batched_chunks)} chunks indexed identically in batches of 3 and in one batch")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Streamed Vector Store Tests")
+    print("=" * 60)
+
+    tests = [
+        test_batch_boundaries,
+        test_progress_callback,
+        test_batched_build_matches_one_shot,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Streamed vector store creation is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
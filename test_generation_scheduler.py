@@ -0,0 +1,148 @@
+"""
+Test script for the cross-session generation scheduler.
+
+This script tests:
+1. Concurrent prompts sharing batches, each caller getting its own answer
+2. A lone prompt waiting at most about max_wait_ms for companions
+3. A failed batch failing each of its futures while the scheduler keeps running
+
+A fake batch generation function is used, so no model is loaded.
+Run this script to verify the scheduler is working correctly.
+"""
+
+import sys
+import threading
+import time
+
+from generation_scheduler import GenerationScheduler, SchedulerClosedError
+
+class FakeGenerator:
+    """Records every batch and answers each prompt with its upper-cased text."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self, prompts):
+        self.batches.append(list(prompts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("generation failed")
+        return [prompt.upper() for prompt in prompts]
+
+def ask_concurrently(scheduler, prompts):
+    results = {}
+    barrier = threading.Barrier(len(prompts))
+
+    def ask(prompt):
+        barrier.wait()
+        results[prompt] = scheduler.generate(prompt, timeout=5)
+
+    threads = [threading.Thread(target=ask, args=(prompt,)) for prompt in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_prompts_are_batched():
+    """Test that concurrent prompts share batches and each caller gets its own answer"""
+    print("Testing concurrent prompts are batched...")
+
+    generator = FakeGenerator(delay=0.05)
+    scheduler = GenerationScheduler(generator, max_batch_size=4, max_wait_ms=50)
+    prompts = [f"question {i}" for i in range(8)]
+    results = ask_concurrently(scheduler, prompts)
+    scheduler.close()
+
+    assert results == {prompt: prompt.upper() for prompt in prompts}, "Answers were routed to the wrong callers"
+    assert max(len(batch) for batch in generator.batches) > 1, "Expected prompts to be batched"
+    assert all(len(batch) <= 4 for batch in generator.batches), "Batch size cap was exceeded"
+    assert scheduler.prompts == 8
+
+    print(f"✅ 8 prompts answered in {len(generator.batches)} batches")
+    return True
+
+def test_single_prompt_latency_is_bounded():
+    """Test that a lone prompt waits at most about max_wait_ms for companions"""
+    print("\nTesting single prompt latency...")
+
+    scheduler = GenerationScheduler(FakeGenerator(), max_batch_size=8, max_wait_ms=30)
+    start = time.perf_counter()
+    answer = scheduler.generate("hello", timeout=5)
+    elapsed = time.perf_counter() - start
+    scheduler.close()
+
+    assert answer == "HELLO"
+    assert elapsed < 0.5, f"Single prompt took {elapsed:.3f}s"
+
+    print(f"✅ Single prompt answered in {elapsed * 1000:.0f} ms")
+    return True
+
+def test_errors_reach_every_caller():
+    """Test that a failed batch fails each of its futures and the scheduler keeps running"""
+    print("\nTesting error propagation...")
+
+    generator = FakeGenerator(fail=True)
+    scheduler = GenerationScheduler(generator, max_batch_size=4, max_wait_ms=50)
+    futures = [scheduler.submit(f"question {i}") for i in range(3)]
+    for future in futures:
+        try:
+            future.result(timeout=5)
+            assert False, "Expected RuntimeError"
+        except RuntimeError:
+            pass
+
+    generator.fail = False
+    assert scheduler.generate("again", timeout=5) == "AGAIN"
+    scheduler.close()
+
+    try:
+        scheduler.submit("late")
+        assert False, "Expected SchedulerClosedError"
+    except SchedulerClosedError:
+        pass
+
+    print("✅ Errors propagated and closed scheduler rejects prompts")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Generation Scheduler Tests")
+    print("=" * 60)
+
+    tests = [
+        test_concurrent_prompts_are_batched,
+        test_single_prompt_latency_is_bounded,
+        test_errors_reach_every_caller,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The generation scheduler is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
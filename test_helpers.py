@@ -0,0 +1,115 @@
+"""
+Shared fixtures for the test scripts.
+
+A small deterministic fake model and a whitespace token counter stand in for
+all-MiniLM-L6-v2, so no model download is needed, and make_page builds
+reproducible pages from the fake model's vocabulary. fake_modules swaps fake
+torch and transformers modules into sys.modules for the LLM tests, with a fake
+streamer, tokenizer and model.
+"""
+
+import contextlib
+import queue
+import sys
+import time
+import types
+from contextlib import contextmanager
+
+import numpy as np
+
+import embeddings
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta".split()
+
+class FakeModel:
+    """Embeds a text from its word counts; records the size of every encode call and the texts encoded."""
+
+    def __init__(self):
+        self.batches = []
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(len(texts))
+        self.encoded += len(texts)
+        vectors = np.array([[text.count(word) for word in WORDS] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+@contextmanager
+def fake_model():
+    """Install a FakeModel and count_words as the embedding model and token counter."""
+    model = FakeModel()
+    embeddings._model, embeddings._count_tokens = model, count_words
+    try:
+        yield model
+    finally:
+        embeddings._model, embeddings._count_tokens = None, None
+
+def make_page(seed, sentences=60):
+    """A page of ten-word sentences drawn from WORDS."""
+    rng = np.random.default_rng(seed)
+    return " ".join(" ".join(rng.choice(WORDS, 10)) + "." for _ in range(sentences))
+
+@contextmanager
+def fake_modules(**modules):
+    """Install fake modules in sys.modules, restoring the previous entries afterwards."""
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+class FakeStreamer:
+    """Stands in for transformers.TextIteratorStreamer; generate puts text pieces."""
+
+    def __init__(self, tokenizer, skip_special_tokens=False, timeout=None):
+        self.timeout = timeout
+        self.queue = queue.Queue()
+
+    def put(self, text):
+        self.queue.put(text)
+
+    def end(self):
+        self.queue.put(None)
+
+    def __iter__(self):
+        while True:
+            piece = self.queue.get(timeout=self.timeout)
+            if piece is None:
+                return
+            yield piece
+
+def fake_torch_modules():
+    torch = types.ModuleType("torch")
+    torch.no_grad = contextlib.nullcontext
+    transformers = types.ModuleType("transformers")
+    transformers.TextIteratorStreamer = FakeStreamer
+    transformers.AutoModelForSeq2SeqLM = object
+    return {"torch": torch, "transformers": transformers}
+
+class FakeTokenizer:
+    def __call__(self, prompt, **kwargs):
+        return {"input_ids": prompt}
+
+class FakeLLM:
+    """Streams a fixed answer word by word, optionally failing after ``fail_after`` words."""
+
+    def __init__(self, answer, fail_after=None, delay=0.01):
+        self.answer = answer
+        self.fail_after = fail_after
+        self.delay = delay
+
+    def generate(self, input_ids, streamer, **kwargs):
+        for i, word in enumerate(self.answer.split(" ")):
+            if i == self.fail_after:
+                raise RuntimeError("generation failed")
+            time.sleep(self.delay)
+            streamer.put(word if i == 0 else " " + word)
+        streamer.end()
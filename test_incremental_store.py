@@ -0,0 +1,203 @@
+"""
+Test script for incremental vector store updates on re-crawls.
+
+This script tests:
+1. Refreshes removing stale pages and encoding only new and changed ones
+2. Unchanged re-crawls reusing the persisted, memory-mapped site store without encoding
+3. Pages that failed or were not reached in a re-crawl keeping their chunks
+4. sq8 stores fitting their quantizer on every chunk, and refitting as the site grows
+
+The fake model and whitespace token counter from test_helpers stand in for
+all-MiniLM-L6-v2, so no model download is needed. Run this script to verify
+incremental updates are working correctly.
+"""
+
+import sys
+import tempfile
+
+import faiss
+import numpy as np
+
+from embeddings import IncrementalVectorStore, load_or_refresh_site_store, site_store_key
+from test_helpers import fake_model, make_page
+from vector_store import MappedChunkTable, store_path
+
+def test_refresh_encodes_only_changes():
+    """Test that a refresh removes stale pages and encodes only new and changed ones"""
+    print("Testing incremental refresh...")
+
+    pages = [(f"https://example.com/{i}", make_page(i)) for i in range(10)]
+    recrawl = [page for page in pages if page[0] != "https://example.com/9"]
+    recrawl[3] = ("https://example.com/3", make_page(100))
+    recrawl.append(("https://example.com/new", make_page(200)))
+
+    with fake_model() as model:
+        store = IncrementalVectorStore("float32")
+        first = store.refresh(pages)
+        assert first.added_pages == 10 and model.encoded == first.added_chunks == len(store.chunks)
+        changed_ids = store.documents["https://example.com/3"].ids
+
+        model.encoded = 0
+        result = store.refresh(recrawl)
+        encoded = model.encoded
+        query = model.encode([store.chunks[store.documents["https://example.com/new"].ids[0]]])
+
+    assert (result.added_pages, result.changed_pages, result.removed_pages, result.unchanged_pages) == (1, 1, 1, 8)
+    assert encoded == result.added_chunks, "Only new and changed pages should be encoded"
+    assert store.index.ntotal == len(store.chunks) == first.added_chunks - result.removed_chunks + result.added_chunks
+    assert not any(i in store.chunks for i in set(changed_ids) - set(store.documents["https://example.com/3"].ids))
+
+    _, ids = store.index.search(query, 1)
+    assert ids[0][0] in store.documents["https://example.com/new"].ids, "Search should return stable chunk ids"
+
+    print(f"✅ Re-crawl encoded {result.added_chunks} of {len(store.chunks)} chunks")
+    return True
+
+def test_site_store_persists_between_crawls():
+    """Test that an unchanged re-crawl reuses the persisted site store without encoding"""
+    print("\nTesting persisted site store...")
+
+    pages = [(f"https://example.com/{i}", make_page(i)) for i in range(5)]
+
+    changed = pages[:-1] + [("https://example.com/4", make_page(40))]
+
+    with fake_model() as model, tempfile.TemporaryDirectory() as root:
+        index, chunks, _ = load_or_refresh_site_store("https://example.com", pages, store_dir=root)
+        encoded = model.encoded
+        model.encoded = 0
+        reloaded_index, reloaded_chunks, _ = load_or_refresh_site_store("https://example.com", pages, store_dir=root)
+        unchanged_encoded = model.encoded
+        assert reloaded_chunks == chunks
+
+        assert isinstance(reloaded_chunks, MappedChunkTable), "Reloaded chunks should stay memory-mapped"
+        assert reloaded_chunks._mapped is not None and not reloaded_chunks._added
+
+        # Changing a page removes mapped chunks and adds in-memory ones
+        _, updated_chunks, _ = load_or_refresh_site_store("https://example.com", changed, store_dir=root)
+        store = IncrementalVectorStore.load(store_path(site_store_key("https://example.com"), root))
+        assert dict(store.chunks) == dict(updated_chunks)
+        assert len(updated_chunks) == sum(len(entry.ids) for entry in store.documents.values())
+        reloaded_chunks.close()
+        updated_chunks.close()
+        store.chunks.close()
+
+    assert encoded == len(chunks) and unchanged_encoded == 0, "An unchanged site should not be re-encoded"
+    assert reloaded_index.ntotal == index.ntotal
+
+    print(f"✅ {len(chunks)} chunks reloaded without encoding")
+    return True
+
+def test_partial_crawl_keeps_pages():
+    """Test that a page erroring in a re-crawl keeps its chunks and only 404s are removed"""
+    print("\nTesting partial re-crawls...")
+
+    pages = [(f"https://example.com/{i}", make_page(i)) for i in range(6)]
+    flaky, deleted, beyond_cap = "https://example.com/2", "https://example.com/4", "https://example.com/5"
+    recrawl = [page for page in pages if page[0] not in (flaky, deleted, beyond_cap)]
+
+    with fake_model() as model:
+        store = IncrementalVectorStore("float32")
+        store.refresh(pages)
+        flaky_ids = list(store.documents[flaky].ids)
+        flaky_chunks = [store.chunks[i] for i in flaky_ids]
+        model.encoded = 0
+        # One page timed out, one returned 404 and one was past max_pages
+        result = store.refresh(recrawl, keep={flaky, beyond_cap}, gone={deleted}, complete=False)
+        query = model.encode([flaky_chunks[0]])
+
+    assert (result.removed_pages, result.kept_pages, result.unchanged_pages) == (1, 2, 3)
+    assert model.encoded == 1 and result.added_chunks == 0, "Nothing should be re-encoded"
+    assert store.documents[flaky].ids == flaky_ids, "The erroring page should stay in the store"
+    assert [store.chunks[i] for i in flaky_ids] == flaky_chunks, "Its chunks should survive"
+    assert deleted not in store.documents, "A 404 page should be removed"
+    _, ids = store.index.search(query, 1)
+    assert ids[0][0] in flaky_ids, "The kept page's vectors should still be searchable"
+
+    # Once a complete crawl no longer lists the pages, they are removed
+    with fake_model():
+        result = store.refresh(recrawl)
+    assert result.removed_pages == 2 and set(store.documents) == {url for url, _ in recrawl}
+
+    print(f"✅ Partial re-crawl kept {len(flaky_ids)} chunks of the erroring page")
+    return True
+
+def quantization_error(store, model):
+    """Largest difference between the stored sq8 vectors and exact embeddings of their chunks."""
+    ids = faiss.vector_to_array(store.index.id_map)
+    decoded = faiss.downcast_index(store.index.index).reconstruct_n(0, store.index.ntotal)
+    exact = model.encode([store.chunks[int(i)] for i in ids])
+    return np.abs(decoded - exact).max()
+
+def test_sq8_store_fits_every_chunk():
+    """Test that an sq8 store is fitted on all its chunks, not the first batch, and refitted as it grows"""
+    print("\nTesting sq8 quantizer fitting...")
+
+    pages = [(f"https://example.com/{i}", make_page(i)) for i in range(12)]
+    with fake_model() as model, tempfile.TemporaryDirectory() as root:
+        store = IncrementalVectorStore("sq8")
+        store.refresh(pages, batch_size=2)
+        full_error = quantization_error(store, model)
+        assert store.trained_vectors == store.index.ntotal, "The quantizer should be fitted on every chunk"
+
+        small = IncrementalVectorStore("sq8")
+        small.refresh(pages[:1])
+        first_fit = small.trained_vectors
+        small.refresh(pages[:1] + [("https://example.com/short", make_page(50, sentences=15))])
+        assert small.trained_vectors == first_fit, "Small growth should reuse the fitted quantizer"
+        small.save(root + "/store")
+        reloaded = IncrementalVectorStore.load(root + "/store")
+        assert reloaded.trained_vectors == first_fit
+        reloaded.refresh(pages)
+        grown_error = quantization_error(reloaded, model)
+        query = model.encode([reloaded.chunks[reloaded.documents[pages[-1][0]].ids[0]]])
+        _, ids = reloaded.index.search(query, 1)
+        reloaded.chunks.close()
+
+    assert full_error < 0.01, f"sq8 error {full_error:.4f} is larger than one quantization step"
+    assert reloaded.trained_vectors == reloaded.index.ntotal, "Outgrowing the fitted sample should refit the quantizer"
+    assert grown_error < 0.01, f"Refitted sq8 error {grown_error:.4f} is too large"
+    assert ids[0][0] in reloaded.documents[pages[-1][0]].ids
+
+    print(f"✅ sq8 error {full_error:.4f} after one build, {grown_error:.4f} after growing from {first_fit} chunks")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Incremental Vector Store Tests")
+    print("=" * 60)
+
+    tests = [
+        test_refresh_encodes_only_changes,
+        test_site_store_persists_between_crawls,
+        test_partial_crawl_keeps_pages,
+        test_sq8_store_fits_every_chunk,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The incremental store is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
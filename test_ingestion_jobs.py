@@ -0,0 +1,223 @@
+"""
+Test script for background ingestion jobs.
+
+This script tests:
+1. A running job being joined rather than started again
+2. Cancellation at the next progress report once nobody watches a job
+3. Failures marking the job failed, with a resubmit retrying
+4. Cancelling a job that builds a shared store leaving other jobs waiting on it unharmed
+5. Finished jobs nobody collects being forgotten after the TTL, freeing their results
+
+Jobs run small fake work functions, so no network or model is needed.
+Run this script to verify background ingestion is working correctly.
+"""
+
+import gc
+import sys
+import threading
+import time
+import weakref
+
+import faiss
+import numpy as np
+
+from ingestion_jobs import CANCELLED, DONE, FAILED, JobManager
+from store_registry import VectorStoreRegistry
+
+def wait_finished(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job.finished
+
+def test_jobs_are_deduplicated():
+    """Test that a running job is joined rather than started again"""
+    print("Testing job deduplication...")
+
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+    runs = []
+
+    def work(job):
+        runs.append(job.key)
+        job.report_chunks(10, 0.5)
+        release.wait(5)
+        return "store"
+
+    first = manager.submit("https://example.com", work)
+    second = manager.submit("https://example.com", work)
+    assert first is second and first.watchers == 2
+    release.set()
+    assert wait_finished(first)
+
+    assert first.stage == DONE and first.result == "store"
+    assert runs == ["https://example.com"], "Work should run once"
+    assert first.chunks == 10 and first.fraction == 1.0
+    manager.release(first)
+    manager.release(first)
+    assert manager.get("https://example.com") is None, "Released finished jobs should be forgotten"
+    manager.shutdown()
+
+    print("✅ Two submits shared one run")
+    return True
+
+def test_last_release_cancels_job():
+    """Test that a job is cancelled at its next progress report once nobody watches it"""
+    print("\nTesting cancellation...")
+
+    manager = JobManager(max_workers=1)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        for i in range(500):
+            job.report_pages(i, 500)
+            time.sleep(0.01)
+        return "store"
+
+    job = manager.submit("https://example.com", work)
+    other = manager.submit("https://example.com", work)
+    assert started.wait(5)
+    manager.release(job)
+    time.sleep(0.05)
+    assert not job.finished, "Another watcher should keep the job running"
+    manager.release(other)
+    assert wait_finished(job)
+
+    assert job.stage == CANCELLED and job.result is None
+    assert job.pages_done < 499
+    assert len(manager) == 0
+    manager.shutdown()
+
+    print(f"✅ Job cancelled after {job.pages_done} pages")
+    return True
+
+def test_failures_are_reported():
+    """Test that an exception in the work marks the job failed and a resubmit retries"""
+    print("\nTesting job failure...")
+
+    manager = JobManager(max_workers=1)
+
+    def failing(job):
+        raise ValueError("site unreachable")
+
+    job = manager.submit("https://example.com", failing)
+    assert wait_finished(job)
+    assert job.stage == FAILED and "unreachable" in str(job.error)
+
+    retry = manager.submit("https://example.com", lambda job: "store")
+    assert retry is not job, "A finished job should not be joined"
+    assert wait_finished(retry) and retry.stage == DONE
+    manager.shutdown()
+
+    print("✅ Failure reported and retried")
+    return True
+
+def test_cancelled_builder_spares_waiting_jobs():
+    """Test that cancelling the job building a shared store does not fail jobs waiting on it"""
+    print("\nTesting cancellation of a shared store build...")
+
+    manager = JobManager(max_workers=2)
+    registry = VectorStoreRegistry()
+    building = threading.Event()
+
+    def make_work(report_delay):
+        def work(job):
+            def build():
+                building.set()
+                try:
+                    for i in range(100):
+                        job.report_chunks(i, i / 100)
+                        time.sleep(report_delay)
+                except Exception as e:
+                    # Vector store builds wrap the cancellation in their own error
+                    raise RuntimeError(f"Unexpected error during vector store creation: {e}")
+                index = faiss.IndexFlatL2(4)
+                index.add(np.random.rand(10, 4).astype("float32"))
+                return index, [f"chunk {i}" for i in range(10)], "model"
+
+            return registry.acquire("content", build, is_cancelled=lambda: job.cancelled)
+        return work
+
+    # Same content reached by two different submissions, e.g. a page and a crawl of it
+    owner = manager.submit("https://example.com|crawl", make_work(0.01))
+    assert building.wait(5)
+    waiter = manager.submit("https://example.com|page", make_work(0.0))
+    time.sleep(0.05)
+    manager.release(owner)
+    assert wait_finished(owner) and wait_finished(waiter)
+
+    assert owner.stage == CANCELLED
+    assert waiter.stage == DONE, f"The waiting job should finish, not {waiter.stage}: {waiter.error}"
+    assert len(waiter.result.chunks) == 10
+    manager.release(waiter)
+    manager.shutdown()
+
+    print("✅ Owner cancelled, the waiting job built the store itself")
+    return True
+
+def test_unclaimed_jobs_expire():
+    """Test that finished jobs whose watchers never release them are forgotten after the TTL"""
+    print("\nTesting expiry of unclaimed jobs...")
+
+    class Result:
+        pass
+
+    manager = JobManager(max_workers=1, finished_ttl=0.2)
+    job = manager.submit("https://example.com", lambda job: Result())
+    assert wait_finished(job) and job.stage == DONE
+    result = weakref.ref(job.result)
+    assert manager.get("https://example.com") is job, "A finished job should wait for its watcher"
+
+    time.sleep(0.3)
+    assert manager.get("https://example.com") is None and len(manager) == 0, "An unclaimed job should expire"
+    # A closed session's state, and with it its reference to the job, goes away
+    del job
+    gc.collect()
+    assert result() is None, "The manager should no longer hold the job's result"
+    manager.shutdown()
+
+    print("✅ Unclaimed job forgotten after its TTL and its result freed")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Ingestion Job Tests")
+    print("=" * 60)
+
+    tests = [
+        test_jobs_are_deduplicated,
+        test_last_release_cancels_job,
+        test_failures_are_reported,
+        test_cancelled_builder_spares_waiting_jobs,
+        test_unclaimed_jobs_expire,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Background ingestion is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
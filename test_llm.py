@@ -0,0 +1,117 @@
+"""
+Test script for lazy model loading.
+
+This script tests:
+1. Importing llm and embeddings without importing torch or the model libraries
+2. The lazy embeddings.model attribute loading the model once, even concurrently
+
+A fake sentence_transformers module is swapped in, so no model is loaded.
+Backend loading and streamed generation are covered by test_llm_backends.py
+and test_llm_streaming.py. Run this script to verify lazy loading is working correctly.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import embeddings
+from test_helpers import fake_modules
+
+def test_imports_are_lazy():
+    """Test that importing llm and embeddings does not import torch or the model libraries"""
+    print("Testing lazy imports...")
+
+    code = "import sys, llm, embeddings; print(sorted(m for m in ('torch', 'transformers', 'sentence_transformers') if m in sys.modules))"
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", code], cwd=here, env=env, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]", f"Importing should not load model libraries, got {output.strip()}"
+
+    print("✅ llm and embeddings import without torch")
+    return True
+
+def test_lazy_model_loads_once():
+    """Test that concurrent embeddings.model lookups load the model once"""
+    print("\nTesting lazy embedding model loading...")
+
+    loads = []
+
+    class SentenceTransformer:
+        def __init__(self, name):
+            loads.append(name)
+            time.sleep(0.05)
+            self.tokenizer = None
+
+    sentence_transformers = types.ModuleType("sentence_transformers")
+    sentence_transformers.SentenceTransformer = SentenceTransformer
+    models = []
+    barrier = threading.Barrier(8)
+
+    def lookup():
+        barrier.wait()
+        models.append(embeddings.model)
+
+    embeddings._model = None
+    try:
+        with fake_modules(sentence_transformers=sentence_transformers):
+            threads = [threading.Thread(target=lookup) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            later = embeddings.model
+    finally:
+        embeddings._model, embeddings._count_tokens = None, None
+
+    assert loads == [embeddings.MODEL_NAME], f"Expected one load, got {len(loads)}"
+    assert all(model is later for model in models), "Every caller should get the same model"
+    try:
+        embeddings.missing
+        assert False, "Expected AttributeError"
+    except AttributeError:
+        pass
+
+    print(f"✅ {len(models) + 1} lookups loaded the model once")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Lazy Loading Tests")
+    print("=" * 60)
+
+    tests = [
+        test_imports_are_lazy,
+        test_lazy_model_loads_once,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Lazy loading is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
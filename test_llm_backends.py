@@ -0,0 +1,94 @@
+"""
+Test script for LLM inference backends.
+
+This script tests:
+1. get_llm loading each backend once, even concurrently, and rejecting unknown backends
+
+Fake torch and transformers modules from test_helpers are swapped in and the
+backend loader is replaced, so no model is loaded.
+Run this script to verify backend loading is working correctly.
+"""
+
+import sys
+import threading
+import time
+
+import llm
+from llm import LLMBackendError, get_llm
+from test_helpers import FakeLLM, FakeTokenizer, fake_modules, fake_torch_modules
+
+def test_get_llm_loads_once():
+    """Test that concurrent get_llm calls load a backend once"""
+    print("Testing lazy LLM loading...")
+
+    loads = []
+
+    def load_torch(quantize):
+        loads.append(quantize)
+        time.sleep(0.05)
+        return FakeTokenizer(), FakeLLM("unused")
+
+    saved_loader, saved_llms = llm._load_torch, dict(llm._llms)
+    llm._load_torch = load_torch
+    llm._llms.clear()
+    results = []
+    try:
+        with fake_modules(**fake_torch_modules()):
+            threads = [threading.Thread(target=lambda: results.append(get_llm("int8"))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            try:
+                get_llm("tensorrt")
+                assert False, "Expected LLMBackendError"
+            except LLMBackendError:
+                pass
+    finally:
+        llm._load_torch = saved_loader
+        llm._llms.clear()
+        llm._llms.update(saved_llms)
+
+    assert loads == [True], f"Expected one quantized load, got {loads}"
+    assert all(result is results[0] for result in results)
+
+    print(f"✅ {len(results)} concurrent callers shared one load")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running LLM Backend Tests")
+    print("=" * 60)
+
+    tests = [
+        test_get_llm_loads_once,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Backend loading is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,102 @@
+"""
+Test script for streamed answer generation.
+
+This script tests:
+1. The streaming worker thread finishing after the last token
+2. Errors in model.generate reaching the consumer after the pieces already streamed
+
+Fake torch and transformers modules from test_helpers are swapped in for each
+test, with a fake tokenizer and model, so no model is loaded.
+Run this script to verify streaming is working correctly.
+"""
+
+import sys
+import threading
+
+import llm
+from llm import generate_answer_stream
+from test_helpers import FakeLLM, FakeTokenizer, fake_modules, fake_torch_modules
+
+def stream_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "llm-stream"]
+
+def stream(model):
+    saved = dict(llm._llms)
+    llm._llms["torch"] = (FakeTokenizer(), model)
+    try:
+        with fake_modules(**fake_torch_modules()):
+            yield from generate_answer_stream("Question: what is this site? Answer:", backend="torch")
+    finally:
+        llm._llms.clear()
+        llm._llms.update(saved)
+
+def test_stream_worker_finishes():
+    """Test that the streamed pieces form the answer and the worker thread exits"""
+    print("Testing streamed generation...")
+
+    answer = "The site sells hand made furniture"
+    pieces = list(stream(FakeLLM(answer)))
+
+    assert "".join(pieces) == answer
+    assert len(pieces) == len(answer.split(" ")), "Each token should arrive as its own piece"
+    assert not stream_threads(), "The worker thread should have finished"
+
+    print(f"✅ {len(pieces)} pieces streamed and the worker exited")
+    return True
+
+def test_stream_worker_error_reaches_consumer():
+    """Test that a generate error is raised to the consumer after the streamed pieces"""
+    print("\nTesting streamed generation errors...")
+
+    pieces = []
+    try:
+        for piece in stream(FakeLLM("one two three four", fail_after=2)):
+            pieces.append(piece)
+        assert False, "Expected the worker's RuntimeError"
+    except RuntimeError as e:
+        assert str(e) == "generation failed"
+
+    assert pieces == ["one", " two"], f"Pieces before the error should be delivered, got {pieces}"
+    assert not stream_threads(), "The worker thread should have finished"
+
+    print("✅ Worker error reached the consumer after 2 pieces")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Streamed Generation Tests")
+    print("=" * 60)
+
+    tests = [
+        test_stream_worker_finishes,
+        test_stream_worker_error_reaches_consumer,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Streamed generation is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,183 @@
+"""
+Test script for the metrics layer.
+
+This script tests:
+1. Spans and counters reaching the Prometheus snapshot, file and endpoint
+2. JSON span logs and traces
+3. Disabled metrics recording nothing except into an explicit trace
+4. Importing and snapshotting without the Unix-only resource module
+
+Run this script to verify metrics are working correctly.
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+import metrics
+
+def reset(enabled):
+    metrics.configure(enabled)
+    metrics.REGISTRY.clear()
+
+def test_spans_and_counters_export():
+    """Test that spans and counters reach the Prometheus snapshot, file and endpoint"""
+    print("Testing metrics export...")
+
+    reset(True)
+    try:
+        for _ in range(3):
+            with metrics.span("answer.search") as span:
+                span.set(shards=2)
+        metrics.inc("rag_answer_cache_hits_total")
+        metrics.inc("rag_http_cache_requests_total", 2, result="miss")
+
+        text = metrics.snapshot()
+        assert 'rag_span_duration_seconds_count{span="answer.search"} 3' in text
+        assert 'rag_span_duration_seconds_bucket{span="answer.search",le="+Inf"} 3' in text
+        assert "rag_answer_cache_hits_total 1" in text
+        assert 'rag_http_cache_requests_total{result="miss"} 2' in text
+        assert "rag_process_rss_bytes" in text
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rag.prom")
+            metrics.write_snapshot(path)
+            with open(path, encoding="utf-8") as f:
+                assert "# TYPE rag_span_duration_seconds histogram" in f.read()
+
+        server = metrics.start_http_server(port=0, host="127.0.0.1")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                assert "rag_answer_cache_hits_total 1" in response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        reset(False)
+
+    print("✅ Snapshot exported as text, file and /metrics")
+    return True
+
+def test_json_logs_and_trace():
+    """Test that spans are logged as JSON and collected by the active trace"""
+    print("\nTesting JSON logs and traces...")
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(record.getMessage())
+    metrics.logger.addHandler(handler)
+    metrics.logger.setLevel(logging.INFO)
+    json_logs = metrics.METRICS_JSON_LOGS
+    metrics.METRICS_JSON_LOGS = True
+    reset(True)
+    try:
+        with metrics.Trace() as trace:
+            with metrics.span("answer.encode"):
+                pass
+            with metrics.span("answer.pack", tokens=412):
+                pass
+    finally:
+        reset(False)
+        metrics.METRICS_JSON_LOGS = json_logs
+        metrics.logger.removeHandler(handler)
+
+    assert [name for name, _ in trace.breakdown()] == ["answer.encode", "answer.pack"]
+    logged = [json.loads(record) for record in records]
+    assert logged[1]["span"] == "answer.pack" and logged[1]["tokens"] == 412
+    assert "answer.pack" in metrics.format_breakdown(trace)
+
+    print(f"✅ {len(logged)} spans logged and traced")
+    return True
+
+def test_disabled_is_noop():
+    """Test that disabled metrics record nothing, except into an explicit trace"""
+    print("\nTesting disabled metrics...")
+
+    reset(False)
+    span = metrics.span("scrape.page", url="https://example.com")
+    assert span is metrics.span("embeddings.build"), "Disabled spans should be one shared no-op"
+    with span:
+        metrics.inc("rag_questions_total")
+    assert metrics.REGISTRY.counter("rag_questions_total") == 0
+    assert "rag_span_duration_seconds" not in metrics.REGISTRY.prometheus_text()
+
+    with metrics.Trace() as trace:
+        with metrics.span("answer.generate"):
+            pass
+    assert len(trace.spans) == 1, "A trace should record spans even when metrics are off"
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with metrics.span("answer.search"):
+            pass
+    per_span = (time.perf_counter() - start) / 100_000
+    assert per_span < 20e-6, f"Disabled span overhead too high: {per_span * 1e6:.2f} µs"
+
+    print(f"✅ Disabled span costs {per_span * 1e9:.0f} ns")
+    return True
+
+def test_without_resource_module():
+    """Test that metrics import and report 0 RSS where the resource module is missing (Windows)"""
+    print("\nTesting without the resource module...")
+
+    saved = sys.modules.get("resource")
+    sys.modules["resource"] = None  # makes "import resource" raise ImportError
+    try:
+        module = importlib.reload(metrics)
+        assert module.rss_bytes() == 0
+        assert "rag_process_rss_bytes 0" in module.snapshot()
+    finally:
+        if saved is None:
+            del sys.modules["resource"]
+        else:
+            sys.modules["resource"] = saved
+        importlib.reload(metrics)
+
+    print("✅ Metrics work without the resource module")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Metrics Tests")
+    print("=" * 60)
+
+    tests = [
+        test_spans_and_counters_export,
+        test_json_logs_and_trace,
+        test_disabled_is_noop,
+        test_without_resource_module,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The metrics layer is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
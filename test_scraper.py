@@ -0,0 +1,436 @@
+"""
+Test script for the website scraper and crawler.
+
+This script tests:
+1. Single-page text extraction
+2. Multi-page crawling of same-domain links
+3. Sitemap discovery
+4. Per-page failures not aborting a crawl
+5. Response caching with ETag / Last-Modified revalidation
+6. Cache TTL and LRU eviction
+7. HTML extraction backends and main-content mode on the saved fixtures
+8. Reporting deleted, empty, failed and unvisited pages of a partial crawl
+9. Re-extracting cached bodies when the extraction mode changes
+10. Following links on the host a redirected seed URL moved to
+
+A local stub HTTP server serves the pages, so no internet access is needed.
+Run this script to verify the scraper is working correctly.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper import get_website_text, crawl_website, NetworkError, ContentExtractionError, PageNotFoundError
+from http_cache import ResponseCache
+import html_extraction
+from html_extraction import extract, HTMLExtractionError
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+FILLER = "This paragraph contains enough words to count as real page content for the scraper. " * 3
+
+def page(title, body_links=""):
+    return f"""<html><head><title>{title}</title><script>var x = 1;</script></head>
+<body><nav><a href="/">Home</a></nav><h1>{title}</h1><p>{FILLER}</p>{body_links}
+<footer>Footer text</footer></body></html>"""
+
+PAGES = {
+    "/": page("Home", '<a href="/docs">Docs</a> <a href="/missing">Broken</a> <a href="https://other.example/">External</a>'),
+    "/docs": page("Docs", '<a href="/docs/deep#section">Deep</a> <a href="/logo.png">Logo</a>'),
+    "/docs/deep": page("Deep", '<a href="/docs/deeper">Deeper</a>'),
+    "/docs/deeper": page("Deeper"),
+    "/from-sitemap": page("Sitemap Only"),
+    "/short": "<html><body><p>Too short</p></body></html>",
+    "/hub": page("Hub", '<a href="/short">Thin</a> <a href="/feed">Feed</a> <a href="/docs">Docs</a>'),
+}
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>{base}/from-sitemap</loc></url>
+</urlset>"""
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+class StubHandler(BaseHTTPRequestHandler):
+    serve_sitemap = False
+    requests_seen = []
+    # Paths answered with a 503, as by an overloaded server
+    failing = set()
+
+    def do_GET(self):
+        path = self.path
+        StubHandler.requests_seen.append((path, self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")))
+        if path == "/moved":
+            # Like an apex domain redirecting to www: same server, another host name
+            self.send_response(301)
+            self.send_header("Location", f"http://localhost:{self.server.server_address[1]}/")
+            self.end_headers()
+            return
+        if path in StubHandler.failing:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if path == "/etag" and self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if path == "/modified" and self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if path in ("/etag", "/modified"):
+            body = page("Cached Page").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            if path == "/etag":
+                self.send_header("ETag", ETAG)
+            else:
+                self.send_header("Last-Modified", LAST_MODIFIED)
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if path == "/feed":
+            body = (FILLER * 2).encode()
+            content_type = "text/plain"
+        elif path == "/sitemap.xml" and StubHandler.serve_sitemap:
+            body = SITEMAP.format(base=f"http://{self.headers['Host']}").encode()
+            content_type = "application/xml"
+        elif path in PAGES:
+            body = PAGES[path].encode()
+            content_type = "text/html; charset=utf-8"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_single_page_extraction():
+    """Test that get_website_text strips scripts, navigation and footers."""
+    print("Testing single-page extraction...")
+
+    server, base = start_server()
+    try:
+        text = get_website_text(base + "/")
+    finally:
+        server.shutdown()
+
+    assert "Home" in text, "Heading text should be extracted"
+    assert "var x" not in text, "Scripts should be removed"
+    assert "Footer text" not in text, "Footers should be removed"
+
+    print("✅ Single-page extraction test passed!")
+    return True
+
+def test_single_page_errors():
+    """Test that single-page errors keep their exception types."""
+    print("\nTesting single-page errors...")
+
+    server, base = start_server()
+    try:
+        try:
+            get_website_text(base + "/missing")
+            assert False, "Missing page should raise NetworkError"
+        except NetworkError:
+            pass
+
+        try:
+            get_website_text(base + "/short")
+            assert False, "Short page should raise ContentExtractionError"
+        except ContentExtractionError:
+            pass
+    finally:
+        server.shutdown()
+
+    print("✅ Single-page error test passed!")
+    return True
+
+def test_crawl_follows_links():
+    """Test that the crawler follows same-domain links up to the depth limit."""
+    print("\nTesting crawl link following...")
+
+    StubHandler.serve_sitemap = False
+    server, base = start_server()
+    try:
+        result = crawl_website(base + "/", max_depth=2, max_pages=20, max_workers=4)
+    finally:
+        server.shutdown()
+
+    urls = [p.url for p in result.pages]
+    assert urls == [base + "/", base + "/docs", base + "/docs/deep"], f"Unexpected pages: {urls}"
+    assert isinstance(result.errors[base + "/missing"], NetworkError), "Broken link should be recorded as NetworkError"
+    assert all("External" not in url for url in urls), "External links should not be followed"
+    assert "Deep" in result.text, "Combined text should include crawled pages"
+
+    print("✅ Crawl link following test passed!")
+    return True
+
+def test_crawl_page_limit_and_sitemap():
+    """Test the page limit and sitemap discovery."""
+    print("\nTesting crawl page limit and sitemap...")
+
+    StubHandler.serve_sitemap = True
+    server, base = start_server()
+    try:
+        limited = crawl_website(base + "/", max_depth=5, max_pages=2, use_sitemap=False)
+        with_sitemap = crawl_website(base + "/", max_depth=0, max_pages=10)
+    finally:
+        StubHandler.serve_sitemap = False
+        server.shutdown()
+
+    assert len(limited.pages) + len(limited.errors) <= 2, "Crawl should stop at max_pages"
+    urls = [p.url for p in with_sitemap.pages]
+    assert base + "/from-sitemap" in urls, "Sitemap pages should be crawled"
+
+    print("✅ Crawl page limit and sitemap test passed!")
+    return True
+
+def test_crawl_failing_seed():
+    """Test that a crawl with no readable pages raises the seed page's error."""
+    print("\nTesting crawl with failing seed...")
+
+    server, base = start_server()
+    try:
+        try:
+            crawl_website(base + "/missing")
+            assert False, "Crawl of a missing seed should raise NetworkError"
+        except NetworkError:
+            pass
+    finally:
+        server.shutdown()
+
+    print("✅ Crawl failing seed test passed!")
+    return True
+
+def test_cache_revalidation():
+    """Test that cached pages are revalidated with conditional requests."""
+    print("\nTesting cache revalidation...")
+
+    server, base = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(cache_dir)
+            StubHandler.requests_seen = []
+
+            first = get_website_text(base + "/etag", cache=cache)
+            second = get_website_text(base + "/etag", cache=cache)
+            get_website_text(base + "/modified", cache=cache)
+            get_website_text(base + "/modified", cache=cache)
+
+            # A fresh cache instance must see entries written by the previous one
+            reopened = ResponseCache(cache_dir)
+            third = get_website_text(base + "/etag", cache=reopened)
+    finally:
+        server.shutdown()
+
+    assert first == second == third, "Revalidated text should match the original"
+    assert StubHandler.requests_seen[0] == ("/etag", None, None), "First fetch should be unconditional"
+    assert StubHandler.requests_seen[1][1] == ETAG, "Refetch should send If-None-Match"
+    assert StubHandler.requests_seen[3][2] == LAST_MODIFIED, "Refetch should send If-Modified-Since"
+    assert StubHandler.requests_seen[4][1] == ETAG, "Reopened cache should keep validators"
+
+    print("✅ Cache revalidation test passed!")
+    return True
+
+def test_cache_ttl_and_eviction():
+    """Test that fresh entries skip the network and the size cap evicts LRU entries."""
+    print("\nTesting cache TTL and eviction...")
+
+    server, base = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(cache_dir, ttl=60)
+            StubHandler.requests_seen = []
+            get_website_text(base + "/etag", cache=cache)
+            get_website_text(base + "/etag", cache=cache)
+            assert len(StubHandler.requests_seen) == 1, "Fresh entry should be served without a request"
+    finally:
+        server.shutdown()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir)
+        cache.put("http://a/", b"x" * 1000, "a")
+        cache.put("http://b/", b"x" * 1000, "b")
+        cache.get("http://a/")
+        cache.max_bytes = cache.total_bytes
+        cache.put("http://c/", b"", "c")
+
+        assert cache.get("http://a/") is not None, "Recently used entry should be kept"
+        assert cache.get("http://b/") is None, "Least recently used entry should be evicted"
+        assert cache.get("http://c/") is not None, "Newest entry should be kept"
+
+    print("✅ Cache TTL and eviction test passed!")
+    return True
+
+def test_extraction_backends():
+    """Test that the fast backends match BeautifulSoup and main-content mode drops page chrome."""
+    print("\nTesting HTML extraction backends...")
+
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    assert paths, "HTML fixtures are missing"
+    for backend in ("lxml", "selectolax"):
+        try:
+            extract("<p>probe</p>", backend=backend)
+        except HTMLExtractionError:
+            print(f"  {backend} is not installed, skipping")
+            continue
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+            for main_content in (False, True):
+                expected = extract(html, "https://example.com/", backend="bs4", main_content=main_content)
+                actual = extract(html, "https://example.com/", backend=backend, main_content=main_content)
+                assert actual == expected, f"{backend} output differs from bs4 for {path} (main_content={main_content})"
+
+    with open(os.path.join(FIXTURE_DIR, "blog_post.html"), encoding="utf-8") as f:
+        html = f.read()
+    full, _ = extract(html, backend="bs4", main_content=False)
+    main, _ = extract(html, backend="bs4", main_content=True)
+    assert "cookies" in full and "cookies" not in main, "Cookie banner should be dropped"
+    assert "Popular posts" not in main, "Sidebar should be dropped"
+    assert "Rebuild times dropped" in main, "Article text should be kept"
+
+    print("✅ Extraction backends test passed!")
+    return True
+
+def test_crawl_partial_results():
+    """Test that a crawl tells deleted and empty pages apart from failed and unvisited ones."""
+    print("\nTesting partial crawl reporting...")
+
+    StubHandler.serve_sitemap = False
+    server, base = start_server()
+    try:
+        shallow = crawl_website(base + "/", max_depth=2, max_pages=20)
+        full = crawl_website(base + "/", max_depth=5, max_pages=20)
+        StubHandler.failing = {"/docs/deep"}
+        failing = crawl_website(base + "/", max_depth=5, max_pages=20)
+        StubHandler.failing = set()
+        hub = crawl_website(base + "/hub", max_depth=5, max_pages=20)
+    finally:
+        StubHandler.failing = set()
+        server.shutdown()
+
+    assert isinstance(full.errors[base + "/missing"], PageNotFoundError), "A 404 should raise PageNotFoundError"
+    assert full.gone_urls == {base + "/missing"} and full.complete, "Only 404s should leave a crawl complete"
+    assert shallow.unvisited == {base + "/docs/deeper"}, "Links past max_depth should be recorded"
+    assert not shallow.complete
+    assert failing.skipped_urls == {base + "/docs/deep"}, "A 503 page's content is unknown, not deleted"
+    assert not failing.complete
+    assert hub.gone_urls == {base + "/short", base + "/feed", base + "/missing"}, "Thin and non-HTML pages have no content"
+    assert hub.complete, "Pages fetched without usable content should not make a crawl incomplete"
+
+    print("✅ Partial crawl reporting test passed!")
+    return True
+
+def test_crawl_redirected_seed():
+    """Test that a seed redirecting to another host crawls the site on that host."""
+    print("\nTesting redirected seed URL...")
+
+    StubHandler.serve_sitemap = False
+    server, base = start_server()
+    try:
+        StubHandler.requests_seen = []
+        result = crawl_website(base + "/moved", max_depth=5, max_pages=20)
+    finally:
+        server.shutdown()
+
+    moved = base.replace("127.0.0.1", "localhost")
+    urls = [crawled.url for crawled in result.pages]
+    assert urls[0] == base + "/moved"
+    assert set(urls[1:]) == {moved + "/docs", moved + "/docs/deep", moved + "/docs/deeper"}, f"Unexpected pages: {urls}"
+    assert result.gone_urls == {moved + "/missing"} and result.complete
+    assert [path for path, _, _ in StubHandler.requests_seen].count("/") == 1, "The redirect target should not be fetched again"
+
+    print("✅ Redirected seed test passed!")
+    return True
+
+def test_cache_reextraction():
+    """Test that switching the extraction mode re-extracts cached bodies without downloading."""
+    print("\nTesting cache re-extraction...")
+
+    server, base = start_server()
+    main_content = html_extraction.MAIN_CONTENT
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(cache_dir, ttl=60)
+            StubHandler.requests_seen = []
+            html_extraction.MAIN_CONTENT = False
+            get_website_text(base + "/etag", cache=cache)
+            html_extraction.MAIN_CONTENT = True
+            text = get_website_text(base + "/etag", cache=cache)
+            entry = ResponseCache(cache_dir).get(base + "/etag")
+    finally:
+        html_extraction.MAIN_CONTENT = main_content
+        server.shutdown()
+
+    assert len(StubHandler.requests_seen) == 1, "A mode switch should not re-download a fresh page"
+    assert entry.extractor == html_extraction.extractor_name(main_content=True), "The cache should record the new extraction mode"
+    assert entry.text == text == extract(page("Cached Page"), base + "/etag", main_content=True)[0]
+
+    print("✅ Cache re-extraction test passed!")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Scraper Tests")
+    print("=" * 60)
+
+    tests = [
+        test_single_page_extraction,
+        test_single_page_errors,
+        test_crawl_follows_links,
+        test_crawl_page_limit_and_sitemap,
+        test_crawl_failing_seed,
+        test_crawl_partial_results,
+        test_crawl_redirected_seed,
+        test_cache_revalidation,
+        test_cache_ttl_and_eviction,
+        test_cache_reextraction,
+        test_extraction_backends
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The scraper is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,233 @@
+"""
+Test script for the shared vector store registry.
+
+This script tests:
+1. Concurrent sessions for the same key waiting on a single build
+2. LRU eviction dropping only stores without live handles
+3. Failed builds raising for the caller and not being cached
+4. Interrupted builds (BaseException) releasing waiters and not being cached
+5. Waiters taking over a build whose builder was cancelled
+
+Stores are small flat FAISS indexes built in-process, so no model is needed.
+Run this script to verify the registry is working correctly.
+"""
+
+import gc
+import sys
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from store_registry import VectorStoreRegistry, store_nbytes
+
+DIMENSION = 8
+
+class CountingBuilder:
+    """Builds a small flat store and counts how often it was called."""
+
+    def __init__(self, n_vectors=100, delay=0.0, fail=False):
+        self.n_vectors = n_vectors
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("build failed")
+        index = faiss.IndexFlatL2(DIMENSION)
+        index.add(np.random.rand(self.n_vectors, DIMENSION).astype("float32"))
+        chunks = [f"chunk {i}" for i in range(self.n_vectors)]
+        return index, chunks, "model"
+
+def test_concurrent_acquires_share_one_build():
+    """Test that concurrent sessions for the same key wait on a single build"""
+    print("Testing concurrent acquires share one build...")
+
+    registry = VectorStoreRegistry()
+    builder = CountingBuilder(delay=0.2)
+    handles = []
+
+    def session():
+        handles.append(registry.acquire("site", builder))
+
+    threads = [threading.Thread(target=session) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builder.calls == 1, f"Expected one build, got {builder.calls}"
+    assert len(handles) == 5
+    assert all(handle.index is handles[0].index for handle in handles), "Handles should share the index"
+
+    print("✅ 5 sessions shared 1 build")
+    return True
+
+def test_eviction_respects_references():
+    """Test that LRU eviction only drops stores without live handles"""
+    print("\nTesting eviction with reference counts...")
+
+    index, chunks, _ = CountingBuilder()()
+    size = store_nbytes(index, chunks)
+    registry = VectorStoreRegistry(memory_budget=int(size * 2.5))
+
+    first = registry.acquire("a", CountingBuilder())
+    registry.acquire("b", CountingBuilder()).release()
+    registry.acquire("c", CountingBuilder()).release()
+    # Over budget: "b" is the least recently used unreferenced store
+    assert "a" in registry, "A store with a live handle must not be evicted"
+    assert "b" not in registry, "The least recently used free store should be evicted"
+    assert "c" in registry
+
+    # Dropping the last handle makes "a" evictable
+    del first
+    gc.collect()
+    registry.acquire("d", CountingBuilder()).release()
+    assert "a" not in registry, "Released store should be evicted once over budget"
+    assert registry.total_bytes <= registry.memory_budget
+
+    print("✅ Eviction skipped referenced stores and followed LRU order")
+    return True
+
+def test_failed_build_is_retried():
+    """Test that a failed build raises for the caller and is not cached"""
+    print("\nTesting failed builds...")
+
+    registry = VectorStoreRegistry()
+    try:
+        registry.acquire("site", CountingBuilder(fail=True))
+        assert False, "Expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert "site" not in registry, "Failed builds should not be cached"
+
+    handle = registry.acquire("site", CountingBuilder())
+    assert len(handle.chunks) == 100
+
+    print("✅ Failed build raised and the next acquire rebuilt the store")
+    return True
+
+class RerunInterrupt(BaseException):
+    """Stands in for Streamlit's RerunException/StopException."""
+    pass
+
+def test_interrupted_build_is_retried():
+    """Test that a build interrupted by a BaseException unblocks waiters and is not cached"""
+    print("\nTesting interrupted builds...")
+
+    registry = VectorStoreRegistry()
+    started = threading.Event()
+    errors = []
+
+    def interrupted_build():
+        started.set()
+        time.sleep(0.2)
+        raise RerunInterrupt()
+
+    def waiter():
+        started.wait()
+        try:
+            registry.acquire("site", CountingBuilder())
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    try:
+        registry.acquire("site", interrupted_build)
+        assert False, "Expected the interrupt to propagate to the builder"
+    except RerunInterrupt:
+        pass
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "A waiter must not block forever on an interrupted build"
+    assert len(errors) == 1 and isinstance(errors[0].__cause__, RerunInterrupt)
+    assert "site" not in registry, "Interrupted builds should not be cached"
+
+    handle = registry.acquire("site", CountingBuilder())
+    assert len(handle.chunks) == 100
+
+    print("✅ Interrupt reached the builder, the waiter got an error and the next acquire rebuilt")
+    return True
+
+def test_cancelled_build_is_taken_over():
+    """Test that waiters build the store themselves when the builder is cancelled"""
+    print("\nTesting cancelled builds...")
+
+    registry = VectorStoreRegistry()
+    started = threading.Event()
+    cancelled = threading.Event()
+    waiter_builder = CountingBuilder()
+    handles = []
+
+    def cancelled_build():
+        started.set()
+        time.sleep(0.2)
+        cancelled.set()
+        # Wrapped like create_vector_store wraps a cancelled progress callback
+        raise RuntimeError("Unexpected error during vector store creation: cancelled")
+
+    def waiter():
+        started.wait()
+        handles.append(registry.acquire("site", waiter_builder))
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    try:
+        registry.acquire("site", cancelled_build, is_cancelled=cancelled.is_set)
+        assert False, "Expected the builder's own error"
+    except RuntimeError:
+        pass
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "A waiter must not block forever on a cancelled build"
+    assert len(handles) == 1 and len(handles[0].chunks) == 100, "The waiter should get a store, not the cancellation"
+    assert waiter_builder.calls == 1, "The waiter should have built the store with its own build_fn"
+    assert "site" in registry
+
+    print("✅ Cancellation reached the builder and the waiter built the store itself")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Store Registry Tests")
+    print("=" * 60)
+
+    tests = [
+        test_concurrent_acquires_share_one_build,
+        test_eviction_respects_references,
+        test_failed_build_is_retried,
+        test_interrupted_build_is_retried,
+        test_cancelled_build_is_taken_over,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! The store registry is working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
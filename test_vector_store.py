@@ -0,0 +1,110 @@
+"""
+Test script for persisted vector stores.
+
+This script tests:
+1. A content-hash hit reopening the saved store memory-mapped, without encoding
+2. Registry eviction closing the memory-mapped chunks of dropped stores
+
+The fake model and whitespace token counter from test_helpers stand in for
+all-MiniLM-L6-v2, so no model download is needed. Run this script to verify
+persisted stores are working correctly.
+"""
+
+import sys
+import tempfile
+
+from embeddings import load_or_create_vector_store
+from store_registry import VectorStoreRegistry
+from test_helpers import fake_model, make_page
+from vector_store import MappedChunks
+
+def test_content_hash_hit_is_mapped():
+    """Test that reopening the same text memory-maps the saved store instead of encoding"""
+    print("Testing content-hash store hits...")
+
+    text = make_page(1, sentences=120)
+    with fake_model() as model, tempfile.TemporaryDirectory() as root:
+        index, chunks, _ = load_or_create_vector_store(text, store_dir=root)
+        encoded = model.encoded
+        model.encoded = 0
+        mapped_index, mapped_chunks, _ = load_or_create_vector_store(text, store_dir=root)
+        query = model.encode([chunks[0]])
+        try:
+            assert model.encoded == 1, "A store hit should only encode the query"
+            assert isinstance(mapped_chunks, MappedChunks), "A store hit should return mapped chunks"
+            assert list(mapped_chunks) == list(chunks)
+            assert mapped_index.ntotal == index.ntotal == len(mapped_chunks)
+            _, ids = mapped_index.search(query, 3)
+            assert (ids == index.search(query, 3)[1]).all(), "The mapped index should search like the built one"
+        finally:
+            mapped_chunks.close()
+
+    print(f"✅ {len(chunks)} chunks built with {encoded} encodes, then reopened mapped")
+    return True
+
+def test_eviction_closes_mapped_chunks():
+    """Test that the registry closes a dropped store's mapped chunks, and only then"""
+    print("\nTesting eviction closes mapped chunks...")
+
+    with fake_model(), tempfile.TemporaryDirectory() as root:
+        registry = VectorStoreRegistry(memory_budget=0)
+        stores = {}
+        for seed in (1, 2):
+            text = make_page(seed, sentences=120)
+            load_or_create_vector_store(text, store_dir=root)
+            stores[seed] = registry.acquire(seed, lambda text=text: load_or_create_vector_store(text, store_dir=root))
+
+        first = stores[1].chunks
+        assert isinstance(first, MappedChunks)
+        assert first[0], "Stores with live handles must stay open"
+
+        stores.pop(1).release()
+        assert 1 not in registry, "A released store over budget should be evicted"
+        assert first._file.closed, "Evicting a store should close its chunk file"
+        first.close()  # Closing again is harmless
+
+        assert stores[2].chunks[0], "Other stores must stay open"
+        stores.pop(2).release()
+        assert len(registry) == 0
+
+    print("✅ Evicted stores closed their mapped chunks")
+    return True
+
+def run_all_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Running Vector Store Tests")
+    print("=" * 60)
+
+    tests = [
+        test_content_hash_hit_is_mapped,
+        test_eviction_closes_mapped_chunks,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ Test failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    if failed == 0:
+        print("\n✅ All tests passed! Persisted stores are working correctly.")
+        return 0
+    else:
+        print(f"\n❌ {failed} test(s) failed. Please review the implementation.")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
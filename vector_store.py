@@ -0,0 +1,266 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import MutableMapping
+
+import faiss
+import numpy as np
+
+from ann_index import RerankIndex
+
+CACHE_ROOT = os.environ.get("RAG_CACHE_DIR", ".rag_cache")
+DEFAULT_STORE_DIR = os.path.join(CACHE_ROOT, "stores")
+# Per-site stores updated in place by re-crawls (see embeddings.IncrementalVectorStore)
+DEFAULT_SITE_STORE_DIR = os.path.join(CACHE_ROOT, "sites")
+
+INDEX_FILE = "index.faiss"
+OFFSETS_FILE = "chunks.offsets.npy"
+BLOB_FILE = "chunks.blob"
+META_FILE = "meta.json"
+# float32 vectors kept for exact re-ranking of compressed indexes
+VECTORS_FILE = "vectors.npy"
+
+class VectorStorePersistenceError(Exception):
+    """Raised when a vector store cannot be saved or loaded."""
+    pass
+
+def content_hash(text, *params):
+    """
+    Compute a stable key for a vector store built from some text.
+
+    Args:
+        text: The source text, or a list of page texts
+        *params: Anything else that changes the built store (model name, chunk size, ...)
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for param in params:
+        digest.update(str(param).encode("utf-8"))
+        digest.update(b"\0")
+    if isinstance(text, str):
+        digest.update(text.encode("utf-8"))
+    else:
+        for page in text:
+            # Separate pages so that moving text across a page boundary changes the key
+            digest.update(page.encode("utf-8"))
+            digest.update(b"\x1e")
+    return digest.hexdigest()
+
+class MappedChunks:
+    """
+    Read-only sequence of chunk texts backed by a memory-mapped offsets+blob pair.
+
+    Chunk ``i`` is the UTF-8 slice ``blob[offsets[i]:offsets[i + 1]]``, decoded on
+    access, so opening a store costs almost nothing until chunks are read.
+    """
+
+    def __init__(self, offsets_path, blob_path):
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(blob_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files cannot be mapped
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        i = int(i)
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("chunk index out of range")
+        return self._blob[int(self._offsets[i]):int(self._offsets[i + 1])].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        """Size of the mapped offsets and text, in bytes."""
+        return self._offsets.nbytes + len(self._blob)
+
+    def close(self):
+        """Unmap the text and close its file; safe to call more than once."""
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._blob = b""
+        self._offsets = np.zeros(1, dtype=np.uint64)
+        self._file.close()
+
+class MappedChunkTable(MutableMapping):
+    """
+    Chunk texts keyed by vector id, for stores updated in place.
+
+    Persisted chunks stay in a MappedChunks and are found through an id to
+    position table; chunks added later are held in memory until the store is
+    saved again. Removing a persisted chunk only forgets its position.
+    """
+
+    def __init__(self, mapped=None, ids=()):
+        """
+        Args:
+            mapped: MappedChunks holding the persisted chunks, or None
+            ids: Vector id of each chunk in ``mapped``, in order
+        """
+        self._mapped = mapped
+        self._positions = {int(i): position for position, i in enumerate(ids)}
+        self._added = {}
+
+    def __getitem__(self, i):
+        i = int(i)
+        if i in self._added:
+            return self._added[i]
+        return self._mapped[self._positions[i]]
+
+    def __setitem__(self, i, text):
+        i = int(i)
+        self._positions.pop(i, None)
+        self._added[i] = text
+
+    def __delitem__(self, i):
+        i = int(i)
+        if i in self._added:
+            del self._added[i]
+        else:
+            del self._positions[i]
+
+    def __contains__(self, i):
+        return i in self._added or i in self._positions
+
+    def __iter__(self):
+        yield from self._positions
+        yield from self._added
+
+    def __len__(self):
+        return len(self._positions) + len(self._added)
+
+    @property
+    def nbytes(self):
+        """Size of the mapped chunks plus the chunks held in memory, in bytes."""
+        mapped = self._mapped.nbytes if self._mapped is not None else 0
+        return mapped + sum(len(text.encode("utf-8")) for text in self._added.values())
+
+    def close(self):
+        """Close the mapped chunks; chunks held in memory stay readable."""
+        if self._mapped is not None:
+            self._mapped.close()
+
+def _write_chunks(directory, chunks):
+    offsets = np.zeros(len(chunks) + 1, dtype=np.uint64)
+    with open(os.path.join(directory, BLOB_FILE), "wb") as f:
+        position = 0
+        for i, chunk in enumerate(chunks):
+            data = chunk.encode("utf-8")
+            f.write(data)
+            position += len(data)
+            offsets[i + 1] = position
+    np.save(os.path.join(directory, OFFSETS_FILE), offsets)
+
+def _read_index(path, mmap_index):
+    """Read a FAISS index, memory-mapping its vectors when the index type supports it."""
+    if mmap_index:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError:
+            # Some index types (e.g. IVF in-memory lists) cannot be mapped
+            pass
+    return faiss.read_index(path)
+
+def store_path(key, root=DEFAULT_STORE_DIR):
+    """Return the directory holding the store for a content hash."""
+    return os.path.join(root, key)
+
+def has_vector_store(path):
+    """Return True if a complete store exists at ``path``."""
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+def save_vector_store(path, index, chunks, metadata=None, replace=False):
+    """
+    Persist an index, its chunk texts and metadata to a directory.
+
+    The store is written to a temporary sibling directory and renamed into place,
+    so readers never observe a half-written store. If another writer finished the
+    same store first, its copy is kept unless ``replace`` is set.
+
+    Args:
+        path: Destination directory
+        index: FAISS index or ann_index.RerankIndex
+        chunks: Chunk texts, in index order
+        metadata: Optional JSON-serializable dict stored alongside
+        replace: Whether to overwrite an existing store at ``path``
+
+    Raises:
+        VectorStorePersistenceError: If the store cannot be written
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        try:
+            meta = dict(metadata or {})
+            if isinstance(index, RerankIndex):
+                np.save(os.path.join(tmp_dir, VECTORS_FILE), index.vectors)
+                meta["rerank"] = index.candidates
+                index = index.index
+            faiss.write_index(index, os.path.join(tmp_dir, INDEX_FILE))
+            _write_chunks(tmp_dir, chunks)
+            meta.update({"count": len(chunks), "dimension": index.d, "created_at": time.time()})
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            old_dir = None
+            if replace and os.path.isdir(path):
+                # A directory cannot be renamed over a non-empty one, so move the old copy aside
+                old_dir = tempfile.mkdtemp(dir=parent, prefix=".old-")
+                os.replace(path, os.path.join(old_dir, "store"))
+            try:
+                os.replace(tmp_dir, path)
+            except OSError:
+                if not has_vector_store(path):
+                    raise
+            if old_dir is not None:
+                shutil.rmtree(old_dir, ignore_errors=True)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception as e:
+        raise VectorStorePersistenceError(f"Failed to save vector store: {str(e)}")
+
+def load_vector_store(path, mmap_index=True):
+    """
+    Open a persisted store.
+
+    Args:
+        path: Store directory
+        mmap_index: Whether to memory-map the index vectors instead of reading them into RAM
+
+    Returns:
+        tuple: (index, chunks, metadata) - FAISS index (a RerankIndex over memory-mapped
+            vectors if it was saved as one), MappedChunks and metadata dict
+
+    Raises:
+        VectorStorePersistenceError: If the store is missing or unreadable
+    """
+    try:
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        index = _read_index(os.path.join(path, INDEX_FILE), mmap_index)
+        if metadata.get("rerank"):
+            vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+            index = RerankIndex(index, vectors, metadata["rerank"])
+        chunks = MappedChunks(os.path.join(path, OFFSETS_FILE), os.path.join(path, BLOB_FILE))
+    except Exception as e:
+        raise VectorStorePersistenceError(f"Failed to load vector store: {str(e)}")
+
+    if index.ntotal != len(chunks):
+        raise VectorStorePersistenceError("Vector store is corrupt: index and chunk counts differ")
+
+    return index, chunks, metadata